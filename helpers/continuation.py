@@ -0,0 +1,93 @@
+"""
+Opaque continuation tokens for paginated tools.
+
+A token carries what the next call needs: the query plan (resolved query,
+filters, page and page size) and context already fetched (resource and dataset
+titles), so that a call with `cursor=<token>` makes a single upstream request,
+without validating arguments or looking metadata up again.
+
+Tokens are signed with HMAC-SHA256 and bound to the tool that issued them; they
+are not encrypted, and hold nothing a caller could not see in the response.
+Set CONTINUATION_SECRET to share tokens across server instances: without it, a
+random key is drawn at startup and tokens die with the process. Tokens expire
+after CONTINUATION_TOKEN_TTL_SECONDS; a tool given an invalid or expired token
+ignores it and runs from its explicit arguments.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Any
+
+from helpers import json_codec
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+TTL_SECONDS: int = int(os.getenv("CONTINUATION_TOKEN_TTL_SECONDS", "3600"))
+
+_SECRET: bytes = os.getenv("CONTINUATION_SECRET", "").encode() or secrets.token_bytes(
+    32
+)
+
+# Bytes of the HMAC kept in the token: plenty against forgery, and shorter tokens
+_SIGNATURE_BYTES = 16
+
+
+class InvalidTokenError(ValueError):
+    """The token is malformed, forged, issued by another tool or expired."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(tool: str, payload: bytes) -> bytes:
+    message = tool.encode() + b"\0" + payload
+    return hmac.new(_SECRET, message, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def encode(tool: str, state: dict[str, Any]) -> str:
+    """Token for the next call of `tool`, carrying `state` (JSON-serializable)."""
+    body = {"s": state, "e": int(time.time()) + TTL_SECONDS}
+    payload = json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(tool, payload))}"
+
+
+def decode(tool: str, token: str) -> dict[str, Any]:
+    """State carried by a token issued by `tool`; raises InvalidTokenError."""
+    encoded_payload, _, encoded_signature = token.strip().partition(".")
+    try:
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except ValueError as e:
+        raise InvalidTokenError("malformed cursor") from e
+    if not hmac.compare_digest(signature, _sign(tool, payload)):
+        raise InvalidTokenError(f"invalid cursor for {tool}")
+
+    body = json_codec.loads(payload)
+    if body["e"] < time.time():
+        raise InvalidTokenError(
+            "cursor has expired, call again with page and page_size"
+        )
+    return body["s"]
+
+
+def resume(tool: str, token: str | None) -> dict[str, Any] | None:
+    """State carried by `token`, or None if there is none or it is invalid."""
+    if not token:
+        return None
+    try:
+        return decode(tool, token)
+    except InvalidTokenError as e:
+        logger.info("Ignoring cursor passed to %s: %s", tool, e)
+        return None
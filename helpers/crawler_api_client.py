@@ -4,9 +4,15 @@ from typing import Any
 
 import httpx
 
-from helpers import env_config
+from helpers import (
+    env_config,
+    http_clients,
+    json_codec,
+    prometheus,
+    shared_cache,
+    upstream,
+)
 from helpers.logging import MAIN_LOGGER_NAME
-from helpers.user_agent import USER_AGENT
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
@@ -16,15 +22,6 @@ _cache_timestamp: float = 0
 CACHE_TTL_SECONDS: float = 3600.0  # 1 hour
 
 
-async def _get_session(
-    session: httpx.AsyncClient | None,
-) -> tuple[httpx.AsyncClient, bool]:
-    if session is not None:
-        return session, False
-    new_session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    return new_session, True
-
-
 async def fetch_resource_exceptions(
     session: httpx.AsyncClient | None = None,
     force_refresh: bool = False,
@@ -35,7 +32,8 @@ async def fetch_resource_exceptions(
     These are resources larger than the normal limits (100 MB for CSV, 12.5 MB for XLSX)
     that are still available via the Tabular API.
 
-    Results are cached for 1 hour to avoid excessive API calls.
+    Results are cached for 1 hour to avoid excessive API calls, in the process
+    and in the shared cache (see helpers.shared_cache).
 
     Args:
         session: Optional httpx.AsyncClient to reuse
@@ -55,46 +53,49 @@ async def fetch_resource_exceptions(
         and (current_time - _cache_timestamp) < CACHE_TTL_SECONDS
     ):
         logger.debug("Using cached exceptions list (%d items)", len(_exceptions_cache))
+        prometheus.record_cache_lookup("crawler_exceptions", hit=True)
         return _exceptions_cache
 
-    sess, owns_session = await _get_session(session)
-    try:
+    async def load() -> list[str]:
+        sess = session or http_clients.client("crawler_api")
         base_url: str = env_config.get_base_url("crawler_api")
         url = f"{base_url}resources-exceptions"
 
-        logger.info(f"Crawler API: Fetching resource exceptions from {url}")
+        logger.info("Crawler API: Fetching resource exceptions from %s", url)
 
-        resp = await sess.get(url, timeout=30.0)
+        resp = await upstream.get(sess, url, upstream="crawler_api", timeout=30.0)
         resp.raise_for_status()
 
-        data: list[dict[str, Any]] = resp.json()
+        data: list[dict[str, Any]] = json_codec.decode_response(resp)
 
         # Extract resource IDs from the response
         # The API returns a list of objects, each containing resource information
-        exceptions: set[str] = set()
-        for item in data:
-            resource_id = item.get("resource_id")
-            if resource_id:
-                exceptions.add(resource_id)
-
-        # Update cache
-        _exceptions_cache = exceptions
-        _cache_timestamp = current_time
-
-        logger.info(f"Crawler API: Cached {len(exceptions)} resource exceptions")
-        return exceptions
+        return sorted({item["resource_id"] for item in data if item.get("resource_id")})
 
+    try:
+        # Shared with the other replicas: one of them fetches the list per TTL
+        resource_ids = await shared_cache.get_or_load(
+            "crawler_exceptions",
+            "resources",
+            load,
+            ttl=CACHE_TTL_SECONDS,
+            refresh=force_refresh,
+        )
     except httpx.HTTPError as e:
-        logger.warning(f"Crawler API: Failed to fetch exceptions: {e}")
+        logger.warning("Crawler API: Failed to fetch exceptions: %s", e)
         # Return cached data if available, even if stale
         if _exceptions_cache is not None:
             logger.info("Crawler API: Using stale cache due to fetch error")
             return _exceptions_cache
         # Return empty set if no cache available
         return set()
-    finally:
-        if owns_session:
-            await sess.aclose()
+
+    # Update cache
+    _exceptions_cache = set(resource_ids)
+    _cache_timestamp = current_time
+
+    logger.info("Crawler API: Cached %d resource exceptions", len(_exceptions_cache))
+    return _exceptions_cache
 
 
 async def is_in_exceptions_list(
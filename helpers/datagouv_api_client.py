@@ -1,12 +1,19 @@
-import json
 import logging
+import os
 from typing import Any
 
 import httpx
-import yaml
 
-from helpers import env_config
+from helpers import (
+    env_config,
+    http_clients,
+    json_codec,
+    shared_cache,
+    upstream,
+    worker_pool,
+)
 from helpers.logging import MAIN_LOGGER_NAME
+from helpers.models import Dataservice, Dataset
 from helpers.user_agent import USER_AGENT
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
@@ -15,139 +22,183 @@ logger = logging.getLogger(MAIN_LOGGER_NAME)
 async def _fetch_json(client: httpx.AsyncClient, url: str) -> dict[str, Any]:
     logger.debug("datagouv API GET %s", url)
     try:
-        resp = await client.get(url, timeout=15.0)
+        resp = await upstream.get(client, url, upstream="datagouv_api", timeout=15.0)
         resp.raise_for_status()
-        return resp.json()
+        return json_codec.decode_response(resp)
     except httpx.HTTPError as exc:
         logger.error("datagouv API request failed for %s: %s", url, exc)
         raise
 
 
+@shared_cache.cached("metadata")
 async def get_resource_details(
     resource_id: str, session: httpx.AsyncClient | None = None
 ) -> dict[str, Any]:
     """
     Fetch the complete resource payload from the API v2 endpoint.
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        url = f"{base_url}2/datasets/resources/{resource_id}/"
-        return await _fetch_json(session, url)
-    finally:
-        if own:
-            await session.aclose()
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}2/datasets/resources/{resource_id}/"
+    return await _fetch_json(session, url)
 
 
 async def get_resource_metadata(
     resource_id: str, session: httpx.AsyncClient | None = None
 ) -> dict[str, Any]:
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        data = await get_resource_details(resource_id, session=session)
-        resource: dict[str, Any] = data.get("resource", {})
-        return {
-            "id": resource.get("id") or resource_id,
-            "title": resource.get("title") or resource.get("name"),
-            "description": resource.get("description"),
-            "dataset_id": data.get("dataset_id"),
-        }
-    finally:
-        if own:
-            await session.aclose()
+    data = await get_resource_details(resource_id, session=session)
+    resource: dict[str, Any] = data.get("resource", {})
+    return {
+        "id": resource.get("id") or resource_id,
+        "title": resource.get("title") or resource.get("name"),
+        "description": resource.get("description"),
+        "dataset_id": data.get("dataset_id"),
+    }
 
 
+@shared_cache.cached("metadata")
 async def get_dataset_details(
     dataset_id: str, session: httpx.AsyncClient | None = None
 ) -> dict[str, Any]:
     """
     Fetch the complete dataset payload from the API v1 endpoint.
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        url = f"{base_url}1/datasets/{dataset_id}/"
-        return await _fetch_json(session, url)
-    finally:
-        if own:
-            await session.aclose()
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}1/datasets/{dataset_id}/"
+    return await _fetch_json(session, url)
 
 
 async def get_dataset_metadata(
     dataset_id: str, session: httpx.AsyncClient | None = None
 ) -> dict[str, Any]:
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        data = await get_dataset_details(dataset_id, session=session)
-        return {
-            "id": data.get("id"),
-            "title": data.get("title") or data.get("name"),
-            "description_short": data.get("description_short"),
-            "description": data.get("description"),
-        }
-    finally:
-        if own:
-            await session.aclose()
+    data = await get_dataset_details(dataset_id, session=session)
+    return {
+        "id": data.get("id"),
+        "title": data.get("title") or data.get("name"),
+        "description_short": data.get("description_short"),
+        "description": data.get("description"),
+    }
 
 
 async def get_resource_and_dataset_metadata(
     resource_id: str, session: httpx.AsyncClient | None = None
 ) -> dict[str, Any]:
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    try:
-        res: dict[str, Any] = await get_resource_metadata(resource_id, session=session)
-        ds: dict[str, Any] = {}
-        ds_id = res.get("dataset_id")
-        if ds_id:
-            ds = await get_dataset_metadata(str(ds_id), session=session)
-        return {"resource": res, "dataset": ds}
-    finally:
-        if own and session:
-            await session.aclose()
+    res: dict[str, Any] = await get_resource_metadata(resource_id, session=session)
+    ds: dict[str, Any] = {}
+    ds_id = res.get("dataset_id")
+    if ds_id:
+        ds = await get_dataset_metadata(str(ds_id), session=session)
+    return {"resource": res, "dataset": ds}
+
+
+_RESOURCE_FIELDS = ("id", "title", "name", "format", "filesize", "mime", "type", "url")
 
 
-async def get_resources_for_dataset(
+@shared_cache.cached("metadata", model=Dataset)
+async def get_dataset_summary(
     dataset_id: str, session: httpx.AsyncClient | None = None
+) -> Dataset:
+    """
+    Fetch a dataset from the API v2 endpoint.
+
+    Unlike API v1, resources are not embedded: `resources` is a link object whose
+    `total` gives the number of resources (Dataset.resources_total).
+    """
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}2/datasets/{dataset_id}/"
+    return Dataset.from_api(await _fetch_json(session, url))
+
+
+@shared_cache.cached("metadata")
+async def list_dataset_resources(
+    dataset_id: str,
+    page: int = 1,
+    page_size: int = 50,
+    resource_type: str | None = None,
+    query: str | None = None,
+    session: httpx.AsyncClient | None = None,
 ) -> dict[str, Any]:
     """
-    Get all resources for a given dataset.
+    List one page of a dataset's resources via GET /2/datasets/{id}/resources/.
+
+    Args:
+        dataset_id: The dataset ID or slug.
+        page: Page number (default: 1).
+        page_size: Resources per page (default: 50, max: 100).
+        resource_type: Filter by resource type (e.g. main, documentation, update,
+            api, code, other).
+        query: Search term matched against resource titles.
 
     Returns:
-        dict with 'dataset' metadata and 'resources' list of resource IDs and titles
+        dict with keys: 'data' (resources reduced to id, title, name, format,
+        filesize, mime, type and url), 'page', 'page_size', 'total' (resources
+        matching the filters across all pages) and 'next_page' (URL or None).
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}2/datasets/{dataset_id}/resources/"
+    params: dict[str, Any] = {
+        "page": max(page, 1),
+        "page_size": max(1, min(page_size, 100)),
+    }
+    if resource_type:
+        params["type"] = resource_type
+    if query:
+        params["q"] = query
+
+    resp = await upstream.get(
+        session, url, upstream="datagouv_api", params=params, timeout=15.0
+    )
+    resp.raise_for_status()
+    data = json_codec.decode_response(resp)
+
+    resources = [
+        {f: res[f] for f in _RESOURCE_FIELDS if f in res}
+        for res in data.get("data", [])
+    ]
+    return {
+        "data": resources,
+        "page": data.get("page", params["page"]),
+        "page_size": data.get("page_size", params["page_size"]),
+        "total": data.get("total", len(resources)),
+        "next_page": data.get("next_page"),
+    }
+
+
+# Largest OpenAPI spec we download (some government specs are several MB of YAML)
+OPENAPI_SPEC_MAX_BYTES: int = int(
+    os.getenv("OPENAPI_SPEC_MAX_BYTES", str(10 * 1024 * 1024))
+)
+
+
+def parse_openapi_spec(content: str, url: str) -> dict[str, Any]:
+    """
+    Parse an OpenAPI/Swagger document, trying JSON first and then YAML.
+
+    This is CPU-bound on large documents: call it through helpers.worker_pool.
+
+    Raises:
+        ValueError: If the content cannot be parsed as JSON or YAML.
+    """
+    # Only JSON documents start with an object or array: skip the attempt for YAML
+    if content.lstrip()[:1] in ("{", "["):
+        try:
+            return json_codec.loads(content)
+        except ValueError:
+            pass
+    # Imported here: yaml is only needed for the rare YAML specs and slows startup
+    import yaml
+
+    # libyaml-backed loader when available: several times faster on large specs
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     try:
-        ds = await get_dataset_metadata(dataset_id, session=session)
-        base_url: str = env_config.get_base_url("datagouv_api")
-        # Fetch resources from API v1
-        url = f"{base_url}1/datasets/{dataset_id}/"
-        data = await _fetch_json(session, url)
-        resources: list[dict] = data.get("resources", [])
-        res_list: list[tuple] = [
-            (res.get("id"), res.get("title", "") or res.get("name", ""))
-            for res in resources
-            if res.get("id")
-        ]
-        return {"dataset": ds, "resources": res_list}
-    finally:
-        if own and session:
-            await session.aclose()
+        return yaml.load(content, Loader=loader)
+    except yaml.YAMLError:
+        pass
+
+    raise ValueError(f"Could not parse OpenAPI spec from {url} as JSON or YAML")
 
 
 async def fetch_openapi_spec(
@@ -162,53 +213,47 @@ async def fetch_openapi_spec(
 
     Raises:
         httpx.HTTPError: If the HTTP request fails.
+        upstream.ResponseTooLargeError: If the spec exceeds OPENAPI_SPEC_MAX_BYTES.
         ValueError: If the response cannot be parsed as JSON or YAML.
     """
+    # Specs are hosted by third parties: no shared client for them
     own = session is None
     if own:
         session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
     assert session is not None
     try:
         logger.debug("Fetching OpenAPI spec from %s", url)
-        resp = await session.get(url, timeout=15.0, follow_redirects=True)
+        resp = await upstream.get(
+            session,
+            url,
+            upstream="openapi_spec",
+            timeout=15.0,
+            max_bytes=OPENAPI_SPEC_MAX_BYTES,
+            follow_redirects=True,
+        )
         resp.raise_for_status()
-        content = resp.text
-
-        # Try JSON first, then YAML
-        try:
-            return json.loads(content)
-        except (json.JSONDecodeError, ValueError):
-            pass
-        try:
-            return yaml.safe_load(content)
-        except yaml.YAMLError:
-            pass
-
-        raise ValueError(f"Could not parse OpenAPI spec from {url} as JSON or YAML")
+        return await worker_pool.run(
+            "openapi_parse", parse_openapi_spec, resp.text, url
+        )
     finally:
         if own:
             await session.aclose()
 
 
+@shared_cache.cached("metadata", model=Dataservice)
 async def get_dataservice_details(
     dataservice_id: str, session: httpx.AsyncClient | None = None
-) -> dict[str, Any]:
+) -> Dataservice:
     """
-    Fetch the full catalog payload for a third-party API from GET /1/dataservices/{id}/.
+    Fetch the catalog entry of a third-party API from GET /1/dataservices/{id}/.
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        url = f"{base_url}1/dataservices/{dataservice_id}/"
-        return await _fetch_json(session, url)
-    finally:
-        if own:
-            await session.aclose()
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}1/dataservices/{dataservice_id}/"
+    return Dataservice.from_api(await _fetch_json(session, url))
 
 
+@shared_cache.cached("search")
 async def search_dataservices(
     query: str,
     page: int = 1,
@@ -226,53 +271,49 @@ async def search_dataservices(
     Returns:
         dict with 'data' (list of third-party API entries), 'page', 'page_size', and 'total'
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        url = f"{base_url}2/dataservices/search/"
-        params = {
-            "q": query,
-            "page": page,
-            "page_size": min(page_size, 100),
-        }
-        resp = await session.get(url, params=params, timeout=15.0)
-        resp.raise_for_status()
-        data = resp.json()
-
-        raw_items: list[dict[str, Any]] = data.get("data", [])
-        results: list[dict[str, Any]] = []
-        for item in raw_items:
-            tags: list[str] = item.get("tags") or []
-
-            results.append(
-                {
-                    "id": item.get("id"),
-                    "title": item.get("title") or "",
-                    "description": item.get("description", ""),
-                    "organization": item.get("organization", {}).get("name")
-                    if item.get("organization")
-                    else None,
-                    "base_api_url": item.get("base_api_url"),
-                    "machine_documentation_url": item.get("machine_documentation_url"),
-                    "tags": tags,
-                    "url": f"{env_config.get_base_url('site')}dataservices/{item.get('id', '')}",
-                }
-            )
-
-        return {
-            "data": results,
-            "page": page,
-            "page_size": len(results),
-            "total": data.get("total", len(results)),
-        }
-    finally:
-        if own:
-            await session.aclose()
-
-
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}2/dataservices/search/"
+    params = {
+        "q": query,
+        "page": page,
+        "page_size": min(page_size, 100),
+    }
+    resp = await upstream.get(
+        session, url, upstream="datagouv_api", params=params, timeout=15.0
+    )
+    resp.raise_for_status()
+    data = json_codec.decode_response(resp)
+
+    raw_items: list[dict[str, Any]] = data.get("data", [])
+    results: list[dict[str, Any]] = []
+    for item in raw_items:
+        tags: list[str] = item.get("tags") or []
+
+        results.append(
+            {
+                "id": item.get("id"),
+                "title": item.get("title") or "",
+                "description": item.get("description", ""),
+                "organization": item.get("organization", {}).get("name")
+                if item.get("organization")
+                else None,
+                "base_api_url": item.get("base_api_url"),
+                "machine_documentation_url": item.get("machine_documentation_url"),
+                "tags": tags,
+                "url": f"{env_config.get_base_url('site')}dataservices/{item.get('id', '')}",
+            }
+        )
+
+    return {
+        "data": results,
+        "page": page,
+        "page_size": len(results),
+        "total": data.get("total", len(results)),
+    }
+
+
+@shared_cache.cached("search")
 async def search_datasets(
     query: str,
     page: int = 1,
@@ -296,58 +337,53 @@ async def search_datasets(
     Returns:
         dict with 'data' (list of datasets), 'page', 'page_size', and 'total'
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        # Use API v2 for dataset search
-        url = f"{base_url}2/datasets/search/"
-        params: dict[str, Any] = {
-            "q": query,
-            "page": page,
-            "page_size": min(page_size, 100),  # API limit
-        }
-        if sort:
-            params["sort"] = sort
-        if last_update_range:
-            params["last_update_range"] = last_update_range
-        resp = await session.get(url, params=params, timeout=15.0)
-        resp.raise_for_status()
-        data = resp.json()
-
-        datasets: list[dict[str, Any]] = data.get("data", [])
-        # Extract relevant fields for each dataset
-        results: list[dict[str, Any]] = []
-        for ds in datasets:
-            tags: list[str] = ds.get("tags") or []
-
-            results.append(
-                {
-                    "id": ds.get("id"),
-                    "title": ds.get("title") or ds.get("name", ""),
-                    "description": ds.get("description", ""),
-                    "description_short": ds.get("description_short", ""),
-                    "slug": ds.get("slug", ""),
-                    "organization": ds.get("organization", {}).get("name")
-                    if ds.get("organization")
-                    else None,
-                    "tags": tags,
-                    "resources_count": ds.get("resources", {}).get("total", 0),
-                    "url": f"{env_config.get_base_url('site')}datasets/{ds.get('slug', ds.get('id', ''))}",
-                }
-            )
-
-        return {
-            "data": results,
-            "page": page,
-            "page_size": len(results),
-            "total": data.get("total", len(results)),
-        }
-    finally:
-        if own:
-            await session.aclose()
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    # Use API v2 for dataset search
+    url = f"{base_url}2/datasets/search/"
+    params: dict[str, Any] = {
+        "q": query,
+        "page": page,
+        "page_size": min(page_size, 100),  # API limit
+    }
+    if sort:
+        params["sort"] = sort
+    if last_update_range:
+        params["last_update_range"] = last_update_range
+    resp = await upstream.get(
+        session, url, upstream="datagouv_api", params=params, timeout=15.0
+    )
+    resp.raise_for_status()
+    data = json_codec.decode_response(resp)
+
+    datasets: list[dict[str, Any]] = data.get("data", [])
+    # Extract relevant fields for each dataset
+    results: list[dict[str, Any]] = []
+    for ds in datasets:
+        tags: list[str] = ds.get("tags") or []
+
+        results.append(
+            {
+                "id": ds.get("id"),
+                "title": ds.get("title") or ds.get("name", ""),
+                "description": ds.get("description", ""),
+                "description_short": ds.get("description_short", ""),
+                "slug": ds.get("slug", ""),
+                "organization": ds.get("organization", {}).get("name")
+                if ds.get("organization")
+                else None,
+                "tags": tags,
+                "resources_count": ds.get("resources", {}).get("total", 0),
+                "url": f"{env_config.get_base_url('site')}datasets/{ds.get('slug', ds.get('id', ''))}",
+            }
+        )
+
+    return {
+        "data": results,
+        "page": page,
+        "page_size": len(results),
+        "total": data.get("total", len(results)),
+    }
 
 
 def _organization_metrics_summary(metrics: Any) -> dict[str, Any] | None:
@@ -362,6 +398,20 @@ def _organization_metrics_summary(metrics: Any) -> dict[str, Any] | None:
     return out or None
 
 
+@shared_cache.cached("metadata")
+async def get_organization_details(
+    organization: str, session: httpx.AsyncClient | None = None
+) -> dict[str, Any]:
+    """
+    Fetch an organization payload from the API v1 endpoint, by ID or slug.
+    """
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}1/organizations/{organization}/"
+    return await _fetch_json(session, url)
+
+
+@shared_cache.cached("search")
 async def search_organizations(
     query: str = "",
     page: int = 1,
@@ -391,65 +441,60 @@ async def search_organizations(
         badges, metrics, profile_url, url), 'page', 'page_size', and 'total' (full
         match count across pages).
     """
-    own = session is None
-    if own:
-        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    assert session is not None
-    try:
-        base_url: str = env_config.get_base_url("datagouv_api")
-        url = f"{base_url}2/organizations/search/"
-        params: dict[str, Any] = {
-            "page": page,
-            "page_size": min(page_size, 100),
-        }
-        if query:
-            params["q"] = query
-        if sort:
-            params["sort"] = sort
-        if badge:
-            params["badge"] = badge
-        if name:
-            params["name"] = name
-        if business_number_id:
-            params["business_number_id"] = business_number_id
-
-        resp = await session.get(url, params=params, timeout=15.0)
-        resp.raise_for_status()
-        data = resp.json()
-
-        orgs: list[dict[str, Any]] = data.get("data", [])
-        site_base = env_config.get_base_url("site").rstrip("/")
-        results: list[dict[str, Any]] = []
-        for org in orgs:
-            raw_badges = org.get("badges") or []
-            badge_kinds: list[str] = []
-            for b in raw_badges:
-                if isinstance(b, dict) and b.get("kind"):
-                    badge_kinds.append(str(b["kind"]))
-
-            metrics_summary = _organization_metrics_summary(org.get("metrics"))
-
-            slug = org.get("slug") or ""
-            org_id = org.get("id")
-            results.append(
-                {
-                    "id": org_id,
-                    "name": org.get("name") or "",
-                    "slug": slug,
-                    "acronym": org.get("acronym"),
-                    "badges": badge_kinds,
-                    "metrics": metrics_summary,
-                    "profile_url": org.get("page"),
-                    "url": f"{site_base}/organizations/{slug or org_id or ''}",
-                }
-            )
-
-        return {
-            "data": results,
-            "page": page,
-            "page_size": len(results),
-            "total": data.get("total", len(results)),
-        }
-    finally:
-        if own:
-            await session.aclose()
+    session = session or http_clients.client("datagouv_api")
+    base_url: str = env_config.get_base_url("datagouv_api")
+    url = f"{base_url}2/organizations/search/"
+    params: dict[str, Any] = {
+        "page": page,
+        "page_size": min(page_size, 100),
+    }
+    if query:
+        params["q"] = query
+    if sort:
+        params["sort"] = sort
+    if badge:
+        params["badge"] = badge
+    if name:
+        params["name"] = name
+    if business_number_id:
+        params["business_number_id"] = business_number_id
+
+    resp = await upstream.get(
+        session, url, upstream="datagouv_api", params=params, timeout=15.0
+    )
+    resp.raise_for_status()
+    data = json_codec.decode_response(resp)
+
+    orgs: list[dict[str, Any]] = data.get("data", [])
+    site_base = env_config.get_base_url("site").rstrip("/")
+    results: list[dict[str, Any]] = []
+    for org in orgs:
+        raw_badges = org.get("badges") or []
+        badge_kinds: list[str] = []
+        for b in raw_badges:
+            if isinstance(b, dict) and b.get("kind"):
+                badge_kinds.append(str(b["kind"]))
+
+        metrics_summary = _organization_metrics_summary(org.get("metrics"))
+
+        slug = org.get("slug") or ""
+        org_id = org.get("id")
+        results.append(
+            {
+                "id": org_id,
+                "name": org.get("name") or "",
+                "slug": slug,
+                "acronym": org.get("acronym"),
+                "badges": badge_kinds,
+                "metrics": metrics_summary,
+                "profile_url": org.get("page"),
+                "url": f"{site_base}/organizations/{slug or org_id or ''}",
+            }
+        )
+
+    return {
+        "data": results,
+        "page": page,
+        "page_size": len(results),
+        "total": data.get("total", len(results)),
+    }
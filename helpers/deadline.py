@@ -0,0 +1,62 @@
+"""
+Request-scoped deadline shared by every upstream call made during one tool invocation.
+
+`log_tool` binds a deadline when a tool starts; helpers then derive each upstream
+timeout from the time left (see helpers.upstream.get) instead of a fixed per-call
+value, so a tool making several serial calls cannot outlive the MCP client's patience.
+"""
+
+import os
+import time
+from contextvars import ContextVar, Token
+
+# Overall wall-clock budget for one tool call (MCP clients commonly give up after 60s)
+TOOL_TIMEOUT_SECONDS: float = float(os.getenv("MCP_TOOL_TIMEOUT_SECONDS", "50"))
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when the request deadline has passed before an upstream call starts."""
+
+
+def apply_deadline(seconds: float) -> Token[float | None]:
+    """
+    Bind a deadline `seconds` from now for the current context.
+
+    An enclosing deadline is never extended: the earliest of the two wins.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token[float | None]) -> None:
+    _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """Seconds until the current deadline (may be negative), or None if unbounded."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def remaining_timeout(timeout: float) -> float:
+    """
+    Clamp a per-call timeout to the time left before the current deadline.
+
+    Raises:
+        DeadlineExceededError: If the deadline has already passed.
+    """
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceededError(
+            "The request deadline was exceeded before the upstream call could start."
+        )
+    return min(timeout, left)
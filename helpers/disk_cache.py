@@ -0,0 +1,237 @@
+"""
+On-disk tier of the in-process shared cache, so that restarts resume warm.
+
+When SHARED_CACHE_DIR is set (and SHARED_CACHE_URL is not), every value written
+to the in-process cache (catalog metadata, search results, Tabular API profiles,
+the crawler exceptions list) is also written to a SQLite database in that
+directory, and in-memory misses are looked up there before going upstream.
+
+The database runs in WAL mode: a commit is atomic, so a crash loses at most the
+last writes and never leaves a half-written entry. A database found corrupt is
+moved aside and recreated; a busy or locked one is not (the call fails and the
+value is loaded from upstream). Expiry uses wall-clock time so that entries keep
+their TTL across restarts. Expired entries are purged, and those closest to
+expiry evicted once the stored entries exceed SHARED_CACHE_DISK_MAX_BYTES; freed
+pages are then returned to the filesystem (incremental vacuum). SQLite calls run
+off the event loop in a thread of their own, so that disk waits never hold up
+the CPU worker pool.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, ParamSpec, TypeVar
+
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+DIRECTORY: str = os.getenv("SHARED_CACHE_DIR", "").strip()
+MAX_BYTES: int = int(os.getenv("SHARED_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024)))
+FILENAME = "shared_cache.sqlite3"
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Eviction frees space down to this share of MAX_BYTES, not just below it
+_LOW_WATERMARK = 0.9
+# Expired entries are purged every so many writes
+_PURGE_EVERY_WRITES = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+"""
+
+
+class DiskStore:
+    """Synchronous SQLite store; one connection shared by the worker threads."""
+
+    def __init__(self, path: Path, max_bytes: int = MAX_BYTES) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._size = 0
+        self._writes = 0
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            # Must precede the first table: lets eviction hand pages back to the
+            # filesystem
+            db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            db.execute("PRAGMA journal_mode = WAL")
+            # With WAL, NORMAL keeps the database consistent on power loss
+            db.execute("PRAGMA synchronous = NORMAL")
+            db.executescript(_SCHEMA)
+            (check,) = db.execute("PRAGMA quick_check").fetchone()
+            if check != "ok":
+                raise sqlite3.DatabaseError(f"quick_check failed: {check}")
+        except BaseException:
+            db.close()
+            raise
+        return db
+
+    @staticmethod
+    def _is_corrupt(error: sqlite3.DatabaseError) -> bool:
+        # OperationalError covers transient failures ("database is locked",
+        # I/O errors): the file itself may be fine
+        return not isinstance(error, sqlite3.OperationalError)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is not None:
+            return self._db
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._db = self._open()
+        except sqlite3.DatabaseError as e:
+            if not self._is_corrupt(e):
+                raise
+            corrupt = self.path.with_name(
+                self.path.name + f".corrupt-{int(time.time())}"
+            )
+            logger.warning(
+                "Disk cache %s unreadable (%s), moved to %s", self.path, e, corrupt
+            )
+            self.path.rename(corrupt)
+            for suffix in ("-wal", "-shm"):
+                Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+            self._db = self._open()
+        self._purge_expired(self._db)
+        self._vacuum(self._db)
+        (self._size,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        (count,) = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()
+        logger.info("Disk cache %s opened with %d entries", self.path, count)
+        return self._db
+
+    @staticmethod
+    def _purge_expired(db: sqlite3.Connection) -> int:
+        with db:
+            return db.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    @staticmethod
+    def _vacuum(db: sqlite3.Connection) -> None:
+        db.execute("PRAGMA incremental_vacuum")
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def get(self, key: str) -> tuple[bytes, float] | None:
+        """Value of `key` and its remaining TTL in seconds, or None."""
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None:
+            return None
+        ttl = row[1] - time.time()
+        return (row[0], ttl) if ttl > 0 else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        size = len(key) + len(value)
+        if size > self.max_bytes or ttl <= 0:
+            return
+        with self._lock:
+            db = self._connection()
+            with db:
+                previous = db.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, expires_at, size) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, time.time() + ttl, size),
+                )
+            self._size += size - (previous[0] if previous else 0)
+            self._writes += 1
+            if self._size > self.max_bytes or self._writes >= _PURGE_EVERY_WRITES:
+                self._compact(db)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            db = self._connection()
+            row = db.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                with db:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= row[0]
+
+    def _compact(self, db: sqlite3.Connection) -> None:
+        """Purge expired entries, evict the soonest to expire if still too big."""
+        self._writes = 0
+        freed = self._purge_expired(db)
+        target = int(self.max_bytes * _LOW_WATERMARK)
+        (self._size,) = db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if self._size > target:
+            with db:
+                rows = db.execute(
+                    "SELECT key, size FROM entries ORDER BY expires_at"
+                ).fetchall()
+                for key, size in rows:
+                    if self._size <= target:
+                        break
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._size -= size
+                    freed += 1
+        if freed:
+            self._vacuum(db)
+
+    def compact(self) -> None:
+        with self._lock:
+            self._compact(self._connection())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class DiskBackend:
+    """Async facade of DiskStore: each call runs in the store's I/O thread."""
+
+    def __init__(self, directory: str, max_bytes: int = MAX_BYTES) -> None:
+        self.store = DiskStore(Path(directory) / FILENAME, max_bytes)
+        # One thread is enough: the store serializes its calls anyway
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="disk-cache"
+        )
+
+    async def _run(self, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def get(self, key: str) -> tuple[bytes, float] | None:
+        return await self._run(self.store.get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._run(self.store.set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self.store.delete, key)
+
+    async def close(self) -> None:
+        await self._run(self.store.close)
+        self._executor.shutdown(wait=False)
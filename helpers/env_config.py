@@ -18,6 +18,12 @@ _ENV_TARGETS = {
 }
 
 
+def env_name() -> str:
+    """Current data.gouv.fr environment: DATAGOUV_API_ENV (demo|prod), prod if unset or invalid."""
+    name: str = os.getenv("DATAGOUV_API_ENV", "prod").strip().lower()
+    return name if name in _ENV_TARGETS else "prod"
+
+
 def get_base_url(api_name: str) -> str:
     """
     Get the base URL for a specific API in the current environment.
@@ -34,10 +40,7 @@ def get_base_url(api_name: str) -> str:
     Raises:
         KeyError: If api_name is not a valid API name.
     """
-    env_name: str = os.getenv("DATAGOUV_API_ENV", "prod").strip().lower()
-    if env_name not in _ENV_TARGETS:
-        env_name = "prod"
-    config: dict = _ENV_TARGETS[env_name]
+    config: dict = _ENV_TARGETS[env_name()]
     if api_name not in config:
         raise KeyError(
             f"Invalid api_name: {api_name}. "
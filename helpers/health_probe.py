@@ -13,12 +13,14 @@ import logging
 from mcp.types import TextContent
 
 from helpers.logging import MAIN_LOGGER_NAME
-from helpers.mcp_client import call_tool_on_mcp
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
 
 async def _run_health_check() -> bool:
+    # The MCP client stack is only needed by /health: keep it out of startup
+    from helpers.mcp_client import call_tool_on_mcp
+
     logger.debug("health probe: starting health check")
     try:
         result = await call_tool_on_mcp(
@@ -37,5 +39,5 @@ async def _run_health_check() -> bool:
         return True
 
     except Exception as e:
-        logger.error(f"health probe check failed: {e}")
+        logger.error("health probe check failed: %s", e)
         return False
@@ -0,0 +1,46 @@
+"""
+Long-lived HTTP clients shared by the upstream API helpers, one per upstream.
+
+A client per call pays for a TCP connection and a TLS handshake on every request.
+Helpers called without a `session` use the client of their upstream instead, whose
+connection pool is kept across calls and tools. The startup warm-up (see
+helpers.warmup) opens a connection of each pool ahead of the first request, and
+the clients are closed when the server shuts down.
+"""
+
+import asyncio
+
+import httpx
+
+from helpers import env_config
+from helpers.user_agent import USER_AGENT
+
+# Upstreams with a shared client, as named in helpers.env_config
+UPSTREAMS = ("datagouv_api", "tabular_api", "metrics_api", "crawler_api")
+
+# upstream -> (client, event loop it was created on)
+_clients: dict[str, tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+
+
+def client(upstream: str) -> httpx.AsyncClient:
+    """Shared client for `upstream` (e.g. "datagouv_api"), created on first use."""
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(upstream)
+    # Pooled connections belong to the event loop that opened them
+    if entry is None or entry[1] is not loop or entry[0].is_closed:
+        entry = (httpx.AsyncClient(headers={"User-Agent": USER_AGENT}), loop)
+        _clients[upstream] = entry
+    return entry[0]
+
+
+async def open_connection(upstream: str) -> None:
+    """Open a pooled connection to `upstream` (DNS, TCP and TLS) ahead of a call."""
+    await client(upstream).head(env_config.get_base_url(upstream), timeout=5.0)
+
+
+async def close() -> None:
+    """Close every shared client (their connections are reopened on next use)."""
+    clients = [shared for shared, _ in _clients.values()]
+    _clients.clear()
+    for shared in clients:
+        await shared.aclose()
@@ -0,0 +1,69 @@
+"""
+JSON decoding of upstream responses.
+
+Decodes straight from the response bytes with orjson or msgspec when one of them
+is installed (several times faster than the standard library on large dataset
+documents and Tabular API pages), and with httpx's `resp.json()` otherwise.
+Neither is a dependency: install one to enable it (e.g. `uv pip install orjson`).
+"""
+
+import json
+import logging
+from typing import Any, Callable
+
+import httpx
+
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+
+def _stdlib_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+def _select_backend() -> tuple[str, Callable[[bytes | str], Any]]:
+    try:
+        import orjson  # ty: ignore[unresolved-import]
+
+        # orjson.JSONDecodeError already subclasses json.JSONDecodeError
+        return "orjson", orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec  # ty: ignore[unresolved-import]
+
+        decoder = msgspec.json.Decoder()
+
+        def msgspec_loads(data: bytes | str) -> Any:
+            try:
+                return decoder.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+
+        return "msgspec", msgspec_loads
+    except ImportError:
+        pass
+    return "json", _stdlib_loads
+
+
+BACKEND, _loads = _select_backend()
+logger.debug("JSON codec backend: %s", BACKEND)
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Decode a JSON document.
+
+    Raises:
+        ValueError: If `data` is not valid JSON (json.JSONDecodeError for the
+            standard library and orjson).
+    """
+    return _loads(data)
+
+
+def decode_response(resp: httpx.Response) -> Any:
+    """Decode a JSON response body; drop-in replacement for `resp.json()`."""
+    if _loads is _stdlib_loads:
+        return resp.json()
+    return _loads(resp.content)
@@ -1,36 +1,194 @@
 import asyncio
+import atexit
 import functools
 import inspect
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
 from typing import Any, cast
 
 # Python unified logging config
 MAIN_LOGGER_NAME = "mcp.main"
 
-logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO"),
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    force=True,
-)
+# "text" (human-readable, default) or "json" (one JSON object per line)
+LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text").strip().lower()
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(request_id)s | %(message)s"
 
-# Uvicorn logging config
-UVICORN_LOGGING_CONFIG = {
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_current_tool: ContextVar[str | None] = ContextVar("current_tool", default=None)
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]+")
+
+
+def bind_request_id(request_id: str) -> Token[str | None]:
+    """Attach `request_id` to every log record emitted in the current context."""
+    return _request_id.set(request_id)
+
+
+def request_id_from_header(value: str | None) -> str:
+    """Reuse a well-formed incoming X-Request-ID, or generate a new one."""
+    if value and len(value) <= 128 and _REQUEST_ID_PATTERN.fullmatch(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def reset_request_id(token: Token[str | None]) -> None:
+    _request_id.reset(token)
+
+
+def current_request_id() -> str | None:
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds")
+            .replace("+00:00", "Z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "tool"):
+            value = getattr(record, key, None)
+            if value and value != "-":
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of low-severity records, per logger.
+
+    `rates` maps logger names to the fraction (0.0–1.0) of records to keep; a name
+    also covers its child loggers and the longest match wins. Records above
+    `max_level` (WARNING and up by default) are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, float], max_level: int = logging.INFO) -> None:
+        super().__init__()
+        self.rates = rates
+        self.max_level = max_level
+
+    def _rate(self, name: str) -> float:
+        while True:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return rate
+            if "." not in name:
+                return 1.0
+            name = name.rsplit(".", 1)[0]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+def parse_sampling_rates(value: str) -> dict[str, float]:
+    """Parse LOG_SAMPLING ("logger=rate,other.logger=rate") into a dict."""
+    rates: dict[str, float] = {}
+    for item in value.split(","):
+        name, sep, rate = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that stamps the request context onto records before enqueuing.
+
+    Context variables are only visible on the emitting side, so the request ID and
+    tool name are captured here; formatting and stream I/O happen on the listener
+    thread. The exception text is kept apart from the message so that the JSON
+    formatter can report it in its own field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = _request_id.get() or "-"
+        record.tool = _current_tool.get() or "-"
+        return record
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """
+    Route every log record through a queue drained by a background thread.
+
+    The root logger gets a single QueueHandler, so emitting a record on the event
+    loop only costs an in-memory enqueue; the StreamHandler (and its possibly
+    blocking writes to stderr) runs on the QueueListener thread. Called by the
+    entry points rather than on import, so that importing helpers starts no thread.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(
+        JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    queue_handler = _ContextQueueHandler(log_queue)
+    queue_handler.addFilter(
+        SamplingFilter(parse_sampling_rates(os.getenv("LOG_SAMPLING", "")))
+    )
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def _stop_logging() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_logging)
+
+# Uvicorn logging config: uvicorn loggers propagate to the root queue handler
+UVICORN_LOGGING_CONFIG: dict[str, Any] = {
     "version": 1,
     "disable_existing_loggers": False,
-    "formatters": {
-        "default": {"format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s"}
-    },
-    "handlers": {
-        "default": {
-            "class": "logging.StreamHandler",
-            "formatter": "default",
-        }
-    },
-    "root": {
-        "level": "INFO",
-        "handlers": ["default"],
-    },
 }
 
 # Decorator for tools logging
@@ -38,14 +196,89 @@ TOOLS_LOGGER_NAME = "mcp.tools"
 logger = logging.getLogger(TOOLS_LOGGER_NAME)
 
 
+def current_tool_name() -> str | None:
+    """Name of the tool being executed in the current context, if any."""
+    return _current_tool.get()
+
+
 def log_tool(func):
+    signature = inspect.signature(func)
+
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):
+        from helpers import (
+            deadline,
+            prometheus,
+            request_cancellation,
+            tool_cache,
+            tool_output,
+            tracing,
+        )
         from helpers.matomo import track_matomo_tool
 
-        asyncio.create_task(track_matomo_tool(func.__name__))
-        logger.info("Tool called: %s | kwargs=%s", func.__name__, kwargs)
-        return await func(*args, **kwargs)
+        tool_name = func.__name__
+        asyncio.create_task(track_matomo_tool(tool_name))
+        logger.debug("Tool called: %s | kwargs=%s", tool_name, kwargs)
+        prometheus.TOOL_CALLS.inc(tool=tool_name)
+        prometheus.TOOLS_IN_FLIGHT.inc(tool=tool_name)
+        tool_token = _current_tool.set(tool_name)
+        start = time.perf_counter()
+
+        # Bind the tool deadline: upstream calls derive their timeouts from it, and
+        # whatever is still running when it expires (or when the HTTP client
+        # disconnects) is cancelled.
+        token = deadline.apply_deadline(deadline.TOOL_TIMEOUT_SECONDS)
+        cancellation = request_cancellation.current()
+        scope = asyncio.timeout(deadline.time_left())
+        span_attributes = {"mcp.tool.name": tool_name}
+        with tracing.start_span(f"tool {tool_name}", attributes=span_attributes):
+            try:
+                async with scope:
+                    if cancellation is not None:
+                        cancellation.register(scope)
+                    # Defaults filled in: omitted and explicit defaults share a key
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    return await tool_cache.call(
+                        tool_name, bound.arguments, lambda: func(*args, **kwargs)
+                    )
+            except TimeoutError:
+                if not scope.expired():
+                    prometheus.TOOL_ERRORS.inc(
+                        tool=tool_name, error_type="TimeoutError"
+                    )
+                    raise
+                if cancellation is not None and cancellation.disconnected:
+                    prometheus.TOOL_CALLS_CANCELLED.inc(
+                        tool=tool_name, reason="disconnect"
+                    )
+                    logger.info("Tool %s cancelled: client disconnected", tool_name)
+                    return tool_output.error(
+                        f"Error: {tool_name} was cancelled (client disconnected)."
+                    )
+                prometheus.TOOL_CALLS_CANCELLED.inc(tool=tool_name, reason="deadline")
+                logger.warning(
+                    "Tool %s cancelled after exceeding its %.0fs deadline",
+                    tool_name,
+                    deadline.TOOL_TIMEOUT_SECONDS,
+                )
+                return tool_output.error(
+                    f"Error: {tool_name} did not complete within "
+                    f"{deadline.TOOL_TIMEOUT_SECONDS:.0f} seconds because upstream "
+                    "services are responding slowly. Please try again in about one minute."
+                )
+            except Exception as e:
+                prometheus.record_tool_error(e)
+                raise
+            finally:
+                if cancellation is not None:
+                    cancellation.unregister(scope)
+                deadline.reset_deadline(token)
+                _current_tool.reset(tool_token)
+                prometheus.TOOLS_IN_FLIGHT.dec(tool=tool_name)
+                elapsed = time.perf_counter() - start
+                prometheus.TOOL_DURATION.observe(elapsed, tool=tool_name)
+                logger.info("Tool %s finished in %.3fs", tool_name, elapsed)
 
-    cast(Any, async_wrapper).__signature__ = inspect.signature(func)
+    cast(Any, async_wrapper).__signature__ = signature
     return async_wrapper
@@ -22,7 +22,16 @@ _request_user_agent: ContextVar[str] = ContextVar(
 
 # Shared client reused across all tracking calls to avoid creating a new
 # TCP connection + SSL handshake + httpx overhead on every MCP request.
-_client = httpx.AsyncClient(timeout=1.5)
+# Created on first use: building its SSL context is slow and useless when
+# tracking is disabled.
+_client: httpx.AsyncClient | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=1.5)
+    return _client
 
 
 def apply_matomo_request_context(
@@ -50,9 +59,16 @@ async def _post_matomo(payload: dict) -> None:
     if not MATOMO_URL or not MATOMO_SITE_ID:
         return
     try:
-        await _client.post(f"{MATOMO_URL}/matomo.php", data=payload)
+        await _get_client().post(f"{MATOMO_URL}/matomo.php", data=payload)
     except Exception as e:
-        logging.getLogger(MAIN_LOGGER_NAME).error(f"Matomo tracking failed: {e}")
+        logging.getLogger(MAIN_LOGGER_NAME).error("Matomo tracking failed: %s", e)
+
+
+async def open_connection() -> None:
+    """Open the shared client's connection to Matomo ahead of the first hit."""
+    if not MATOMO_URL or not MATOMO_SITE_ID:
+        return
+    await _get_client().head(MATOMO_URL)
 
 
 async def track_matomo_request(url: str, path: str, headers: dict[str, str]) -> None:
@@ -0,0 +1,98 @@
+"""
+Constant-memory aggregation of metric rows streamed from a metric-api CSV export.
+
+Rows are folded into per-month totals as they arrive, so memory grows with the
+number of months covered, not with the number of rows (an organization-level
+export has one row per object and month). Moving averages and year-over-year
+changes are derived from the monthly totals once the stream is consumed.
+"""
+
+import csv
+from typing import AsyncIterator, Iterable
+
+
+class MonthlyAggregator:
+    """Sum numeric columns per month over a stream of CSV rows."""
+
+    def __init__(self, columns: Iterable[str], month_column: str = "metric_month"):
+        self.columns = list(columns)
+        self.month_column = month_column
+        self.rows = 0
+        self._totals: dict[str, list[int]] = {}
+
+    def add(self, row: dict[str, str]) -> None:
+        month = (row.get(self.month_column) or "")[:7]
+        if not month:
+            return
+        totals = self._totals.get(month)
+        if totals is None:
+            totals = self._totals[month] = [0] * len(self.columns)
+        for i, column in enumerate(self.columns):
+            value = row.get(column)
+            if value:
+                try:
+                    totals[i] += int(float(value))
+                except ValueError:
+                    continue
+        self.rows += 1
+
+    def months(self) -> list[str]:
+        """Months seen so far, most recent first."""
+        return sorted(self._totals, reverse=True)
+
+    def total(self, month: str, column: str) -> int:
+        totals = self._totals.get(month)
+        return totals[self.columns.index(column)] if totals else 0
+
+    def grand_total(self, column: str) -> int:
+        i = self.columns.index(column)
+        return sum(totals[i] for totals in self._totals.values())
+
+    def moving_average(self, month: str, column: str, window: int = 3) -> float | None:
+        """Average of `column` over `window` months ending at `month` (None if short)."""
+        values = []
+        year, mon = int(month[:4]), int(month[5:7])
+        for _ in range(window):
+            key = f"{year:04d}-{mon:02d}"
+            if key not in self._totals:
+                return None
+            values.append(self.total(key, column))
+            year, mon = (year, mon - 1) if mon > 1 else (year - 1, 12)
+        return sum(values) / window
+
+    def year_over_year(self, month: str, column: str) -> float | None:
+        """Relative change of `column` versus the same month one year earlier."""
+        previous = f"{int(month[:4]) - 1:04d}{month[4:7]}"
+        if previous not in self._totals:
+            return None
+        before = self.total(previous, column)
+        if before == 0:
+            return None
+        return (self.total(month, column) - before) / before
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[dict[str, str]]:
+    """
+    Parse CSV rows from an async iterator of text lines, one record at a time.
+
+    The delimiter (comma or semicolon) is detected from the header. Quoted fields
+    spanning several lines are reassembled before parsing.
+    """
+    header: list[str] | None = None
+    delimiter = ","
+    pending = ""
+    async for line in lines:
+        pending = f"{pending}\n{line}" if pending else line
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        if header is None:
+            if record.count(";") > record.count(","):
+                delimiter = ";"
+            header = next(csv.reader([record], delimiter=delimiter))
+            continue
+        values = next(csv.reader([record], delimiter=delimiter))
+        yield dict(zip(header, values))
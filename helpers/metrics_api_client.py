@@ -1,22 +1,44 @@
+import asyncio
 import logging
 from typing import Any
 
 import httpx
 
-from helpers import env_config
+from helpers import (
+    env_config,
+    http_clients,
+    json_codec,
+    metrics_store,
+    prometheus,
+    upstream,
+)
 from helpers.logging import MAIN_LOGGER_NAME
-from helpers.user_agent import USER_AGENT
+from helpers.metrics_aggregation import MonthlyAggregator, iter_csv_rows
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
+# Largest page size accepted by metric-api
+MAX_PAGE_SIZE: int = 50
 
-async def _get_session(
-    session: httpx.AsyncClient | None,
-) -> tuple[httpx.AsyncClient, bool]:
-    if session is not None:
-        return session, False
-    new_session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    return new_session, True
+# Bulk retrieval limits (see get_bulk_metrics)
+MAX_BULK_IDS: int = 50
+MAX_BULK_MONTHS: int = 24
+MAX_BULK_PAGES: int = MAX_BULK_IDS * MAX_BULK_MONTHS // MAX_PAGE_SIZE
+BULK_FAN_OUT_CONCURRENCY: int = 5
+
+# Flipped off if metric-api ever rejects `__in` filters (fan-out is used instead)
+_in_filter_supported: bool = True
+
+
+def demo_environment_error() -> str | None:
+    """Error returned by the metrics tools in demo, which has no Metrics API."""
+    if env_config.env_name() != "demo":
+        return None
+    return (
+        "Error: The Metrics API is not available in the demo environment.\n"
+        "The Metrics API only exists in production. Please set DATAGOUV_API_ENV=prod "
+        "to use this tool, or switch to production environment to access metrics data."
+    )
 
 
 async def get_metrics(
@@ -44,6 +66,7 @@ async def get_metrics(
 
     Returns:
         List of metric records, sorted by the time field in the specified order.
+        Monthly metrics of closed months are served from helpers.metrics_store.
     """
     # Validate and clean id_value
     if not id_value:
@@ -53,34 +76,273 @@ async def get_metrics(
         raise ValueError("id_value cannot be empty after cleaning")
 
     if id_field is None:
-        # Auto-generate field name: "datasets" -> "dataset_id", "resources" -> "resource_id", etc.
-        id_field: str = (
-            f"{model.rstrip('s')}_id" if model.endswith("s") else f"{model}_id"
-        )
+        id_field = _default_id_field(model)
 
     time_field: str = f"metric_{time_granularity}"
-    sess, owns_session = await _get_session(session)
-    try:
-        base_url: str = env_config.get_base_url("metrics_api")
-        url = f"{base_url}{model}/data/"
-        params = {
-            f"{id_field}__exact": id_value,
-            f"{time_field}__sort": sort_order,
-            "page_size": max(1, min(limit, 50)),
-        }
-        logger.debug(
-            f"Fetching metrics from {url} with params: {id_field}__exact={id_value}, "
-            f"{time_field}__sort={sort_order}, page_size={params['page_size']}"
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    sess = session or http_clients.client("metrics_api")
+    url = f"{env_config.get_base_url('metrics_api')}{model}/data/"
+    if time_granularity != "month":
+        return await _fetch_metrics(
+            sess, url, id_field, id_value, time_field, sort_order, limit
         )
-        resp = await sess.get(url, params=params, timeout=20.0)
-        resp.raise_for_status()
-        payload = resp.json()
-        data: list[dict[str, Any]] = payload.get("data", [])
-        logger.debug(f"Received {len(data)} metric entries from API")
+    return await _get_monthly_metrics(sess, url, id_field, id_value, limit, sort_order)
+
+
+async def _fetch_metrics(
+    sess: httpx.AsyncClient,
+    url: str,
+    id_field: str,
+    id_value: str,
+    time_field: str,
+    sort_order: str,
+    page_size: int,
+) -> list[dict[str, Any]]:
+    params = {
+        f"{id_field}__exact": id_value,
+        f"{time_field}__sort": sort_order,
+        "page_size": page_size,
+    }
+    logger.debug("Fetching metrics from %s with params: %s", url, params)
+    resp = await upstream.get(
+        sess, url, upstream="metrics_api", params=params, timeout=20.0
+    )
+    resp.raise_for_status()
+    payload = json_codec.decode_response(resp)
+    data: list[dict[str, Any]] = payload.get("data", [])
+    logger.debug("Received %d metric entries from API", len(data))
+    return data
+
+
+def _month(record: dict[str, Any]) -> str:
+    return str(record.get("metric_month") or "")[:7]
+
+
+async def _get_monthly_metrics(
+    sess: httpx.AsyncClient,
+    url: str,
+    id_field: str,
+    id_value: str,
+    limit: int,
+    sort_order: str,
+) -> list[dict[str, Any]]:
+    """
+    Serve monthly metrics from the closed-month store, fetching only open months.
+
+    On a miss, the most recent MAX_PAGE_SIZE months are fetched in one request and
+    their closed months stored; on a hit, only the OPEN_MONTHS most recent records
+    are fetched. Ascending queries need the whole history, so they are only served
+    from the store when it goes back to the first month.
+    """
+    key = f"{url}|{id_field}|{id_value}"
+    closed_through = metrics_store.latest_closed_month()
+    first_open = metrics_store.first_open_month()
+    entry = await metrics_store.get(key)
+    if entry is not None and entry.closed_through != closed_through:
+        # A month closed since this entry was stored: refresh it once
+        entry = None
+    ascending = sort_order == "asc"
+
+    if entry is not None and (
+        entry.exhausted or (not ascending and len(entry.records) >= limit)
+    ):
+        prometheus.record_cache_lookup("metrics_closed_months", hit=True)
+        if ascending and len(entry.records) >= limit:
+            return entry.records[::-1][:limit]
+        latest = await _fetch_metrics(
+            sess,
+            url,
+            id_field,
+            id_value,
+            "metric_month",
+            "desc",
+            metrics_store.OPEN_MONTHS,
+        )
+        open_records = [r for r in latest if _month(r) >= first_open]
+        merged = open_records + entry.records
+        return merged[::-1][:limit] if ascending else merged[:limit]
+
+    prometheus.record_cache_lookup("metrics_closed_months", hit=False)
+    if ascending:
+        data = await _fetch_metrics(
+            sess, url, id_field, id_value, "metric_month", "asc", limit
+        )
+        if len(data) < limit:
+            # That is the whole history: store it for later queries
+            closed = [r for r in reversed(data) if _month(r) < first_open]
+            metrics_store.put(
+                key, metrics_store.MonthlyEntry(closed_through, closed, exhausted=True)
+            )
         return data
-    finally:
-        if owns_session:
-            await sess.aclose()
+
+    data = await _fetch_metrics(
+        sess, url, id_field, id_value, "metric_month", "desc", MAX_PAGE_SIZE
+    )
+    closed = [r for r in data if _month(r) < first_open]
+    metrics_store.put(
+        key,
+        metrics_store.MonthlyEntry(
+            closed_through, closed, exhausted=len(data) < MAX_PAGE_SIZE
+        ),
+    )
+    return data[:limit]
+
+
+def _default_id_field(model: str) -> str:
+    # "datasets" -> "dataset_id", "resources" -> "resource_id", etc.
+    return f"{model.rstrip('s')}_id" if model.endswith("s") else f"{model}_id"
+
+
+async def get_bulk_metrics(
+    model: str,
+    id_values: list[str],
+    *,
+    id_field: str | None = None,
+    months: int = 12,
+    session: httpx.AsyncClient | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Fetch the monthly metrics of many objects of the same model at once.
+
+    Uses a single `{id_field}__in` query, paginated and sorted by month (most
+    recent first) so that pagination stops as soon as the window is covered. If
+    metric-api rejects the `__in` filter, falls back to one get_metrics call per ID
+    with at most BULK_FAN_OUT_CONCURRENCY requests in flight.
+
+    Args:
+        model: Metric model name (e.g. "datasets", "resources").
+        id_values: IDs to fetch (duplicates and blanks are ignored, max: 50).
+        id_field: The ID field name (defaults to "{model}_id").
+        months: Number of most recent months to return (default: 12, max: 24).
+        session: Optional httpx session for reuse across calls.
+
+    Returns:
+        Mapping of each requested ID to its records, most recent month first
+        (an empty list when metric-api has no data for it).
+    """
+    ids = list(dict.fromkeys(str(v).strip() for v in id_values if str(v).strip()))
+    if not ids:
+        raise ValueError("id_values cannot be empty")
+    if len(ids) > MAX_BULK_IDS:
+        raise ValueError(f"At most {MAX_BULK_IDS} IDs can be fetched at once")
+    id_field = id_field or _default_id_field(model)
+    months = max(1, min(months, MAX_BULK_MONTHS))
+    oldest_month = metrics_store.months_ago(months - 1)
+
+    sess = session or http_clients.client("metrics_api")
+    url = f"{env_config.get_base_url('metrics_api')}{model}/data/"
+    if _in_filter_supported:
+        try:
+            return await _fetch_bulk(sess, url, id_field, ids, oldest_month)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 400:
+                raise
+            _disable_in_filter()
+
+    semaphore = asyncio.Semaphore(BULK_FAN_OUT_CONCURRENCY)
+
+    async def fetch_one(id_value: str) -> list[dict[str, Any]]:
+        async with semaphore:
+            records = await get_metrics(
+                model, id_value, id_field=id_field, limit=months, session=sess
+            )
+        return [r for r in records if _month(r) >= oldest_month]
+
+    results = await asyncio.gather(*(fetch_one(i) for i in ids))
+    return dict(zip(ids, results))
+
+
+def _disable_in_filter() -> None:
+    global _in_filter_supported
+    logger.warning("Metrics API rejected the __in filter, falling back to fan-out")
+    _in_filter_supported = False
+
+
+async def _fetch_bulk(
+    sess: httpx.AsyncClient,
+    url: str,
+    id_field: str,
+    ids: list[str],
+    oldest_month: str,
+) -> dict[str, list[dict[str, Any]]]:
+    results: dict[str, list[dict[str, Any]]] = {i: [] for i in ids}
+    next_url: str | None = url
+    params: dict[str, Any] | None = {
+        f"{id_field}__in": ",".join(ids),
+        "metric_month__sort": "desc",
+        "page_size": MAX_PAGE_SIZE,
+    }
+    for _ in range(MAX_BULK_PAGES):
+        if next_url is None:
+            break
+        logger.debug("Fetching bulk metrics from %s with params: %s", next_url, params)
+        resp = await upstream.get(
+            sess, next_url, upstream="metrics_api", params=params, timeout=20.0
+        )
+        resp.raise_for_status()
+        payload = json_codec.decode_response(resp)
+        reached_window_start = False
+        for record in payload.get("data", []):
+            if _month(record) < oldest_month:
+                reached_window_start = True
+                break
+            records = results.get(str(record.get(id_field)))
+            if records is not None:
+                records.append(record)
+        if reached_window_start:
+            break
+        # The next link already carries the query string
+        next_url = (payload.get("links") or {}).get("next")
+        params = None
+    return results
+
+
+async def get_top_metrics(
+    model: str,
+    *,
+    filter_field: str,
+    filter_value: str,
+    sort_field: str,
+    month: str,
+    limit: int = 10,
+    session: httpx.AsyncClient | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Fetch the objects with the highest value of a metric in a given month.
+
+    A single query sorted by `sort_field`, e.g. the most visited datasets of an
+    organization: get_top_metrics("datasets", filter_field="organization_id",
+    filter_value=org_id, sort_field="monthly_visit", month="2025-03").
+
+    Args:
+        model: Metric model name (e.g. "datasets", "reuses").
+        filter_field: Field restricting the objects (e.g. "organization_id").
+        filter_value: Value of `filter_field`.
+        sort_field: Metric to rank by, in descending order (e.g. "monthly_visit").
+        month: Month to rank ("YYYY-MM").
+        limit: Number of records to return (default: 10, max: 50).
+        session: Optional httpx session for reuse across calls.
+
+    Returns:
+        Metric records of `month`, highest `sort_field` first.
+    """
+    filter_value = str(filter_value).strip()
+    if not filter_value:
+        raise ValueError("filter_value cannot be empty")
+    sess = session or http_clients.client("metrics_api")
+    url = f"{env_config.get_base_url('metrics_api')}{model}/data/"
+    params = {
+        f"{filter_field}__exact": filter_value,
+        "metric_month__exact": month,
+        f"{sort_field}__sort": "desc",
+        "page_size": max(1, min(limit, MAX_PAGE_SIZE)),
+    }
+    logger.debug("Fetching top metrics from %s with params: %s", url, params)
+    resp = await upstream.get(
+        sess, url, upstream="metrics_api", params=params, timeout=20.0
+    )
+    resp.raise_for_status()
+    return json_codec.decode_response(resp).get("data", [])
 
 
 async def get_metrics_csv(
@@ -96,7 +358,8 @@ async def get_metrics_csv(
     Fetch metrics as CSV for a given model and ID with specified time granularity.
 
     Note: The CSV endpoint may return all matching records regardless of pagination parameters.
-    Use filters to limit the result set if needed.
+    Use filters to limit the result set if needed, or aggregate_metrics_csv to process
+    long histories without buffering them.
 
     Args:
         model: Metric model name (e.g. "datasets", "resources", "organizations", "reuses").
@@ -118,27 +381,71 @@ async def get_metrics_csv(
         raise ValueError("id_value cannot be empty after cleaning")
 
     if id_field is None:
-        # Auto-generate field name: "datasets" -> "dataset_id", "resources" -> "resource_id", etc.
-        id_field: str = (
-            f"{model.rstrip('s')}_id" if model.endswith("s") else f"{model}_id"
-        )
+        id_field = _default_id_field(model)
 
     time_field: str = f"metric_{time_granularity}"
-    sess, owns_session = await _get_session(session)
-    try:
-        base_url: str = env_config.get_base_url("metrics_api")
-        url = f"{base_url}{model}/data/csv/"
-        params = {
-            f"{id_field}__exact": id_value,
-            f"{time_field}__sort": sort_order,
-        }
-        logger.debug(
-            f"Fetching metrics CSV from {url} with params: {id_field}__exact={id_value}, "
-            f"{time_field}__sort={sort_order}"
-        )
-        resp = await sess.get(url, params=params, timeout=30.0)
+    sess = session or http_clients.client("metrics_api")
+    base_url: str = env_config.get_base_url("metrics_api")
+    url = f"{base_url}{model}/data/csv/"
+    params = {
+        f"{id_field}__exact": id_value,
+        f"{time_field}__sort": sort_order,
+    }
+    logger.debug("Fetching metrics CSV from %s with params: %s", url, params)
+    resp = await upstream.get(
+        sess, url, upstream="metrics_api", params=params, timeout=30.0
+    )
+    resp.raise_for_status()
+    return resp.text
+
+
+async def aggregate_metrics_csv(
+    model: str,
+    id_value: str,
+    columns: list[str],
+    *,
+    id_field: str | None = None,
+    time_granularity: str = "month",
+    session: httpx.AsyncClient | None = None,
+) -> MonthlyAggregator:
+    """
+    Stream the full metrics CSV export and aggregate it per month on the fly.
+
+    Unlike get_metrics_csv, the body is never buffered: rows are parsed as they
+    arrive and folded into a MonthlyAggregator, so memory stays proportional to the
+    number of months even for long histories or organization-wide exports.
+
+    Args:
+        model: Metric model name (e.g. "datasets", "resources", "organizations").
+        id_value: The ID value to filter by.
+        columns: Numeric columns to sum per month (e.g. ["monthly_visit"]).
+        id_field: The ID field name (defaults to "{model}_id").
+        time_granularity: Time granularity for metrics (default: "month").
+        session: Optional httpx session for reuse across calls.
+
+    Returns:
+        The MonthlyAggregator holding per-month totals of `columns`.
+    """
+    if not id_value or not str(id_value).strip():
+        raise ValueError("id_value cannot be empty")
+    id_value = str(id_value).strip()
+    if id_field is None:
+        id_field = _default_id_field(model)
+
+    time_field: str = f"metric_{time_granularity}"
+    aggregator = MonthlyAggregator(columns, month_column=time_field)
+    sess = session or http_clients.client("metrics_api")
+    url = f"{env_config.get_base_url('metrics_api')}{model}/data/csv/"
+    params = {
+        f"{id_field}__exact": id_value,
+        f"{time_field}__sort": "desc",
+    }
+    logger.debug("Streaming metrics CSV from %s with params: %s", url, params)
+    async with upstream.stream(
+        sess, url, upstream="metrics_api", params=params, timeout=30.0
+    ) as resp:
         resp.raise_for_status()
-        return resp.text
-    finally:
-        if owns_session:
-            await sess.aclose()
+        async for row in iter_csv_rows(resp.aiter_lines()):
+            aggregator.add(row)
+    logger.debug("Aggregated %d metric CSV rows", aggregator.rows)
+    return aggregator
@@ -0,0 +1,175 @@
+"""
+Store of monthly metrics for closed months, which never change once computed.
+
+Only the current and the previous month (OPEN_MONTHS) may still be updated by
+metric-api; anything older is cached here indefinitely, keyed by base URL, model,
+ID field and ID. An entry remembers the latest closed month it was fetched at
+(`closed_through`): when a new month closes, the entry is refetched once to pick up
+the month that just closed.
+
+Entries live in memory (LRU bounded by METRICS_CACHE_MAX_ENTRIES). When
+METRICS_CACHE_PATH is set, they are also persisted to that JSON file (written
+from the worker pool, at most every few seconds) and reloaded, also from the
+worker pool, on first use.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Any
+
+from helpers import worker_pool
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+# Months that metric-api may still update: the current one and the previous one
+OPEN_MONTHS: int = 2
+CACHE_MAX_ENTRIES: int = int(os.getenv("METRICS_CACHE_MAX_ENTRIES", "10000"))
+CACHE_PATH: str | None = os.getenv("METRICS_CACHE_PATH") or None
+# Delay used to batch several updates into one write of the cache file
+SAVE_DELAY_SECONDS: float = 5.0
+
+
+class MonthlyEntry:
+    """Closed-month records of one object, most recent first."""
+
+    __slots__ = ("closed_through", "records", "exhausted")
+
+    def __init__(
+        self, closed_through: str, records: list[dict[str, Any]], exhausted: bool
+    ) -> None:
+        self.closed_through = closed_through
+        self.records = records
+        # True when records go back to the first month metric-api knows about
+        self.exhausted = exhausted
+
+
+_entries: OrderedDict[str, MonthlyEntry] = OrderedDict()
+_loaded = False
+_load_task: asyncio.Task | None = None
+_save_task: asyncio.Task | None = None
+
+
+def months_ago(count: int, today: date | None = None) -> str:
+    """Return the month ("YYYY-MM") `count` months before the current one."""
+    today = today or datetime.now(timezone.utc).date()
+    month_index = today.year * 12 + today.month - 1 - count
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+
+def first_open_month(today: date | None = None) -> str:
+    """Return the oldest month ("YYYY-MM") that may still change."""
+    return months_ago(OPEN_MONTHS - 1, today)
+
+
+def latest_closed_month(today: date | None = None) -> str:
+    """Return the most recent month ("YYYY-MM") whose metrics are final."""
+    return months_ago(OPEN_MONTHS, today)
+
+
+def _read(path: str) -> dict[str, MonthlyEntry]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        entries = {
+            key: MonthlyEntry(
+                value["closed_through"], value["records"], value["exhausted"]
+            )
+            for key, value in raw.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning("Could not load metrics cache from %s: %s", path, e)
+        return {}
+    logger.info("Loaded %d metrics cache entries from %s", len(entries), path)
+    return entries
+
+
+async def _load() -> None:
+    global _loaded, _load_task
+    try:
+        if CACHE_PATH:
+            loaded = await worker_pool.run("metrics_cache_load", _read, CACHE_PATH)
+            # Entries stored while the file was being read are newer: keep them,
+            # most recently used last
+            for key in reversed(loaded):
+                if key not in _entries:
+                    _entries[key] = loaded[key]
+                    _entries.move_to_end(key, last=False)
+            while len(_entries) > CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+        _loaded = True
+    finally:
+        _load_task = None
+
+
+async def _ensure_loaded() -> None:
+    """Load the cache file once, off the event loop; concurrent callers share it."""
+    global _load_task
+    if _loaded:
+        return
+    if _load_task is None:
+        _load_task = asyncio.create_task(_load())
+    await asyncio.shield(_load_task)
+
+
+def _write(path: str, snapshot: dict[str, MonthlyEntry]) -> None:
+    data = {
+        key: {
+            "closed_through": entry.closed_through,
+            "records": entry.records,
+            "exhausted": entry.exhausted,
+        }
+        for key, entry in snapshot.items()
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+async def _save_later(path: str) -> None:
+    global _save_task
+    try:
+        await asyncio.sleep(SAVE_DELAY_SECONDS)
+    finally:
+        _save_task = None
+    # Never overwrite the file with a store that has not read it yet
+    await _ensure_loaded()
+    # Entries are replaced, never mutated, so a shallow copy is a consistent snapshot
+    snapshot = dict(_entries)
+    try:
+        await worker_pool.run("metrics_cache_save", _write, path, snapshot)
+    except OSError as e:
+        logger.warning("Could not save metrics cache to %s: %s", path, e)
+
+
+async def get(key: str) -> MonthlyEntry | None:
+    await _ensure_loaded()
+    entry = _entries.get(key)
+    if entry is not None:
+        _entries.move_to_end(key)
+    return entry
+
+
+def put(key: str, entry: MonthlyEntry) -> None:
+    global _save_task
+    _entries[key] = entry
+    _entries.move_to_end(key)
+    while len(_entries) > CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+    if CACHE_PATH and _save_task is None:
+        _save_task = asyncio.create_task(_save_later(CACHE_PATH))
+
+
+def clear() -> None:
+    """Clear the in-memory store (the cache file is left untouched). For testing."""
+    global _loaded, _load_task
+    _entries.clear()
+    _loaded = False
+    _load_task = None
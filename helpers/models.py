@@ -0,0 +1,232 @@
+"""
+Typed views of the catalog objects rendered by the tools.
+
+Each model is built once from an upstream payload with `from_api`, keeping only the
+fields the tools display: raw payloads (checksums, extras, harvest metadata...) can
+be dropped right after, and cached objects stay small. Slotted dataclasses avoid a
+per-instance __dict__. Models cached by helpers.shared_cache are kept as instances in
+process and stored elsewhere as their `to_api` payload, which `from_api` reads back.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+
+def format_filesize(size: Any) -> str | None:
+    """Human-readable file size ("1.5 MB"), or None when unknown."""
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        return None
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    if size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / (1024 * 1024 * 1024):.1f} GB"
+
+
+def _link_total(value: Any) -> int | None:
+    """Count of an embedded list (API v1) or total of a link object (API v2)."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict) and isinstance(value.get("total"), int):
+        return value["total"]
+    return None
+
+
+def _tags(value: Any) -> tuple[str, ...]:
+    return tuple(str(tag) for tag in value) if isinstance(value, list) else ()
+
+
+@dataclass(slots=True, frozen=True)
+class Organization:
+    id: str | None
+    name: str
+    slug: str | None = None
+    acronym: str | None = None
+
+    @classmethod
+    def from_api(cls, payload: Any) -> "Organization | None":
+        if not isinstance(payload, dict):
+            return None
+        return cls(
+            id=payload.get("id"),
+            name=payload.get("name", "Unknown"),
+            slug=payload.get("slug"),
+            acronym=payload.get("acronym"),
+        )
+
+    def to_api(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "slug": self.slug,
+            "acronym": self.acronym,
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class Resource:
+    id: str | None
+    title: str | None
+    format: str | None = None
+    filesize: int | None = None
+    mime: str | None = None
+    type: str | None = None
+    url: str | None = None
+    description: str | None = None
+    dataset_id: str | None = None
+
+    @classmethod
+    def from_api(cls, payload: dict[str, Any], dataset_id: Any = None) -> "Resource":
+        """Build from a resource payload (API v1 or v2, or a trimmed listing)."""
+        return cls(
+            id=payload.get("id"),
+            title=payload.get("title") or payload.get("name"),
+            format=payload.get("format"),
+            filesize=payload.get("filesize"),
+            mime=payload.get("mime"),
+            type=payload.get("type"),
+            url=payload.get("url"),
+            description=payload.get("description"),
+            dataset_id=str(dataset_id) if dataset_id else None,
+        )
+
+    @property
+    def size_label(self) -> str | None:
+        return format_filesize(self.filesize)
+
+
+@dataclass(slots=True, frozen=True)
+class Dataset:
+    id: str | None
+    title: str
+    slug: str | None = None
+    description_short: str | None = None
+    description: str | None = None
+    organization: Organization | None = None
+    tags: tuple[str, ...] = ()
+    resources_total: int | None = None
+    created_at: str | None = None
+    last_update: str | None = None
+    license: str | None = None
+    frequency: str | None = None
+
+    @classmethod
+    def from_api(cls, payload: dict[str, Any]) -> "Dataset":
+        """Build from a dataset payload (API v1 or v2)."""
+        return cls(
+            id=payload.get("id"),
+            title=payload.get("title", "Unknown"),
+            slug=payload.get("slug"),
+            description_short=payload.get("description_short"),
+            description=payload.get("description"),
+            organization=Organization.from_api(payload.get("organization")),
+            tags=_tags(payload.get("tags")),
+            resources_total=_link_total(payload.get("resources")),
+            created_at=payload.get("created_at"),
+            last_update=payload.get("last_update"),
+            license=payload.get("license"),
+            frequency=payload.get("frequency"),
+        )
+
+    def to_api(self) -> dict[str, Any]:
+        """Smallest payload that `from_api` turns back into this dataset."""
+        payload = {
+            "id": self.id,
+            "title": self.title,
+            "slug": self.slug,
+            "description_short": self.description_short,
+            "description": self.description,
+            "organization": self.organization and self.organization.to_api(),
+            "tags": list(self.tags),
+            "created_at": self.created_at,
+            "last_update": self.last_update,
+            "license": self.license,
+            "frequency": self.frequency,
+        }
+        if self.resources_total is not None:
+            payload["resources"] = {"total": self.resources_total}
+        return payload
+
+
+@dataclass(slots=True, frozen=True)
+class Dataservice:
+    id: str | None
+    title: str
+    description: str | None = None
+    base_api_url: str | None = None
+    machine_documentation_url: str | None = None
+    organization: Organization | None = None
+    tags: tuple[str, ...] = ()
+    created_at: str | None = None
+    last_update: str | None = None
+    license: str | None = None
+    datasets_total: int | None = None
+
+    @classmethod
+    def from_api(cls, payload: dict[str, Any]) -> "Dataservice":
+        return cls(
+            id=payload.get("id"),
+            title=payload.get("title", "Unknown"),
+            description=payload.get("description"),
+            base_api_url=payload.get("base_api_url"),
+            machine_documentation_url=payload.get("machine_documentation_url"),
+            organization=Organization.from_api(payload.get("organization")),
+            tags=_tags(payload.get("tags")),
+            created_at=payload.get("created_at"),
+            last_update=payload.get("last_update"),
+            license=payload.get("license"),
+            datasets_total=_link_total(payload.get("datasets")),
+        )
+
+    def to_api(self) -> dict[str, Any]:
+        """Smallest payload that `from_api` turns back into this dataservice."""
+        payload = {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "base_api_url": self.base_api_url,
+            "machine_documentation_url": self.machine_documentation_url,
+            "organization": self.organization and self.organization.to_api(),
+            "tags": list(self.tags),
+            "created_at": self.created_at,
+            "last_update": self.last_update,
+            "license": self.license,
+        }
+        if self.datasets_total is not None:
+            payload["datasets"] = {"total": self.datasets_total}
+        return payload
+
+
+@dataclass(slots=True, frozen=True)
+class TabularPage:
+    rows: list[dict[str, Any]]
+    page: int
+    page_size: int | None = None
+    total: int | None = None
+    has_next: bool = False
+
+    @classmethod
+    def from_api(cls, payload: dict[str, Any], page: int) -> "TabularPage":
+        """Build from a Tabular API /data/ response (`page` is the one requested)."""
+        meta = payload.get("meta") or {}
+        return cls(
+            rows=payload.get("data") or [],
+            page=meta.get("page") or page,
+            page_size=meta.get("page_size"),
+            total=meta.get("total"),
+            has_next=bool((payload.get("links") or {}).get("next")),
+        )
+
+    @property
+    def columns(self) -> list[str]:
+        if not self.rows:
+            return []
+        return [str(k) if k is not None else "" for k in self.rows[0]]
+
+    @property
+    def total_pages(self) -> int | None:
+        if self.total is None or not self.page_size or self.page_size <= 0:
+            return None
+        return (self.total + self.page_size - 1) // self.page_size
@@ -0,0 +1,189 @@
+"""
+Searchable index of the operations declared in an OpenAPI/Swagger spec.
+
+Large third-party APIs declare hundreds of endpoints; listing all of them costs the
+agent thousands of tokens when it usually needs one. The index flattens the spec
+into operations (method, path, tags, summary, parameters with `$ref`s resolved) and
+precomputes a lowercase search text per operation, so filtering by tag, path prefix,
+method or keywords is a cheap scan. It is built once per cached spec (see
+helpers.openapi_spec_cache) in the worker pool.
+"""
+
+from typing import Any
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch", "trace")
+
+# Guard against reference cycles in malformed specs
+_MAX_REF_DEPTH = 10
+
+
+class Operation:
+    """One method + path of the spec."""
+
+    __slots__ = (
+        "method",
+        "path",
+        "operation_id",
+        "summary",
+        "tags",
+        "parameters",
+        "_search_text",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        operation_id: str,
+        summary: str,
+        description: str,
+        tags: list[str],
+        parameters: list[dict[str, Any]],
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.operation_id = operation_id
+        self.summary = summary
+        self.tags = tags
+        self.parameters = parameters
+        self._search_text = " ".join(
+            [method, path, operation_id, summary, description, *tags]
+        ).lower()
+
+    def matches(self, keywords: list[str]) -> bool:
+        return all(keyword in self._search_text for keyword in keywords)
+
+
+class SpecIndex:
+    """Operations of a spec, in declaration order, with per-tag counts."""
+
+    __slots__ = ("operations", "tag_counts")
+
+    def __init__(self, operations: list[Operation]) -> None:
+        self.operations = operations
+        self.tag_counts: dict[str, int] = {}
+        for operation in operations:
+            for tag in operation.tags:
+                self.tag_counts[tag] = self.tag_counts.get(tag, 0) + 1
+
+    def search(
+        self,
+        query: str | None = None,
+        tag: str | None = None,
+        path_prefix: str | None = None,
+        method: str | None = None,
+    ) -> list[Operation]:
+        """
+        Return the operations matching every given filter.
+
+        Args:
+            query: Space-separated keywords, all of which must appear in the method,
+                path, operationId, summary, description or tags (case-insensitive).
+            tag: Exact tag name (case-insensitive).
+            path_prefix: Leading part of the path (e.g. "/communes").
+            method: HTTP method (e.g. "GET").
+        """
+        keywords = query.lower().split() if query else []
+        tag_lower = tag.lower() if tag else None
+        method_lower = method.lower() if method else None
+        return [
+            operation
+            for operation in self.operations
+            if (method_lower is None or operation.method == method_lower)
+            and (path_prefix is None or operation.path.startswith(path_prefix))
+            and (
+                tag_lower is None or any(t.lower() == tag_lower for t in operation.tags)
+            )
+            and operation.matches(keywords)
+        ]
+
+
+def _resolve(spec: dict[str, Any], node: Any) -> Any:
+    """Follow local `$ref`s ("#/components/parameters/x", "#/parameters/x")."""
+    for _ in range(_MAX_REF_DEPTH):
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref")
+        if not isinstance(ref, str) or not ref.startswith("#/"):
+            return node
+        target: Any = spec
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(target, dict) or part not in target:
+                return {}
+            target = target[part]
+        node = target
+    return {}
+
+
+def _schema_type(spec: dict[str, Any], parameter: dict[str, Any]) -> str:
+    # OpenAPI 3 puts the type in `schema`; Swagger 2 on the parameter itself
+    schema = _resolve(spec, parameter.get("schema")) or parameter
+    if not isinstance(schema, dict):
+        return ""
+    ptype = schema.get("type", "")
+    if ptype == "array":
+        items = _resolve(spec, schema.get("items"))
+        if isinstance(items, dict) and items.get("type"):
+            return f"array[{items['type']}]"
+    if not ptype and isinstance(parameter.get("schema"), dict):
+        ref = parameter["schema"].get("$ref", "")
+        if isinstance(ref, str) and ref:
+            return ref.rsplit("/", 1)[-1]
+    if schema.get("enum") and isinstance(schema["enum"], list):
+        values = ", ".join(str(v) for v in schema["enum"][:5])
+        return f"{ptype} enum: {values}" if ptype else f"enum: {values}"
+    return str(ptype)
+
+
+def _parameters(
+    spec: dict[str, Any], path_params: Any, operation_params: Any
+) -> list[dict[str, Any]]:
+    """Merge path-level and operation-level parameters (the latter win)."""
+    merged: dict[tuple[str, str], dict[str, Any]] = {}
+    for raw_params in (path_params, operation_params):
+        if not isinstance(raw_params, list):
+            continue
+        for raw in raw_params:
+            param = _resolve(spec, raw)
+            if not isinstance(param, dict) or not param.get("name"):
+                continue
+            merged[(param["name"], param.get("in", ""))] = {
+                "name": param["name"],
+                "in": param.get("in", ""),
+                "type": _schema_type(spec, param),
+                "required": bool(param.get("required", False)),
+            }
+    return list(merged.values())
+
+
+def build_index(spec: dict[str, Any]) -> SpecIndex:
+    """Flatten the `paths` of a parsed spec into a SpecIndex (CPU-bound)."""
+    operations: list[Operation] = []
+    paths = spec.get("paths")
+    if not isinstance(paths, dict):
+        return SpecIndex(operations)
+    for path, methods in paths.items():
+        methods = _resolve(spec, methods)
+        if not isinstance(methods, dict):
+            continue
+        for method, details in methods.items():
+            if method not in HTTP_METHODS or not isinstance(details, dict):
+                continue
+            summary = details.get("summary") or details.get("description") or ""
+            description = details.get("description") or ""
+            tags = details.get("tags")
+            operations.append(
+                Operation(
+                    method=method,
+                    path=str(path),
+                    operation_id=str(details.get("operationId", "")),
+                    summary=str(summary).split("\n")[0][:120],
+                    description=str(description),
+                    tags=[str(t) for t in tags] if isinstance(tags, list) else [],
+                    parameters=_parameters(
+                        spec, methods.get("parameters"), details.get("parameters")
+                    ),
+                )
+            )
+    return SpecIndex(operations)
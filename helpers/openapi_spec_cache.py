@@ -0,0 +1,204 @@
+"""
+In-memory cache of third-party OpenAPI specs, keyed by URL.
+
+Specs referenced by dataservices (machine_documentation_url) can be several MB of
+YAML, and many agents ask for the same few. Each entry keeps the parsed document
+and, once computed, its text summary and operation index, so a cache hit costs
+neither a download nor a parse. Entries are fresh for
+OPENAPI_SPEC_CACHE_TTL_SECONDS; after that they are revalidated with
+If-None-Match / If-Modified-Since, and a 304 simply renews them. When the
+revalidation fails, the stale entry is served and revalidated again after
+REVALIDATE_RETRY_SECONDS rather than on every call.
+Concurrent misses for the same URL share a single download.
+
+With a Redis-protocol or on-disk shared cache (SHARED_CACHE_URL, SHARED_CACHE_DIR),
+downloaded specs are also published there, so that other replicas (or the next
+process after a restart) skip the download and the parse.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+
+from helpers import prometheus, shared_cache, upstream, worker_pool
+from helpers.datagouv_api_client import OPENAPI_SPEC_MAX_BYTES, parse_openapi_spec
+from helpers.logging import MAIN_LOGGER_NAME
+from helpers.openapi_index import SpecIndex
+from helpers.user_agent import USER_AGENT
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+CACHE_TTL_SECONDS: float = float(os.getenv("OPENAPI_SPEC_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES: int = int(os.getenv("OPENAPI_SPEC_CACHE_MAX_ENTRIES", "32"))
+# Delay before revalidating again a stale entry whose revalidation failed
+REVALIDATE_RETRY_SECONDS: float = 60.0
+
+
+class CachedSpec:
+    """A parsed OpenAPI spec with its validators and (lazily) its summary and index."""
+
+    __slots__ = ("spec", "etag", "last_modified", "fetched_at", "summary", "index")
+
+    def __init__(
+        self,
+        spec: dict[str, Any],
+        etag: str | None,
+        last_modified: str | None,
+        fetched_at: float,
+    ) -> None:
+        self.spec = spec
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        # Filled in by the tool the first time the spec is summarized/indexed
+        self.summary: str | None = None
+        self.index: SpecIndex | None = None
+
+
+_cache: OrderedDict[str, CachedSpec] = OrderedDict()
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def _store(url: str, entry: CachedSpec) -> None:
+    _cache[url] = entry
+    _cache.move_to_end(url)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+async def _download(
+    session: httpx.AsyncClient, url: str, stale: CachedSpec | None
+) -> CachedSpec:
+    headers: dict[str, str] = {}
+    if stale is not None:
+        if stale.etag:
+            headers["If-None-Match"] = stale.etag
+        if stale.last_modified:
+            headers["If-Modified-Since"] = stale.last_modified
+
+    logger.debug("Fetching OpenAPI spec from %s", url)
+    resp = await upstream.get(
+        session,
+        url,
+        upstream="openapi_spec",
+        timeout=15.0,
+        max_bytes=OPENAPI_SPEC_MAX_BYTES,
+        follow_redirects=True,
+        headers=headers,
+    )
+    if resp.status_code == 304 and stale is not None:
+        logger.debug("OpenAPI spec not modified: %s", url)
+        stale.fetched_at = time.monotonic()
+        return stale
+    resp.raise_for_status()
+    return CachedSpec(
+        spec=await worker_pool.run("openapi_parse", parse_openapi_spec, resp.text, url),
+        etag=resp.headers.get("ETag"),
+        last_modified=resp.headers.get("Last-Modified"),
+        fetched_at=time.monotonic(),
+    )
+
+
+async def get_spec(url: str, session: httpx.AsyncClient | None = None) -> CachedSpec:
+    """
+    Return the cached spec for `url`, downloading or revalidating it if needed.
+
+    If revalidating an expired entry fails (HTTP or transport error), the stale
+    entry is served instead, and not revalidated again for REVALIDATE_RETRY_SECONDS.
+
+    Raises:
+        httpx.HTTPError: If the download fails and nothing is cached.
+        upstream.ResponseTooLargeError: If the spec exceeds OPENAPI_SPEC_MAX_BYTES.
+        ValueError: If the spec cannot be parsed as JSON or YAML.
+    """
+    entry = _cache.get(url)
+    if entry is not None and time.monotonic() - entry.fetched_at < CACHE_TTL_SECONDS:
+        _cache.move_to_end(url)
+        prometheus.record_cache_lookup("openapi_spec", hit=True)
+        return entry
+
+    lock = _locks.setdefault(url, asyncio.Lock())
+    try:
+        async with lock:
+            # Another task may have refreshed the entry while we were waiting
+            entry = _cache.get(url)
+            if (
+                entry is not None
+                and time.monotonic() - entry.fetched_at < CACHE_TTL_SECONDS
+            ):
+                prometheus.record_cache_lookup("openapi_spec", hit=True)
+                return entry
+            prometheus.record_cache_lookup("openapi_spec", hit=False)
+            return await _refresh(url, entry, session)
+    finally:
+        if not lock.locked() and _locks.get(url) is lock:
+            del _locks[url]
+
+
+async def _from_shared_cache(url: str) -> CachedSpec | None:
+    # The in-memory shared cache would only hold a second copy of the spec
+    if isinstance(shared_cache.backend(), shared_cache.MemoryBackend):
+        return None
+    payload = await shared_cache.get("openapi_spec", url)
+    if not isinstance(payload, dict):
+        return None
+    return CachedSpec(
+        spec=payload["spec"],
+        etag=payload.get("etag"),
+        last_modified=payload.get("last_modified"),
+        fetched_at=time.monotonic(),
+    )
+
+
+async def _publish(url: str, entry: CachedSpec) -> None:
+    if not isinstance(shared_cache.backend(), shared_cache.MemoryBackend):
+        payload = {
+            "spec": entry.spec,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+        }
+        await shared_cache.put("openapi_spec", url, payload, CACHE_TTL_SECONDS)
+
+
+async def _refresh(
+    url: str, entry: CachedSpec | None, session: httpx.AsyncClient | None
+) -> CachedSpec:
+    shared = await _from_shared_cache(url)
+    if shared is not None:
+        _store(url, shared)
+        return shared
+
+    own = session is None
+    if own:
+        session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
+    assert session is not None
+    try:
+        fresh = await _download(session, url, entry)
+    except httpx.HTTPError as e:
+        if entry is None:
+            raise
+        logger.warning(
+            "Could not revalidate OpenAPI spec %s, serving stale copy: %s", url, e
+        )
+        # Expires again in REVALIDATE_RETRY_SECONDS (or the TTL, if shorter)
+        entry.fetched_at = time.monotonic() - max(
+            CACHE_TTL_SECONDS - REVALIDATE_RETRY_SECONDS, 0.0
+        )
+        return entry
+    finally:
+        if own:
+            await session.aclose()
+    _store(url, fresh)
+    await _publish(url, fresh)
+    return fresh
+
+
+def clear_cache() -> None:
+    """Clear the spec cache. Useful for testing."""
+    _cache.clear()
+    _locks.clear()
@@ -0,0 +1,244 @@
+"""
+Minimal Prometheus instrumentation, exposed as text on GET /metrics (see main.py).
+
+Counters, gauges and histograms are kept in process memory and rendered in the
+Prometheus text exposition format (version 0.0.4). Metric objects are module-level
+so any helper can record into them without extra plumbing.
+"""
+
+import math
+from typing import Iterable
+
+from helpers import tracing
+from helpers.logging import current_tool_name
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds) suited to upstream HTTP calls and tool executions
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+_REGISTRY: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        _REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: object) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[-1] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: object) -> int:
+        counts = self._counts.get(self._key(labels))
+        return counts[-1] if counts else 0
+
+    def _samples(self) -> list[str]:
+        lines: list[str] = []
+        names = (*self.labelnames, "le")
+        for key, counts in self._counts.items():
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _REGISTRY) + "\n"
+
+
+# MCP requests and tool calls
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "mcp_http_requests_in_flight", "MCP HTTP requests currently being served."
+)
+TOOL_CALLS = Counter("mcp_tool_calls_total", "MCP tool calls.", ("tool",))
+TOOL_DURATION = Histogram(
+    "mcp_tool_duration_seconds", "MCP tool call duration.", ("tool",)
+)
+TOOL_ERRORS = Counter(
+    "mcp_tool_errors_total",
+    "Errors raised during MCP tool calls, by exception type.",
+    ("tool", "error_type"),
+)
+TOOL_CALLS_CANCELLED = Counter(
+    "mcp_tool_calls_cancelled_total",
+    "MCP tool calls cancelled before completion (client disconnect or deadline).",
+    ("tool", "reason"),
+)
+TOOLS_IN_FLIGHT = Gauge(
+    "mcp_tools_in_flight", "MCP tool calls currently running.", ("tool",)
+)
+TOOL_OUTPUT_TRUNCATED = Counter(
+    "mcp_tool_output_truncated_total",
+    "Tool responses truncated to fit their output byte budget.",
+    ("tool",),
+)
+
+# Upstream HTTP calls (see helpers.upstream)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream GET latency by upstream and HTTP status ('error' for transport failures).",
+    ("upstream", "status"),
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = Gauge(
+    "upstream_requests_in_flight",
+    "Upstream GETs currently holding a connection, by upstream (pool utilization).",
+    ("upstream",),
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "Upstream GETs retried, by upstream and reason.",
+    ("upstream", "reason"),
+)
+UPSTREAM_HEDGES = Counter(
+    "upstream_hedged_requests_total",
+    "Hedged upstream GETs fired after the p95 latency elapsed.",
+    ("upstream",),
+)
+
+# CPU-heavy work offloaded from the event loop (see helpers.worker_pool)
+CPU_TASK_DURATION = Histogram(
+    "cpu_task_duration_seconds",
+    "Time spent in the worker pool on CPU-heavy tasks (e.g. OpenAPI spec parsing).",
+    ("task",),
+)
+
+# Caches
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache name and result (hit or miss).",
+    ("cache", "result"),
+)
+
+
+SHARED_CACHE_ERRORS = Counter(
+    "shared_cache_errors_total",
+    "Shared cache operations that failed or timed out, by namespace.",
+    ("namespace",),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup and flag it on the current trace span."""
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+    tracing.set_attribute(f"cache.{cache}.hit", hit)
+
+
+def record_tool_error(exc: BaseException) -> None:
+    """Count an error handled (or raised) by the tool currently running."""
+    TOOL_ERRORS.inc(
+        tool=current_tool_name() or "unknown", error_type=type(exc).__name__
+    )
@@ -0,0 +1,236 @@
+"""
+Text rendering of tool responses, bounded by per-tool output byte budgets.
+
+Tools collect their output as a list of lines and return `render(content_parts)`.
+When the UTF-8 text exceeds the budget of the running tool, every line longer than
+MIN_FIELD_BYTES gives up the same share of its excess, so that short lines (IDs,
+counts, headers) stay whole and long descriptions or cell values shrink; only if
+that is not enough are trailing lines dropped. A closing hint says the response was
+truncated and, when the tool provides them, which parameters fetch the rest.
+
+`fit_data` applies the same budget to the structured content: long strings are
+shortened first, then trailing items of the largest list are dropped.
+"""
+
+import json
+import os
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any
+
+from helpers import prometheus
+from helpers.logging import current_tool_name
+
+DEFAULT_BUDGET_BYTES: int = int(os.getenv("TOOL_OUTPUT_MAX_BYTES", str(64 * 1024)))
+
+# Lower bound for any budget: leaves room for the hint and a few lines
+MIN_BUDGET_BYTES = 1024
+
+# Lines are not truncated below this size; trailing lines are dropped instead
+MIN_FIELD_BYTES = 80
+
+ELLIPSIS = "..."
+
+
+def parse_budgets(value: str) -> dict[str, int]:
+    """Parse TOOL_OUTPUT_BUDGETS ("tool=bytes,other_tool=bytes") into a dict."""
+    budgets: dict[str, int] = {}
+    for item in value.split(","):
+        name, sep, size = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            budgets[name.strip()] = max(MIN_BUDGET_BYTES, int(size))
+        except ValueError:
+            continue
+    return budgets
+
+
+TOOL_BUDGETS: dict[str, int] = parse_budgets(os.getenv("TOOL_OUTPUT_BUDGETS", ""))
+
+
+def budget_for(tool: str | None) -> int:
+    """Output byte budget of a tool (TOOL_OUTPUT_MAX_BYTES unless overridden)."""
+    return max(MIN_BUDGET_BYTES, TOOL_BUDGETS.get(tool or "", DEFAULT_BUDGET_BYTES))
+
+
+def shorten(text: str, limit: int) -> str:
+    """Cut text to `limit` characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else text[:limit] + ELLIPSIS
+
+
+def join_limited(items: Iterable[Any], limit: int, sep: str = ", ") -> str:
+    """Join the first `limit` items, noting how many were left out."""
+    items = list(items)
+    text = sep.join(str(item) for item in items[:limit])
+    if len(items) > limit:
+        text += f"{sep}... (+{len(items) - limit} more)"
+    return text
+
+
+def narrower_page(page: int, page_size: int) -> dict[str, int]:
+    """Paging arguments with half the page size, starting at or before `page`."""
+    page, page_size = max(page, 1), max(page_size, 1)
+    size = max(1, page_size // 2)
+    return {"page": (page - 1) * page_size // size + 1, "page_size": size}
+
+
+def _cut(line: str, size: int) -> str:
+    """Cut a line to at most `size` UTF-8 bytes, ellipsis included."""
+    data = line.encode()
+    if len(data) <= size:
+        return line
+    # "ignore" drops a multi-byte character split by the cut
+    return data[: size - len(ELLIPSIS)].decode("utf-8", "ignore") + ELLIPSIS
+
+
+def _hint(budget: int, omitted: int, continuation: Mapping[str, Any] | None) -> str:
+    hint = f"[Output truncated to {budget:,} bytes"
+    if omitted:
+        hint += f", {omitted} line(s) omitted"
+    hint += "."
+    if continuation:
+        params = ", ".join(f"{name}={value}" for name, value in continuation.items())
+        hint += f" To see the rest, call again with {params}."
+    return hint + "]"
+
+
+def fit(
+    lines: list[str],
+    budget: int,
+    continuation: Mapping[str, Any] | None = None,
+) -> list[str]:
+    """Truncate lines (and append the hint) so that they join within `budget`."""
+    sizes = [len(line.encode()) for line in lines]
+    # The hint is sized for the worst case of dropped lines to keep this one pass
+    available = budget - len(_hint(budget, len(lines), continuation).encode()) - 1
+
+    # Smallest possible size of the kept lines, newlines included
+    kept = len(lines)
+    floor = sum(min(size, MIN_FIELD_BYTES) for size in sizes) + kept - 1
+    while kept > 1 and floor > available:
+        kept -= 1
+        floor -= min(sizes[kept], MIN_FIELD_BYTES) + 1
+
+    excess = sum(
+        size - MIN_FIELD_BYTES for size in sizes[:kept] if size > MIN_FIELD_BYTES
+    )
+    ratio = min(1.0, max(0.0, (available - floor) / excess)) if excess else 1.0
+    out = [
+        line
+        if size <= MIN_FIELD_BYTES
+        else _cut(line, MIN_FIELD_BYTES + int((size - MIN_FIELD_BYTES) * ratio))
+        for line, size in zip(lines[:kept], sizes[:kept])
+    ]
+    out.append(_hint(budget, len(lines) - kept, continuation))
+    return out
+
+
+def render(
+    content_parts: Sequence[str],
+    continuation: Mapping[str, Any] | None = None,
+    budget: int | None = None,
+) -> str:
+    """
+    Join content parts into the tool response, truncated to the output budget.
+
+    `budget` defaults to the budget of the tool currently running. `continuation`
+    holds the arguments to call the tool with to get what did not fit.
+    """
+    text = "\n".join(content_parts)
+    tool = current_tool_name()
+    if budget is None:
+        budget = budget_for(tool)
+    # A character is at most 4 UTF-8 bytes: most responses skip the encoding
+    if len(text) * 4 <= budget or len(text.encode()) <= budget:
+        return text
+
+    prometheus.TOOL_OUTPUT_TRUNCATED.inc(tool=tool or "unknown")
+    return "\n".join(fit(text.split("\n"), budget, continuation))
+
+
+def _json_size(value: Any) -> int:
+    text = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+    return len(text.encode())
+
+
+def _cut_strings(value: Any, limit: int) -> Any:
+    if isinstance(value, str):
+        return shorten(value, limit)
+    if isinstance(value, dict):
+        return {key: _cut_strings(item, limit) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_cut_strings(item, limit) for item in value]
+    return value
+
+
+def _largest_list(value: dict[str, Any]) -> tuple[dict[str, Any], str] | None:
+    """Container and key of the largest list reachable through dicts only."""
+    best: tuple[int, dict[str, Any], str] | None = None
+    for key, item in value.items():
+        if isinstance(item, list) and item:
+            size = _json_size(item)
+            if best is None or size > best[0]:
+                best = (size, value, key)
+        elif isinstance(item, dict):
+            found = _largest_list(item)
+            if found is not None:
+                size = _json_size(found[0][found[1]])
+                if best is None or size > best[0]:
+                    best = (size, *found)
+    return None if best is None else (best[1], best[2])
+
+
+def fit_data(
+    data: Mapping[str, Any],
+    budget: int | None = None,
+    continuation: Mapping[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Structured content cut to the output budget, like `render` cuts the text.
+
+    A cut payload gets a `truncated` entry: the budget, how many list items were
+    omitted, the length strings were shortened to, and the continuation arguments.
+    """
+    data = dict(data)
+    tool = current_tool_name()
+    if budget is None:
+        budget = budget_for(tool)
+    if _json_size(data) <= budget:
+        return data
+
+    prometheus.TOOL_OUTPUT_TRUNCATED.inc(tool=tool or "unknown")
+    # Room for the `truncated` entry itself
+    available = budget - 256
+    limit = None
+    for candidate in (2000, 1000, 500, 250, MIN_FIELD_BYTES):
+        data = _cut_strings(data, candidate)
+        limit = candidate
+        if _json_size(data) <= available:
+            break
+
+    omitted = 0
+    while _json_size(data) > available:
+        found = _largest_list(data)
+        if found is None:
+            break
+        container, key = found
+        items = container[key]
+        # Largest count of leading items that fits, by bisection
+        low, high = 0, len(items) - 1
+        excess = _json_size(data) - available
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _json_size(items[:middle]) <= _json_size(items) - excess:
+                low = middle
+            else:
+                high = middle - 1
+        omitted += len(items) - low
+        container[key] = items[:low]
+
+    data["truncated"] = {
+        "budget_bytes": budget,
+        "omitted_items": omitted,
+        "max_string_length": limit,
+        "continuation": dict(continuation) if continuation else None,
+    }
+    return data
@@ -0,0 +1,111 @@
+"""
+Cancel in-flight tool work when the HTTP client goes away.
+
+`main.with_monitoring` binds a RequestCancellation for each HTTP request and watches
+the ASGI receive channel for `http.disconnect`. Every tool call wrapped by
+`log_tool` registers its timeout scope with the current request, so a disconnect
+expires those scopes immediately: the tool task and everything it awaits (gathered
+fan-out tasks, in-flight httpx requests and their pooled connections) is cancelled
+instead of running to completion for nobody. Cancellations are counted in the
+`mcp_tool_calls_cancelled_total` metric.
+"""
+
+import asyncio
+import logging
+from contextvars import ContextVar, Token
+from typing import Awaitable, Callable
+
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+
+class RequestCancellation:
+    """Tracks the tool calls running on behalf of one HTTP request."""
+
+    def __init__(self) -> None:
+        self.disconnected = False
+        self._scopes: set[asyncio.Timeout] = set()
+
+    def register(self, scope: asyncio.Timeout) -> None:
+        """Attach an entered timeout scope; it expires at once if already disconnected."""
+        if self.disconnected:
+            scope.reschedule(asyncio.get_running_loop().time())
+            return
+        self._scopes.add(scope)
+
+    def unregister(self, scope: asyncio.Timeout) -> None:
+        self._scopes.discard(scope)
+
+    def cancel(self) -> None:
+        """Mark the client as gone and expire every registered scope now."""
+        if self.disconnected:
+            return
+        self.disconnected = True
+        if not self._scopes:
+            return
+        logger.info(
+            "Client disconnected, cancelling %d in-flight tool call(s)",
+            len(self._scopes),
+        )
+        now = asyncio.get_running_loop().time()
+        for scope in self._scopes:
+            scope.reschedule(now)
+        self._scopes.clear()
+
+
+_current: ContextVar[RequestCancellation | None] = ContextVar(
+    "request_cancellation", default=None
+)
+
+
+def current() -> RequestCancellation | None:
+    return _current.get()
+
+
+def bind() -> tuple[RequestCancellation, Token[RequestCancellation | None]]:
+    cancellation = RequestCancellation()
+    return cancellation, _current.set(cancellation)
+
+
+def reset(token: Token[RequestCancellation | None]) -> None:
+    _current.reset(token)
+
+
+async def run_until_disconnect(
+    inner_app: Callable[[dict, Callable, Callable], Awaitable[None]],
+    scope: dict,
+    receive: Callable,
+    send: Callable,
+    cancellation: RequestCancellation,
+) -> None:
+    """
+    Run an ASGI HTTP app, cancelling `cancellation` if the client disconnects.
+
+    The request body is passed through untouched; once it has been fully read,
+    the only message the server can still receive is `http.disconnect`, so a
+    background watcher waits for it while the app keeps running.
+    """
+    body_complete = asyncio.Event()
+
+    async def wrapped_receive() -> dict:
+        if cancellation.disconnected:
+            return {"type": "http.disconnect"}
+        message = await receive()
+        if message["type"] == "http.request" and not message.get("more_body", False):
+            body_complete.set()
+        elif message["type"] == "http.disconnect":
+            cancellation.cancel()
+        return message
+
+    async def watch_disconnect() -> None:
+        await body_complete.wait()
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            cancellation.cancel()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await inner_app(scope, wrapped_receive, send)
+    finally:
+        watcher.cancel()
@@ -1,19 +1,25 @@
 import os
 
-import sentry_sdk
-
 
 def init_sentry() -> None:
     dsn: str | None = os.getenv("SENTRY_DSN")
     if not dsn:
         return
 
-    sample_rate = float(os.getenv("SENTRY_SAMPLE_RATE", "1.0"))
+    # Imported only when enabled: sentry_sdk is slow to import
+    import sentry_sdk
+
+    # Traces and profiles can be sampled independently; when OpenTelemetry exports
+    # traces (see helpers/tracing.py), Sentry defaults to error reporting only.
+    default_rate = "0.0" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "1.0"
+    sample_rate = os.getenv("SENTRY_SAMPLE_RATE", default_rate)
+    traces_sample_rate = float(os.getenv("SENTRY_TRACES_SAMPLE_RATE", sample_rate))
+    profiles_sample_rate = float(os.getenv("SENTRY_PROFILES_SAMPLE_RATE", sample_rate))
 
     sentry_sdk.init(
         dsn=dsn,
         environment=os.getenv("MCP_ENV", "local"),
-        traces_sample_rate=sample_rate,
-        profiles_sample_rate=sample_rate,
+        traces_sample_rate=traces_sample_rate,
+        profiles_sample_rate=profiles_sample_rate,
         send_default_pii=False,
     )
@@ -0,0 +1,492 @@
+"""
+Cache shared by the server replicas: catalog metadata, search results, Tabular API
+profiles, the crawler exceptions list and third-party OpenAPI specs.
+
+Values are stored under `<SHARED_CACHE_PREFIX>:<env>:<namespace>:<key>`, where <env>
+is DATAGOUV_API_ENV, so demo and prod never share entries. The backend is chosen by
+SHARED_CACHE_URL:
+
+- unset: an in-process LRU bounded by SHARED_CACHE_MEMORY_MAX_BYTES, backed by
+  a SQLite file when SHARED_CACHE_DIR is set (see helpers.disk_cache). The LRU
+  holds values as returned to callers (decoded JSON, or model instances such as
+  helpers.models.Dataset), so a hit costs no decoding; callers must not mutate them;
+- `redis://[:password@]host[:port][/db]`: any server speaking the Redis protocol
+  (Redis, Valkey, KeyDB...), through the small RESP client below, so that every
+  replica reads what one of them fetched.
+
+Only the Redis and disk tiers hold serialized values: JSON, with model instances
+stored as their `to_api()` payload.
+
+A miss is loaded once: concurrent callers in the process wait on a lock, and across
+replicas the first one takes a short-lived `SET NX` lock while the others poll for
+its value (and load it themselves as soon as the lock is gone without a value). A
+load returning None is remembered for NEGATIVE_TTL_SECONDS at most. Backend
+failures are logged and counted, and never fail a tool call: the value is loaded
+from upstream.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from helpers import disk_cache, env_config, json_codec, prometheus
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+URL: str = os.getenv("SHARED_CACHE_URL", "").strip()
+PREFIX: str = os.getenv("SHARED_CACHE_PREFIX", "datagouv-mcp")
+TTL_SECONDS: float = float(os.getenv("SHARED_CACHE_TTL_SECONDS", "300"))
+MEMORY_MAX_BYTES: int = int(
+    os.getenv("SHARED_CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024))
+)
+# Bound on every backend operation: a slow cache must not slow tools down
+TIMEOUT_SECONDS: float = float(os.getenv("SHARED_CACHE_TIMEOUT_SECONDS", "0.5"))
+
+# How long a replica may hold the load lock of a key, and how often others poll
+LOCK_TTL_SECONDS = 10.0
+LOCK_POLL_SECONDS = 0.05
+# Loads returning None (e.g. an empty upstream answer) are retried sooner
+NEGATIVE_TTL_SECONDS = 30.0
+
+# Deletes KEYS[1] only if it still holds ARGV[1]: a lock that expired and was
+# taken by another replica is left alone
+_DELETE_IF_SCRIPT = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+    "return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+# Marks a miss, as opposed to a cached None
+_MISSING = object()
+
+
+class CacheBackendError(Exception):
+    """The cache server replied with an error or broke the protocol."""
+
+
+class MemoryBackend:
+    """In-process backend: an LRU of values, bounded by their serialized size."""
+
+    def __init__(self, max_bytes: int = MEMORY_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        # key -> (value, expiry, size)
+        self._entries: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+        self._size = 0
+
+    def _live(self, key: str) -> tuple[Any, float, int] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        entry = self._live(key)
+        if entry is None:
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(
+        self, key: str, value: Any, ttl: float, size: int | None = None
+    ) -> None:
+        """Store `value`; `size` (its serialized length) defaults to len(value)."""
+        self._remove(key)
+        size = len(key) + (len(value) if size is None else size)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + ttl, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    async def delete_if(self, key: str, value: bytes) -> None:
+        entry = self._live(key)
+        if entry is not None and entry[0] == value:
+            self._remove(key)
+
+    async def close(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+
+class RedisBackend:
+    """Minimal Redis protocol (RESP2) client: GET, SET [PX] [NX], DEL and EVAL."""
+
+    def __init__(self, url: str, pool_size: int = 8) -> None:
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme: {parts.scheme}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    @staticmethod
+    def _command(*args: str | bytes) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg.encode() if isinstance(arg, str) else arg
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    @classmethod
+    async def _reply(cls, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readuntil(b"\r\n")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise CacheBackendError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await cls._reply(reader) for _ in range(length)]
+        # Out of sync with the server: dropped like a broken connection
+        raise ConnectionError(f"unexpected reply: {line[:40]!r}")
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup: list[tuple[str, ...]] = []
+        if self.password:
+            if self.username:
+                setup.append(("AUTH", self.username, self.password))
+            else:
+                setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        try:
+            for args in setup:
+                writer.write(self._command(*args))
+                await writer.drain()
+                await self._reply(reader)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def execute(self, *args: str | bytes) -> Any:
+        """Send one command and return its reply, on a pooled connection."""
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = conn
+            try:
+                writer.write(self._command(*args))
+                await writer.drain()
+                reply = await self._reply(reader)
+            except CacheBackendError:
+                # An error reply leaves the connection usable
+                self._idle.append(conn)
+                raise
+            except BaseException:
+                # Broken or cancelled mid-reply: the connection is out of sync
+                writer.close()
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.execute("SET", key, value, "PX", str(max(1, int(ttl * 1000))))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        ms = str(max(1, int(ttl * 1000)))
+        return await self.execute("SET", key, value, "PX", ms, "NX") == "OK"
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+    async def delete_if(self, key: str, value: bytes) -> None:
+        await self.execute("EVAL", _DELETE_IF_SCRIPT, "1", key, value)
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class TieredBackend:
+    """In-process LRU in front of the on-disk store, which survives restarts.
+
+    Reads go to memory first, then to disk (see `_lookup`); load locks only
+    matter within the process and live in memory.
+    """
+
+    def __init__(self, memory: MemoryBackend, disk: disk_cache.DiskBackend) -> None:
+        self.memory = memory
+        self.disk = disk
+
+    async def close(self) -> None:
+        await self.memory.close()
+        await self.disk.close()
+
+
+Backend = MemoryBackend | TieredBackend | RedisBackend
+
+
+def _create_backend(url: str) -> Backend:
+    if url and url != "memory":
+        try:
+            return RedisBackend(url)
+        except ValueError as e:
+            logger.warning(
+                "Invalid SHARED_CACHE_URL, using the in-process cache: %s", e
+            )
+    if disk_cache.DIRECTORY:
+        return TieredBackend(
+            MemoryBackend(), disk_cache.DiskBackend(disk_cache.DIRECTORY)
+        )
+    return MemoryBackend()
+
+
+_backend: Backend = _create_backend(URL)
+_locks: dict[str, asyncio.Lock] = {}
+
+
+def backend() -> Backend:
+    return _backend
+
+
+def set_backend(new_backend: Backend) -> None:
+    """Replace the backend (for testing)."""
+    global _backend
+    _backend = new_backend
+    _locks.clear()
+
+
+def clear() -> None:
+    """Drop every entry of the in-process backend. For testing."""
+    memory = _memory()
+    if memory is not None:
+        memory._entries.clear()
+        memory._size = 0
+    _locks.clear()
+
+
+def full_key(namespace: str, key: str) -> str:
+    return f"{PREFIX}:{env_config.env_name()}:{namespace}:{key}"
+
+
+async def _guarded(operation: Awaitable[Any], namespace: str) -> Any:
+    """Run a backend operation within TIMEOUT_SECONDS; None if it fails."""
+    try:
+        async with asyncio.timeout(TIMEOUT_SECONDS):
+            return await operation
+    except (
+        CacheBackendError,
+        OSError,
+        TimeoutError,
+        asyncio.IncompleteReadError,
+        sqlite3.Error,
+    ) as e:
+        prometheus.SHARED_CACHE_ERRORS.inc(namespace=namespace)
+        logger.warning("Shared cache unavailable (%s): %r", namespace, e)
+        return None
+
+
+def _memory() -> MemoryBackend | None:
+    """In-process tier of the backend, if any."""
+    if isinstance(_backend, TieredBackend):
+        return _backend.memory
+    return _backend if isinstance(_backend, MemoryBackend) else None
+
+
+def _lock_backend() -> MemoryBackend | RedisBackend:
+    if isinstance(_backend, TieredBackend):
+        return _backend.memory
+    return _backend
+
+
+async def _read(name: str, namespace: str) -> tuple[bytes, float | None] | None:
+    """Serialized value from Redis or disk, with its remaining TTL if known."""
+    if isinstance(_backend, TieredBackend):
+        return await _guarded(_backend.disk.get(name), namespace)
+    if isinstance(_backend, RedisBackend):
+        data = await _guarded(_backend.get(name), namespace)
+        return None if data is None else (data, None)
+    return None
+
+
+async def _lookup(namespace: str, key: str, model: Any = None) -> Any:
+    """Cached value (possibly None), or _MISSING on a miss or backend failure."""
+    name = full_key(namespace, key)
+    memory = _memory()
+    if memory is not None:
+        value = await memory.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+    entry = await _read(name, namespace)
+    if entry is None:
+        return _MISSING
+    data, ttl = entry
+    value = json_codec.loads(data)
+    if model is not None and value is not None:
+        value = model.from_api(value)
+    if memory is not None and ttl is not None:
+        # Read from disk: later hits are served decoded from memory
+        await memory.set(name, value, ttl, len(data))
+    return value
+
+
+async def get(namespace: str, key: str, model: Any = None) -> Any | None:
+    """Cached value, or None on a miss or backend failure."""
+    value = await _lookup(namespace, key, model)
+    return None if value is _MISSING else value
+
+
+async def put(
+    namespace: str, key: str, value: Any, ttl: float, model: Any = None
+) -> None:
+    """Cache `value`: JSON-serializable, or an instance of `model` (or None)."""
+    name = full_key(namespace, key)
+    payload = value.to_api() if model is not None and value is not None else value
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+    memory = _memory()
+    if memory is not None:
+        await memory.set(name, value, ttl, len(data))
+    if isinstance(_backend, TieredBackend):
+        await _guarded(_backend.disk.set(name, data, ttl), namespace)
+    elif isinstance(_backend, RedisBackend):
+        await _guarded(_backend.set(name, data, ttl), namespace)
+
+
+async def _load_once(
+    namespace: str,
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    ttl: float,
+    model: Any = None,
+) -> Any:
+    """Load a missing key, letting a single replica do it (see module docstring)."""
+    name = full_key(namespace, key)
+    lock_name = f"{name}:lock"
+    token = secrets.token_hex(8).encode()
+    locks = _lock_backend()
+    acquired = await _guarded(locks.add(lock_name, token, LOCK_TTL_SECONDS), namespace)
+    if acquired is False:
+        deadline = time.monotonic() + LOCK_TTL_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+            # The holder publishes before releasing: once the lock is gone, a
+            # missing value means its load failed
+            held = await _guarded(locks.get(lock_name), namespace)
+            value = await _lookup(namespace, key, model)
+            if value is not _MISSING:
+                return value
+            if held is None:
+                break
+    try:
+        value = await load()
+        if value is None:
+            ttl = min(ttl, NEGATIVE_TTL_SECONDS)
+        await put(namespace, key, value, ttl, model)
+        return value
+    finally:
+        if acquired:
+            await _guarded(locks.delete_if(lock_name, token), namespace)
+
+
+async def get_or_load(
+    namespace: str,
+    key: str,
+    load: Callable[[], Awaitable[Any]],
+    ttl: float | None = None,
+    refresh: bool = False,
+    model: Any = None,
+) -> Any:
+    """
+    Cached value of `key`, or `await load()` stored for `ttl` seconds.
+
+    `refresh` skips the lookup and replaces the cached value. Exceptions raised by
+    `load` propagate and nothing is cached. If `load` returns instances of `model`
+    (a class with `from_api` and `to_api`, see helpers.models), they are cached
+    as such in process and as their payload elsewhere.
+    """
+    ttl = TTL_SECONDS if ttl is None else ttl
+    if not refresh:
+        value = await _lookup(namespace, key, model)
+        if value is not _MISSING:
+            prometheus.record_cache_lookup(namespace, hit=True)
+            return value
+
+    # Computed once: the environment, part of the key, may change meanwhile
+    lock_key = full_key(namespace, key)
+    lock = _locks.setdefault(lock_key, asyncio.Lock())
+    try:
+        async with lock:
+            if not refresh:
+                # Another task may have loaded the value while we were waiting
+                value = await _lookup(namespace, key, model)
+                if value is not _MISSING:
+                    prometheus.record_cache_lookup(namespace, hit=True)
+                    return value
+            prometheus.record_cache_lookup(namespace, hit=False)
+            return await _load_once(namespace, key, load, ttl, model)
+    finally:
+        if not lock.locked() and _locks.get(lock_key) is lock:
+            del _locks[lock_key]
+
+
+def cached(namespace: str, ttl: float | None = None, model: Any = None):
+    """
+    Decorator caching an async API function's result in the shared cache.
+
+    The result is JSON, or an instance of `model` (see `get_or_load`). The key is
+    the function name and its arguments, except `session`.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k != "session"}
+            key = func.__name__ + ":" + json.dumps(arguments, sort_keys=True)
+            return await get_or_load(
+                namespace, key, lambda: func(*args, **kwargs), ttl, model=model
+            )
+
+        return wrapper
+
+    return decorator
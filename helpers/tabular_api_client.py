@@ -4,11 +4,11 @@ from typing import Any
 
 import httpx
 
-from helpers import env_config
+from helpers import env_config, http_clients, json_codec, shared_cache, upstream
 from helpers.logging import MAIN_LOGGER_NAME
-from helpers.user_agent import USER_AGENT
 
-logger = logging.getLogger(MAIN_LOGGER_NAME)
+# Dedicated child logger so that per-page fetch logs can be sampled (LOG_SAMPLING)
+logger = logging.getLogger(f"{MAIN_LOGGER_NAME}.tabular_api")
 
 # User-facing hints (returned to the LLM via tools; keep in English).
 MSG_RESOURCE_NOT_IN_TABULAR = (
@@ -93,9 +93,12 @@ def _raise_for_tabular_failure(
     status = resp.status_code
     body = resp.text
     logger.warning(
-        f"Tabular API: HTTP {status} for resource {resource_id} ({endpoint} endpoint)"
+        "Tabular API: HTTP %s for resource %s (%s endpoint)",
+        status,
+        resource_id,
+        endpoint,
     )
-    logger.debug(f"Tabular API response body (truncated): {body[:500]}")
+    logger.debug("Tabular API response body (truncated): %s", body[:500])
 
     if status >= 500 or status in (408, 429):
         raise TabularApiRequestError(MSG_TABULAR_SERVER_ISSUE)
@@ -120,15 +123,6 @@ def _raise_for_tabular_failure(
     raise TabularApiRequestError(msg)
 
 
-async def _get_session(
-    session: httpx.AsyncClient | None,
-) -> tuple[httpx.AsyncClient, bool]:
-    if session is not None:
-        return session, False
-    new_session = httpx.AsyncClient(headers={"User-Agent": USER_AGENT})
-    return new_session, True
-
-
 async def fetch_resource_data(
     resource_id: str,
     *,
@@ -140,37 +134,37 @@ async def fetch_resource_data(
     """
     Fetch data for a resource via the Tabular API.
     """
-    sess, owns_session = await _get_session(session)
-    try:
-        base_url: str = env_config.get_base_url("tabular_api")
-        url = f"{base_url}resources/{resource_id}/data/"
-        query_params = {
-            "page": max(page, 1),
-            "page_size": max(page_size, 1),
-        }
-        if params:
-            query_params.update(params)
-
-        full_url = f"{url}?{'&'.join(f'{k}={v}' for k, v in query_params.items())}"
-        logger.info(
-            f"Tabular API: Fetching resource data - URL: {full_url}, "
-            f"resource_id: {resource_id}"
-        )
+    sess = session or http_clients.client("tabular_api")
+    base_url: str = env_config.get_base_url("tabular_api")
+    url = f"{base_url}resources/{resource_id}/data/"
+    query_params = {
+        "page": max(page, 1),
+        "page_size": max(page_size, 1),
+    }
+    if params:
+        query_params.update(params)
+
+    logger.info(
+        "Tabular API: Fetching resource data - URL: %s, params: %s, resource_id: %s",
+        url,
+        query_params,
+        resource_id,
+    )
 
-        resp = await sess.get(url, params=query_params, timeout=30.0)
-        if resp.status_code == 404:
-            logger.warning(f"Tabular API: Resource {resource_id} not found (404)")
-            raise ResourceNotAvailableError(MSG_RESOURCE_NOT_IN_TABULAR)
+    resp = await upstream.get(
+        sess, url, upstream="tabular_api", params=query_params, timeout=30.0
+    )
+    if resp.status_code == 404:
+        logger.warning("Tabular API: Resource %s not found (404)", resource_id)
+        raise ResourceNotAvailableError(MSG_RESOURCE_NOT_IN_TABULAR)
 
-        if resp.status_code >= 400:
-            _raise_for_tabular_failure(resp, resource_id, endpoint="data")
+    if resp.status_code >= 400:
+        _raise_for_tabular_failure(resp, resource_id, endpoint="data")
 
-        return resp.json()
-    finally:
-        if owns_session:
-            await sess.aclose()
+    return json_codec.decode_response(resp)
 
 
+@shared_cache.cached("tabular_profile")
 async def fetch_resource_profile(
     resource_id: str,
     *,
@@ -180,35 +174,30 @@ async def fetch_resource_profile(
     Fetch the profile metadata for a resource via the Tabular API.
     """
 
-    sess, owns_session = await _get_session(session)
-    try:
-        base_url: str = env_config.get_base_url("tabular_api")
-        url = f"{base_url}resources/{resource_id}/profile/"
-        logger.debug(
-            f"Tabular API: Fetching resource profile - URL: {url}, "
-            f"resource_id: {resource_id}"
-        )
+    sess = session or http_clients.client("tabular_api")
+    base_url: str = env_config.get_base_url("tabular_api")
+    url = f"{base_url}resources/{resource_id}/profile/"
+    logger.debug(
+        "Tabular API: Fetching resource profile - URL: %s, resource_id: %s",
+        url,
+        resource_id,
+    )
+
+    resp = await upstream.get(sess, url, upstream="tabular_api", timeout=30.0)
+    if resp.status_code == 404:
+        logger.warning("Tabular API: Resource profile %s not found (404)", resource_id)
+        raise ResourceNotAvailableError(MSG_RESOURCE_NOT_IN_TABULAR)
+
+    if resp.status_code >= 400:
+        _raise_for_tabular_failure(resp, resource_id, endpoint="profile")
+
+    profile_data: dict[str, Any] = json_codec.decode_response(resp)
+
+    # Clean up headers: remove surrounding quotes if present
+    if "profile" in profile_data and "header" in profile_data["profile"]:
+        profile_data["profile"]["header"] = [
+            header.strip('"') if isinstance(header, str) else header
+            for header in profile_data["profile"]["header"]
+        ]
 
-        resp = await sess.get(url, timeout=30.0)
-        if resp.status_code == 404:
-            logger.warning(
-                f"Tabular API: Resource profile {resource_id} not found (404)"
-            )
-            raise ResourceNotAvailableError(MSG_RESOURCE_NOT_IN_TABULAR)
-
-        if resp.status_code >= 400:
-            _raise_for_tabular_failure(resp, resource_id, endpoint="profile")
-
-        profile_data: dict[str, Any] = resp.json()
-
-        # Clean up headers: remove surrounding quotes if present
-        if "profile" in profile_data and "header" in profile_data["profile"]:
-            profile_data["profile"]["header"] = [
-                header.strip('"') if isinstance(header, str) else header
-                for header in profile_data["profile"]["header"]
-            ]
-
-        return profile_data
-    finally:
-        if owns_session:
-            await sess.aclose()
+    return profile_data
@@ -0,0 +1,192 @@
+"""
+Memoization of tool results, applied by `log_tool` around every tool call.
+
+All tools are read-only and idempotent, so identical calls (same tool, same
+arguments, same DATAGOUV_API_ENV) from retrying clients or parallel agents can
+share one result. Successful results are kept for the TTL of their tool in an LRU
+bounded by TOOL_RESULT_CACHE_MAX_BYTES (0 disables memoization); concurrent
+identical calls wait for the first one instead of running again. Error results
+are never cached, nor are results reporting an upstream failure in their
+structured content (e.g. one series of get_metrics).
+
+A request sent with `Cache-Control: no-cache` skips the lookup (the fresh result
+still replaces the cached one): `main.with_monitoring` binds the flag per request.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Mapping
+from contextvars import ContextVar, Token
+from typing import Any
+
+from mcp.types import CallToolResult
+
+from helpers import env_config, prometheus, tool_output
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+MAX_BYTES: int = int(os.getenv("TOOL_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+DEFAULT_TTL_SECONDS: float = float(os.getenv("TOOL_RESULT_CACHE_TTL_SECONDS", "300"))
+
+# Monthly metrics and third-party specs change far less often than the catalog
+_BUILTIN_TTLS: dict[str, float] = {
+    "get_metrics": 3600,
+    "compare_metrics": 3600,
+    "get_organization_metrics": 3600,
+    "get_dataservice_openapi_spec": 3600,
+}
+
+
+def parse_ttls(value: str) -> dict[str, float]:
+    """Parse TOOL_RESULT_CACHE_TTLS ("tool=seconds,other_tool=seconds") into a dict."""
+    ttls: dict[str, float] = {}
+    for item in value.split(","):
+        name, sep, seconds = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            ttls[name.strip()] = max(0.0, float(seconds))
+        except ValueError:
+            continue
+    return ttls
+
+
+TOOL_TTLS: dict[str, float] = _BUILTIN_TTLS | parse_ttls(
+    os.getenv("TOOL_RESULT_CACHE_TTLS", "")
+)
+
+
+def ttl_for(tool: str) -> float:
+    """Seconds a result of `tool` is reused (0 disables memoization for it)."""
+    return TOOL_TTLS.get(tool, DEFAULT_TTL_SECONDS)
+
+
+class _Entry:
+    __slots__ = ("result", "size", "expires_at")
+
+    def __init__(self, result: CallToolResult, size: int, expires_at: float) -> None:
+        self.result = result
+        self.size = size
+        self.expires_at = expires_at
+
+
+_cache: OrderedDict[str, _Entry] = OrderedDict()
+_size = 0
+_pending: dict[str, asyncio.Future[Any]] = {}
+
+_bypass: ContextVar[bool] = ContextVar("tool_cache_bypass", default=False)
+
+
+def bind_bypass(headers: Mapping[str, str]) -> Token[bool]:
+    """Skip cache lookups for this request if it sent `Cache-Control: no-cache`."""
+    directives = headers.get("cache-control", "").lower().replace(" ", "").split(",")
+    return _bypass.set("no-cache" in directives)
+
+
+def reset_bypass(token: Token[bool]) -> None:
+    _bypass.reset(token)
+
+
+def cache_key(tool: str, arguments: Mapping[str, Any]) -> str:
+    """Tool name, environment and arguments (sorted JSON) of a call."""
+    canonical = json.dumps(
+        arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return f"{env_config.env_name()}:{tool}:{canonical}"
+
+
+def clear() -> None:
+    global _size
+    _cache.clear()
+    _size = 0
+
+
+def _lookup(key: str) -> CallToolResult | None:
+    global _size
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if entry.expires_at <= time.monotonic():
+        del _cache[key]
+        _size -= entry.size
+        return None
+    _cache.move_to_end(key)
+    return entry.result
+
+
+def _store(key: str, result: CallToolResult, ttl: float) -> None:
+    global _size
+    size = len(key) + len(result.model_dump_json(exclude_none=True))
+    if size > MAX_BYTES:
+        return
+    previous = _cache.pop(key, None)
+    if previous is not None:
+        _size -= previous.size
+    _cache[key] = _Entry(result, size, time.monotonic() + ttl)
+    _size += size
+    while _size > MAX_BYTES:
+        _, evicted = _cache.popitem(last=False)
+        _size -= evicted.size
+
+
+async def call(
+    tool: str, arguments: Mapping[str, Any], run: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Return the memoized result of `tool(**arguments)`, or `run()` and memoize it."""
+    ttl = ttl_for(tool)
+    if MAX_BYTES <= 0 or ttl <= 0:
+        return await run()
+    try:
+        key = cache_key(tool, arguments)
+    except (TypeError, ValueError):
+        return await run()
+
+    if not _bypass.get():
+        result = _lookup(key)
+        if result is not None:
+            prometheus.record_cache_lookup("tool_result", hit=True)
+            return result
+        # Wait for an identical call in flight; run it here if that one is cancelled
+        pending = _pending.get(key)
+        while pending is not None:
+            try:
+                result = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not pending.cancelled() or (task and task.cancelling()):
+                    raise
+                pending = _pending.get(key)
+                continue
+            prometheus.record_cache_lookup("tool_result", hit=True)
+            return result
+        prometheus.record_cache_lookup("tool_result", hit=False)
+
+    future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+    _pending.setdefault(key, future)
+    try:
+        result = await run()
+    except BaseException as e:
+        if isinstance(e, asyncio.CancelledError):
+            future.cancel()
+        else:
+            future.set_exception(e)
+            # Retrieved by the callers waiting on it, if any
+            future.exception()
+        raise
+    else:
+        future.set_result(result)
+        if (
+            isinstance(result, CallToolResult)
+            and not result.isError
+            and not tool_output.has_error(result.structuredContent or {})
+        ):
+            _store(key, result, ttl)
+        return result
+    finally:
+        if _pending.get(key) is future:
+            del _pending[key]
@@ -0,0 +1,364 @@
+"""
+Structured tool results: MCP structuredContent alongside the rendered text.
+
+Each tool declares its output schema with `Annotated[CallToolResult, <Output>]`,
+where <Output> is one of the TypedDicts below, and returns `result(...)`: the
+compact text (see helpers.rendering) stays in `content` for display, and the same
+data goes to `structuredContent` so that clients read IDs, totals and the next
+page without parsing text.
+
+Output keys are all optional: a failed call only carries `error` (see `error`),
+and tools leave out what they could not fetch. A result whose data reports an
+error, at the top level or on a nested series, is flagged `isError`. The structured
+content is held to the output budget of the text (see `rendering.fit_data`).
+"""
+
+from collections.abc import Mapping
+from typing import Any, NotRequired, TypedDict
+
+from mcp.types import CallToolResult, TextContent
+
+from helpers import rendering
+from helpers.models import Dataservice, Dataset, Resource
+
+
+class Truncation(TypedDict):
+    budget_bytes: int
+    omitted_items: int
+    # Length long strings were shortened to, None if none was
+    max_string_length: int | None
+    # Arguments to call the tool with to get what did not fit
+    continuation: dict[str, Any] | None
+
+
+class ToolOutput(TypedDict, total=False):
+    """Keys common to every output; a failed call only carries `error`."""
+
+    error: str
+    truncated: Truncation
+
+
+class OrganizationRef(TypedDict):
+    id: str | None
+    name: str
+
+
+class DatasetHit(TypedDict):
+    id: str | None
+    title: str
+    description_short: str | None
+    organization: str | None
+    tags: list[str]
+    resources_count: int
+    url: str | None
+
+
+class DatasetSearchOutput(ToolOutput, total=False):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    next_page: int | None
+    # Pass as `cursor` to get the next page (see helpers.continuation)
+    next_cursor: str | None
+    datasets: list[DatasetHit]
+
+
+class DataserviceHit(TypedDict):
+    id: str | None
+    title: str
+    description: str | None
+    organization: str | None
+    base_api_url: str | None
+    tags: list[str]
+    url: str | None
+
+
+class DataserviceSearchOutput(ToolOutput, total=False):
+    query: str
+    total: int
+    page: int
+    page_size: int
+    next_page: int | None
+    # Pass as `cursor` to get the next page (see helpers.continuation)
+    next_cursor: str | None
+    dataservices: list[DataserviceHit]
+
+
+class OrganizationHit(TypedDict):
+    id: str | None
+    name: str
+    acronym: str | None
+    slug: str | None
+    badges: list[str]
+    metrics: dict[str, int]
+    url: str | None
+    profile_url: str | None
+
+
+class OrganizationSearchOutput(ToolOutput, total=False):
+    total: int
+    page: int
+    page_size: int
+    next_page: int | None
+    # Pass as `cursor` to get the next page (see helpers.continuation)
+    next_cursor: str | None
+    organizations: list[OrganizationHit]
+
+
+class DatasetInfo(TypedDict):
+    id: str | None
+    title: str
+    slug: str | None
+    url: str | None
+    description_short: str | None
+    description: str | None
+    organization: OrganizationRef | None
+    tags: list[str]
+    resources_total: int | None
+    created_at: str | None
+    last_update: str | None
+    license: str | None
+    frequency: str | None
+
+
+class DatasetOutput(ToolOutput, total=False):
+    dataset: DatasetInfo
+
+
+class DataserviceInfo(TypedDict):
+    id: str | None
+    title: str
+    description: str | None
+    base_api_url: str | None
+    machine_documentation_url: str | None
+    organization: OrganizationRef | None
+    tags: list[str]
+    datasets_total: int | None
+    created_at: str | None
+    last_update: str | None
+    license: str | None
+
+
+class DataserviceOutput(ToolOutput, total=False):
+    dataservice: DataserviceInfo
+
+
+class ResourceInfo(TypedDict):
+    id: str | None
+    title: str | None
+    format: str | None
+    filesize: int | None
+    mime: str | None
+    type: str | None
+    url: str | None
+    dataset_id: str | None
+
+
+class ResourceOutput(ToolOutput, total=False):
+    resource: ResourceInfo
+    description: str | None
+    dataset_title: str | None
+    # None when availability could not be checked
+    tabular_api_available: bool | None
+
+
+class ResourceListOutput(ToolOutput, total=False):
+    dataset_id: str
+    dataset_title: str
+    total: int
+    resources_total: int | None
+    page: int
+    page_size: int
+    next_page: int | None
+    resources: list[ResourceInfo]
+
+
+class TabularOutput(ToolOutput, total=False):
+    resource_id: str
+    resource_title: str
+    dataset_id: str | None
+    total: int | None
+    page: int
+    page_size: int | None
+    next_page: int | None
+    # Pass as `cursor` to get the next page (see helpers.continuation)
+    next_cursor: str | None
+    columns: list[str]
+    rows: list[dict[str, Any]]
+
+
+class MonthlyValues(TypedDict):
+    month: str
+    # Metric fields of the Metrics API (e.g. monthly_visit)
+    values: dict[str, int]
+    # full_history only: 3-month moving average and year-over-year change
+    moving_average: NotRequired[dict[str, float | None]]
+    year_over_year: NotRequired[dict[str, float | None]]
+
+
+class MetricsSeries(TypedDict, total=False):
+    id: str
+    title: str | None
+    months: list[MonthlyValues]
+    totals: dict[str, int]
+    error: str
+
+
+class MetricsOutput(ToolOutput, total=False):
+    dataset: MetricsSeries
+    resource: MetricsSeries
+
+
+class RankedEntity(TypedDict):
+    rank: int
+    id: str
+    totals: dict[str, int]
+
+
+class ComparisonOutput(ToolOutput, total=False):
+    model: str
+    months: int
+    since: str
+    sort_by: str
+    ranking: list[RankedEntity]
+    missing: list[str]
+    # Month -> ID -> value of the ranking metric
+    monthly: dict[str, dict[str, int]]
+
+
+class TopDataset(TypedDict):
+    rank: int
+    dataset_id: str
+    visits: int
+    downloads: int
+
+
+class OrganizationSummary(TypedDict):
+    id: str
+    name: str
+    acronym: str | None
+    # Catalog counts (datasets, reuses, dataservices, followers)
+    metrics: dict[str, int]
+
+
+class OrganizationMetricsOutput(ToolOutput, total=False):
+    organization: OrganizationSummary
+    months: list[MonthlyValues]
+    totals: dict[str, int]
+    top_month: str
+    top_datasets: list[TopDataset]
+
+
+class Endpoint(TypedDict):
+    method: str
+    path: str
+    summary: str | None
+    parameters: list[dict[str, Any]]
+
+
+class OpenApiOutput(ToolOutput, total=False):
+    dataservice_id: str
+    title: str
+    source: str
+    base_api_url: str | None
+    tags: dict[str, int]
+    total: int
+    matching: int
+    page: int
+    page_size: int
+    next_page: int | None
+    endpoints: list[Endpoint]
+
+
+def next_page(page: int, page_size: int, total: int | None) -> int | None:
+    """Number of the page after `page`, or None when it is the last one."""
+    if total is None or page * page_size >= total:
+        return None
+    return page + 1
+
+
+def organization_ref(organization: Any) -> OrganizationRef | None:
+    if organization is None:
+        return None
+    return {"id": organization.id, "name": organization.name}
+
+
+def dataset_info(dataset: Dataset, url: str | None) -> DatasetInfo:
+    return {
+        "id": dataset.id,
+        "title": dataset.title,
+        "slug": dataset.slug,
+        "url": url,
+        "description_short": dataset.description_short,
+        "description": dataset.description,
+        "organization": organization_ref(dataset.organization),
+        "tags": list(dataset.tags),
+        "resources_total": dataset.resources_total,
+        "created_at": dataset.created_at,
+        "last_update": dataset.last_update,
+        "license": dataset.license,
+        "frequency": dataset.frequency,
+    }
+
+
+def dataservice_info(dataservice: Dataservice) -> DataserviceInfo:
+    return {
+        "id": dataservice.id,
+        "title": dataservice.title,
+        "description": dataservice.description,
+        "base_api_url": dataservice.base_api_url,
+        "machine_documentation_url": dataservice.machine_documentation_url,
+        "organization": organization_ref(dataservice.organization),
+        "tags": list(dataservice.tags),
+        "datasets_total": dataservice.datasets_total,
+        "created_at": dataservice.created_at,
+        "last_update": dataservice.last_update,
+        "license": dataservice.license,
+    }
+
+
+def resource_info(resource: Resource) -> ResourceInfo:
+    return {
+        "id": resource.id,
+        "title": resource.title,
+        "format": resource.format,
+        "filesize": resource.filesize,
+        "mime": resource.mime,
+        "type": resource.type,
+        "url": resource.url,
+        "dataset_id": resource.dataset_id,
+    }
+
+
+def has_error(data: Mapping[str, Any]) -> bool:
+    """Whether `data`, or a series nested in it (e.g. MetricsSeries), has an error."""
+    if data.get("error"):
+        return True
+    return any(
+        isinstance(value, Mapping) and has_error(value) for value in data.values()
+    )
+
+
+def result(
+    content_parts: list[str],
+    data: Mapping[str, Any],
+    continuation: Mapping[str, Any] | None = None,
+) -> CallToolResult:
+    """Tool result with the rendered text and `data` as structured content."""
+    return CallToolResult(
+        content=[
+            TextContent(type="text", text=rendering.render(content_parts, continuation))
+        ],
+        structuredContent=rendering.fit_data(data, continuation=continuation),
+        isError=has_error(data),
+    )
+
+
+def error(message: str) -> CallToolResult:
+    """Failed tool result: the message as text, and as `error` in structured content."""
+    return CallToolResult(
+        content=[TextContent(type="text", text=message)],
+        structuredContent={"error": message},
+        isError=True,
+    )
@@ -0,0 +1,130 @@
+"""
+Optional OpenTelemetry tracing: MCP request → tool → upstream HTTP call.
+
+Tracing is enabled when OTEL_EXPORTER_OTLP_ENDPOINT is set and the optional
+packages `opentelemetry-sdk` and `opentelemetry-exporter-otlp-proto-http` are
+installed; spans are then exported over OTLP/HTTP with a parent-based ratio
+sampler (OTEL_TRACES_SAMPLE_RATE, 0.0–1.0, defaults to 1.0). Otherwise every
+helper below is a cheap no-op, so call sites never need to check.
+"""
+
+import logging
+import os
+import re
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+_tracer: Any = None
+
+# Path segments that identify a single object (ids, slugs with digits, uuids)
+_ID_SEGMENT = re.compile(r"^(?=.*\d)[0-9A-Za-z_-]{8,}$")
+
+
+def is_enabled() -> bool:
+    return _tracer is not None
+
+
+def init_tracing(span_processor: Any = None) -> None:
+    """
+    Configure the global tracer provider.
+
+    Args:
+        span_processor: Span processor to use instead of the OTLP batch exporter
+            (e.g. a SimpleSpanProcessor over an in-memory exporter in tests).
+    """
+    global _tracer
+
+    if span_processor is None and not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning(
+            "OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk is not "
+            "installed: tracing disabled"
+        )
+        return
+
+    if span_processor is None:
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning(
+                "opentelemetry-exporter-otlp-proto-http is not installed: "
+                "tracing disabled"
+            )
+            return
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        span_processor = BatchSpanProcessor(OTLPSpanExporter())
+
+    sample_rate = float(os.getenv("OTEL_TRACES_SAMPLE_RATE", "1.0"))
+    provider = TracerProvider(
+        resource=Resource.create(
+            {
+                "service.name": os.getenv("OTEL_SERVICE_NAME", "datagouv-mcp"),
+                "deployment.environment": os.getenv("MCP_ENV", "local"),
+            }
+        ),
+        sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+    )
+    provider.add_span_processor(span_processor)
+    trace.set_tracer_provider(provider)
+    _tracer = provider.get_tracer("datagouv-mcp")
+    logger.info("OpenTelemetry tracing enabled (sample rate %.2f)", sample_rate)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: dict[str, Any] | None = None,
+    carrier: dict[str, str] | None = None,
+) -> Iterator[Any]:
+    """
+    Start a span as a child of the current one (or of the trace in `carrier`).
+
+    Yields the span, or None when tracing is disabled.
+    """
+    if _tracer is None:
+        yield None
+        return
+    context = None
+    if carrier is not None:
+        from opentelemetry.propagate import extract
+
+        context = extract(carrier)
+    with _tracer.start_as_current_span(
+        name, context=context, attributes=attributes
+    ) as span:
+        yield span
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Set an attribute on the current span, if tracing is enabled."""
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+
+    trace.get_current_span().set_attribute(key, value)
+
+
+def endpoint_template(url: str) -> str:
+    """Collapse identifier path segments so spans group by endpoint, not by object."""
+    head, sep, path = url.partition("://")
+    if not sep:
+        return url
+    host, _, path = path.partition("/")
+    segments = [
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in path.split("?")[0].split("/")
+    ]
+    return f"{head}://{host}/{'/'.join(segments)}"
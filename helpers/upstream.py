@@ -0,0 +1,449 @@
+"""
+Shared GET path for upstream HTTP calls (data.gouv.fr API, Tabular API, Metrics API,
+Crawler API and third-party OpenAPI specs).
+
+Every MCP tool is read-only and idempotent, so transient upstream failures
+(429, 502, 503, 504 and connection errors) are retried here with jittered
+exponential backoff, honouring Retry-After. Retries are budgeted per upstream over
+a sliding time window so that an outage does not multiply our traffic.
+
+When UPSTREAM_HEDGING is enabled, a second identical GET is fired once the
+upstream's observed p95 latency has elapsed, and whichever response arrives first
+is used (hedges draw from the same retry budget).
+
+Each attempt's timeout is clamped to the request deadline (helpers.deadline), and no
+retry is scheduled once the deadline would pass before it could start.
+
+Callers downloading documents of unknown size (e.g. third-party OpenAPI specs) pass
+`max_bytes`: the body is then streamed and the download aborted as soon as it grows
+past the limit. Bodies processed incrementally (e.g. CSV exports) go through
+`stream` instead, which hands the unread response to the caller.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator
+
+import httpx
+
+from helpers import deadline, prometheus, tracing
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+_RETRYABLE_EXCEPTIONS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+MAX_RETRIES: int = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+RETRY_BASE_DELAY: float = float(os.getenv("UPSTREAM_RETRY_BASE_DELAY", "0.25"))
+# Longest wait we accept between two attempts (backoff or Retry-After)
+RETRY_MAX_DELAY: float = float(os.getenv("UPSTREAM_RETRY_MAX_DELAY", "5.0"))
+# Retries (and hedges) allowed per upstream within RETRY_BUDGET_WINDOW_SECONDS
+RETRY_BUDGET: int = int(os.getenv("UPSTREAM_RETRY_BUDGET", "30"))
+RETRY_BUDGET_WINDOW_SECONDS: float = 60.0
+
+HEDGING_ENABLED: bool = os.getenv("UPSTREAM_HEDGING", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Latency samples kept per upstream, and how many are needed before hedging kicks in
+LATENCY_SAMPLES: int = 200
+HEDGE_MIN_SAMPLES: int = 20
+
+
+class ResponseTooLargeError(Exception):
+    """Raised when an upstream response body exceeds the caller's `max_bytes`."""
+
+
+class _RetryBudget:
+    """Sliding-window counter limiting retries and hedges for one upstream."""
+
+    def __init__(self, limit: int, window: float) -> None:
+        self.limit = limit
+        self.window = window
+        self._events: deque[float] = deque()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        while self._events and now - self._events[0] > self.window:
+            self._events.popleft()
+        if len(self._events) >= self.limit:
+            return False
+        self._events.append(now)
+        return True
+
+
+_budgets: dict[str, _RetryBudget] = {}
+_latencies: dict[str, deque[float]] = {}
+
+
+def _budget(upstream: str) -> _RetryBudget:
+    budget = _budgets.get(upstream)
+    if budget is None:
+        budget = _budgets[upstream] = _RetryBudget(
+            RETRY_BUDGET, RETRY_BUDGET_WINDOW_SECONDS
+        )
+    return budget
+
+
+def _record_latency(upstream: str, seconds: float) -> None:
+    samples = _latencies.get(upstream)
+    if samples is None:
+        samples = _latencies[upstream] = deque(maxlen=LATENCY_SAMPLES)
+    samples.append(seconds)
+
+
+def hedge_delay(upstream: str) -> float | None:
+    """Return the observed p95 latency for `upstream`, or None without enough samples."""
+    samples = _latencies.get(upstream)
+    if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def _may_retry(upstream: str, attempt: int, delay: float) -> bool:
+    if attempt >= MAX_RETRIES or delay > RETRY_MAX_DELAY:
+        return False
+    left = deadline.time_left()
+    if left is not None and delay >= left:
+        return False
+    return _budget(upstream).try_acquire()
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (0-based) retry attempt."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+def retry_after_delay(resp: httpx.Response) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    value = resp.headers.get("Retry-After")
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+async def _hedged_get(
+    client: httpx.AsyncClient,
+    url: str,
+    upstream: str,
+    delay: float,
+    kwargs: dict[str, Any],
+) -> httpx.Response:
+    primary = asyncio.create_task(client.get(url, **kwargs))
+    hedge: asyncio.Task | None = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not _budget(upstream).try_acquire():
+            return await primary
+
+        logger.debug("%s: hedging GET %s after %.3fs", upstream, url, delay)
+        prometheus.UPSTREAM_HEDGES.inc(upstream=upstream)
+        hedge = asyncio.create_task(client.get(url, **kwargs))
+        pending: set[asyncio.Task] = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # Both attempts failed: surface the primary's error
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def _limited_get(
+    client: httpx.AsyncClient,
+    url: str,
+    max_bytes: int,
+    kwargs: dict[str, Any],
+) -> httpx.Response:
+    """GET `url`, streaming the body and aborting once it exceeds `max_bytes`."""
+    follow_redirects = kwargs.pop("follow_redirects", None)
+    request = client.build_request("GET", url, **kwargs)
+    if follow_redirects is None:
+        resp = await client.send(request, stream=True)
+    else:
+        resp = await client.send(
+            request, stream=True, follow_redirects=follow_redirects
+        )
+    try:
+        declared = resp.headers.get("Content-Length")
+        if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLargeError(
+                f"Response from {url} is {int(declared)} bytes, "
+                f"over the {max_bytes} bytes limit"
+            )
+        body = bytearray()
+        async for chunk in resp.aiter_bytes():
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                raise ResponseTooLargeError(
+                    f"Response from {url} exceeds the {max_bytes} bytes limit"
+                )
+    finally:
+        await resp.aclose()
+    # The body is already decoded: drop the headers describing the wire encoding
+    headers = [
+        (name, value)
+        for name, value in resp.headers.multi_items()
+        if name.lower() not in ("content-encoding", "content-length")
+    ]
+    return httpx.Response(
+        resp.status_code, headers=headers, content=bytes(body), request=resp.request
+    )
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    url: str,
+    upstream: str,
+    kwargs: dict[str, Any],
+    max_bytes: int | None = None,
+) -> httpx.Response:
+    delay = hedge_delay(upstream) if HEDGING_ENABLED else None
+    prometheus.UPSTREAM_REQUESTS_IN_FLIGHT.inc(upstream=upstream)
+    start = time.monotonic()
+    try:
+        if max_bytes is not None:
+            resp = await _limited_get(client, url, max_bytes, dict(kwargs))
+        elif delay is None:
+            resp = await client.get(url, **kwargs)
+        else:
+            resp = await _hedged_get(client, url, upstream, delay, kwargs)
+    except Exception:
+        prometheus.UPSTREAM_REQUEST_DURATION.observe(
+            time.monotonic() - start, upstream=upstream, status="error"
+        )
+        raise
+    finally:
+        prometheus.UPSTREAM_REQUESTS_IN_FLIGHT.dec(upstream=upstream)
+    elapsed = time.monotonic() - start
+    _record_latency(upstream, elapsed)
+    prometheus.UPSTREAM_REQUEST_DURATION.observe(
+        elapsed, upstream=upstream, status=resp.status_code
+    )
+    return resp
+
+
+async def get(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    upstream: str,
+    params: dict[str, Any] | None = None,
+    timeout: float = 15.0,
+    max_bytes: int | None = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Issue an idempotent GET against an upstream, with retries and optional hedging.
+
+    Args:
+        client: httpx.AsyncClient to send the request with.
+        url: Request URL.
+        upstream: Upstream name used for retry budgets and latency tracking
+            (e.g. "datagouv_api", "tabular_api", "metrics_api", "crawler_api").
+        params: Optional query parameters.
+        timeout: Per-attempt timeout in seconds, clamped to the request deadline.
+        max_bytes: Optional limit on the (decoded) response body size; the body is
+            streamed and the download aborted past it. Hedging is not used then.
+        **kwargs: Extra arguments forwarded to `client.get` (e.g. follow_redirects).
+
+    Returns:
+        The final httpx.Response. A retryable status is returned as-is once retries
+        are exhausted, so callers keep their own status handling.
+
+    Raises:
+        httpx.HTTPError: Transport errors that persist after retries.
+        DeadlineExceededError: If the request deadline passed before an attempt.
+        ResponseTooLargeError: If the body exceeds `max_bytes` (not retried).
+    """
+    if params is not None:
+        kwargs["params"] = params
+
+    with tracing.start_span(
+        f"GET {upstream}", attributes=_span_attributes(url, upstream)
+    ) as span:
+        resp = await _get_with_retries(
+            client, url, upstream, timeout, kwargs, max_bytes
+        )
+        if span is not None:
+            span.set_attribute("http.response.status_code", resp.status_code)
+            span.set_attribute("http.response.body.size", len(resp.content))
+        return resp
+
+
+def _span_attributes(url: str, upstream: str) -> dict[str, Any]:
+    return {
+        "upstream": upstream,
+        "http.request.method": "GET",
+        "url.template": tracing.endpoint_template(url),
+    }
+
+
+async def _get_with_retries(
+    client: httpx.AsyncClient,
+    url: str,
+    upstream: str,
+    timeout: float,
+    kwargs: dict[str, Any],
+    max_bytes: int | None = None,
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        kwargs["timeout"] = deadline.remaining_timeout(timeout)
+        try:
+            resp = await _send(client, url, upstream, kwargs, max_bytes)
+        except _RETRYABLE_EXCEPTIONS as exc:
+            delay = _backoff_delay(attempt)
+            if not _may_retry(upstream, attempt, delay):
+                raise
+            prometheus.UPSTREAM_RETRIES.inc(
+                upstream=upstream, reason=type(exc).__name__
+            )
+            logger.warning(
+                "%s: %s on GET %s, retrying in %.2fs",
+                upstream,
+                type(exc).__name__,
+                url,
+                delay,
+            )
+        else:
+            if resp.status_code not in RETRYABLE_STATUS_CODES:
+                return resp
+            retry_after = retry_after_delay(resp)
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            if not _may_retry(upstream, attempt, delay):
+                return resp
+            prometheus.UPSTREAM_RETRIES.inc(upstream=upstream, reason=resp.status_code)
+            logger.warning(
+                "%s: HTTP %s on GET %s, retrying in %.2fs",
+                upstream,
+                resp.status_code,
+                url,
+                delay,
+            )
+        await asyncio.sleep(delay)
+        attempt += 1
+        tracing.set_attribute("upstream.retry_count", attempt)
+
+
+@asynccontextmanager
+async def stream(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    upstream: str,
+    params: dict[str, Any] | None = None,
+    timeout: float = 30.0,
+    **kwargs: Any,
+) -> AsyncIterator[httpx.Response]:
+    """
+    Open a streamed GET against an upstream, for bodies too large to buffer.
+
+    Retries (budget, backoff, deadline) apply as in `get` until the response
+    headers arrive; the body is then left to the caller to iterate over, and the
+    response is closed when the context exits.
+
+    Yields:
+        The httpx.Response, with its body not yet read.
+    """
+    with tracing.start_span(
+        f"GET {upstream}", attributes=_span_attributes(url, upstream)
+    ) as span:
+        resp = await _open_stream_with_retries(
+            client, url, upstream, timeout, params, kwargs
+        )
+        if span is not None:
+            span.set_attribute("http.response.status_code", resp.status_code)
+        prometheus.UPSTREAM_REQUESTS_IN_FLIGHT.inc(upstream=upstream)
+        try:
+            yield resp
+        finally:
+            prometheus.UPSTREAM_REQUESTS_IN_FLIGHT.dec(upstream=upstream)
+            await resp.aclose()
+            if span is not None:
+                span.set_attribute("http.response.body.size", resp.num_bytes_downloaded)
+
+
+async def _open_stream_with_retries(
+    client: httpx.AsyncClient,
+    url: str,
+    upstream: str,
+    timeout: float,
+    params: dict[str, Any] | None,
+    kwargs: dict[str, Any],
+) -> httpx.Response:
+    attempt = 0
+    while True:
+        request = client.build_request(
+            "GET",
+            url,
+            params=params,
+            timeout=deadline.remaining_timeout(timeout),
+            **kwargs,
+        )
+        start = time.monotonic()
+        try:
+            resp = await client.send(request, stream=True)
+        except _RETRYABLE_EXCEPTIONS as exc:
+            prometheus.UPSTREAM_REQUEST_DURATION.observe(
+                time.monotonic() - start, upstream=upstream, status="error"
+            )
+            delay = _backoff_delay(attempt)
+            if not _may_retry(upstream, attempt, delay):
+                raise
+            prometheus.UPSTREAM_RETRIES.inc(
+                upstream=upstream, reason=type(exc).__name__
+            )
+        else:
+            prometheus.UPSTREAM_REQUEST_DURATION.observe(
+                time.monotonic() - start, upstream=upstream, status=resp.status_code
+            )
+            if resp.status_code not in RETRYABLE_STATUS_CODES:
+                return resp
+            retry_after = retry_after_delay(resp)
+            delay = retry_after if retry_after is not None else _backoff_delay(attempt)
+            if not _may_retry(upstream, attempt, delay):
+                return resp
+            await resp.aclose()
+            prometheus.UPSTREAM_RETRIES.inc(upstream=upstream, reason=resp.status_code)
+        logger.warning("%s: retrying streamed GET %s in %.2fs", upstream, url, delay)
+        await asyncio.sleep(delay)
+        attempt += 1
+        tracing.set_attribute("upstream.retry_count", attempt)
+
+
+def reset_state() -> None:
+    """Clear retry budgets and latency samples. Useful for testing."""
+    _budgets.clear()
+    _latencies.clear()
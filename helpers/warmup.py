@@ -0,0 +1,52 @@
+"""
+Optional warm-up run before the server reports ready (STARTUP_WARMUP=true).
+
+Without it, the first requests after a deploy pay for a TCP connection and a TLS
+handshake to every upstream, the crawler exceptions download and the Matomo
+handshake. Warm-up opens a connection of each shared upstream client (see
+helpers.http_clients), preloads the exceptions list and opens the Matomo
+connection, all concurrently during the lifespan startup, bounded by
+STARTUP_WARMUP_TIMEOUT_SECONDS. Failures are logged and never block startup.
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from helpers import crawler_api_client, http_clients, matomo
+from helpers.logging import MAIN_LOGGER_NAME
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+ENABLED: bool = os.getenv("STARTUP_WARMUP", "false").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+TIMEOUT_SECONDS: float = float(os.getenv("STARTUP_WARMUP_TIMEOUT_SECONDS", "10"))
+
+
+async def warm_up() -> None:
+    """Open upstream connections, prime the crawler exceptions cache and Matomo."""
+    start = time.monotonic()
+    steps = {
+        **{
+            f"{name} connection": http_clients.open_connection(name)
+            for name in http_clients.UPSTREAMS
+        },
+        "crawler exceptions": crawler_api_client.fetch_resource_exceptions(),
+        "matomo connection": matomo.open_connection(),
+    }
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*steps.values(), return_exceptions=True),
+            timeout=TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Startup warm-up timed out after %.1fs", TIMEOUT_SECONDS)
+        return
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("Startup warm-up: %s failed: %s", name, result)
+    logger.info("Startup warm-up done in %.2fs", time.monotonic() - start)
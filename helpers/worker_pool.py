@@ -0,0 +1,62 @@
+"""
+Bounded thread pool for CPU-heavy work that must not run on the event loop.
+
+Parsing a multi-megabyte OpenAPI document or walking all of its paths can take
+hundreds of milliseconds; run on the event loop, that stalls every other in-flight
+tool call. `run` hands such work to a small dedicated pool (CPU_WORKER_THREADS,
+defaults to 2) so that the loop keeps serving requests, and records the time spent
+per task in the `cpu_task_duration_seconds` metric.
+
+Threads (rather than processes or sub-interpreters) are used because results are
+large nested dicts that would otherwise have to be pickled back to the caller.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ParamSpec, TypeVar
+
+from helpers import prometheus
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+CPU_WORKER_THREADS: int = int(os.getenv("CPU_WORKER_THREADS", "2"))
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, CPU_WORKER_THREADS), thread_name_prefix="cpu-worker"
+        )
+    return _executor
+
+
+def _timed(func: Callable[[], R]) -> tuple[R, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+async def run(task: str, func: Callable[P, R], *args: P.args, **kwargs: P.kwargs) -> R:
+    """
+    Run `func(*args, **kwargs)` in the worker pool and await its result.
+
+    Args:
+        task: Short task name used as the metric label (e.g. "openapi_parse").
+    """
+    # Copy the context so that logging (request ID, tool name) still applies
+    call = functools.partial(
+        contextvars.copy_context().run, functools.partial(func, *args, **kwargs)
+    )
+    loop = asyncio.get_running_loop()
+    result, elapsed = await loop.run_in_executor(_get_executor(), _timed, call)
+    # Recorded on the event loop thread, where every other metric is updated
+    prometheus.CPU_TASK_DURATION.observe(elapsed, task=task)
+    return result
@@ -11,17 +11,34 @@ import uvicorn
 from mcp.server.fastmcp import FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 
+from helpers import (
+    http_clients,
+    prometheus,
+    request_cancellation,
+    tool_cache,
+    tracing,
+    warmup,
+)
 from helpers.health_probe import _run_health_check
-from helpers.logging import MAIN_LOGGER_NAME, UVICORN_LOGGING_CONFIG
+from helpers.logging import (
+    MAIN_LOGGER_NAME,
+    UVICORN_LOGGING_CONFIG,
+    bind_request_id,
+    configure_logging,
+    request_id_from_header,
+    reset_request_id,
+)
 from helpers.matomo import (
     apply_matomo_request_context,
     reset_matomo_request_context,
     track_matomo_request,
 )
 from helpers.sentry import init_sentry
+from helpers.tracing import init_tracing
 from tools import register_tools
 
 init_sentry()
+init_tracing()
 
 SERVER_START_TIME = datetime.now(timezone.utc)
 
@@ -105,6 +122,22 @@ def with_monitoring(
                 await send({"type": "http.response.body", "body": body})
                 return
 
+            # Handle /metrics endpoint (Prometheus scrape, no tracking)
+            if path == "/metrics":
+                body = prometheus.render().encode("utf-8")
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": 200,
+                        "headers": [
+                            (b"content-type", prometheus.CONTENT_TYPE.encode("utf-8")),
+                            (b"content-length", str(len(body)).encode("utf-8")),
+                        ],
+                    }
+                )
+                await send({"type": "http.response.body", "body": body})
+                return
+
             # Matomo: bind request URL/UA for tool event tracking; HTTP-level hit in background
             headers_dict: dict[str, str] = {
                 k.decode("utf-8"): v.decode("utf-8")
@@ -113,13 +146,41 @@ def with_monitoring(
             url_token, ua_token = apply_matomo_request_context(headers_dict, path)
             host: str = headers_dict.get("host", "localhost")
             full_url: str = f"https://{host}{path}"
+            # Correlate every log line of this request (reuses X-Request-ID if sent)
+            request_id_token = bind_request_id(
+                request_id_from_header(headers_dict.get("x-request-id"))
+            )
+            # Cancel the tool calls of this request if the client disconnects
+            cancellation, cancel_token = request_cancellation.bind()
+            # Cache-Control: no-cache skips memoized tool results
+            bypass_token = tool_cache.bind_bypass(headers_dict)
+            prometheus.HTTP_REQUESTS_IN_FLIGHT.inc()
+            span_attributes = {
+                "http.request.method": scope.get("method", ""),
+                "url.path": path,
+            }
             try:
                 asyncio.create_task(
                     track_matomo_request(url=full_url, path=path, headers=headers_dict)
                 )
-                await inner_app(scope, receive, send)
+                with tracing.start_span(
+                    "MCP request", attributes=span_attributes, carrier=headers_dict
+                ):
+                    await request_cancellation.run_until_disconnect(
+                        inner_app, scope, receive, send, cancellation
+                    )
             finally:
+                prometheus.HTTP_REQUESTS_IN_FLIGHT.dec()
+                request_cancellation.reset(cancel_token)
+                tool_cache.reset_bypass(bypass_token)
                 reset_matomo_request_context(url_token, ua_token)
+                reset_request_id(request_id_token)
+            return
+
+        # Warm upstreams up before the server reports ready (optional), close the
+        # shared upstream clients on shutdown
+        if scope["type"] == "lifespan":
+            await inner_app(scope, receive, _lifespan_hooks(send))
             return
 
         # Continue the MCP server logic (non-HTTP scopes, e.g. lifespan)
@@ -128,11 +189,25 @@ def with_monitoring(
     return app
 
 
+def _lifespan_hooks(send: Callable) -> Callable:
+    """Warm up before the startup completion, close clients before the shutdown one."""
+
+    async def send_with_hooks(message: dict) -> None:
+        if message["type"] == "lifespan.startup.complete" and warmup.ENABLED:
+            await warmup.warm_up()
+        elif message["type"] == "lifespan.shutdown.complete":
+            await http_clients.close()
+        await send(message)
+
+    return send_with_hooks
+
+
 asgi_app = with_monitoring(mcp.streamable_http_app())
 
 
 # Run with streamable HTTP transport
 if __name__ == "__main__":
+    configure_logging()
     port_str = os.getenv("MCP_PORT", "8000")
     try:
         port = int(port_str)
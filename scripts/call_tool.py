@@ -16,7 +16,7 @@ import sys
 
 from mcp.types import TextContent
 
-from helpers.logging import MAIN_LOGGER_NAME
+from helpers.logging import MAIN_LOGGER_NAME, configure_logging
 from helpers.mcp_client import call_tool_on_mcp
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
@@ -26,7 +26,7 @@ async def call_tool(tool_name: str, args: dict) -> None:
     """
     Connect to MCP server and call a tool with given arguments.
     """
-    logger.debug(f"Initiating tool call: {tool_name}")
+    logger.debug("Initiating tool call: %s", tool_name)
 
     result = await call_tool_on_mcp(tool_name, args)
 
@@ -45,6 +45,7 @@ if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python scripts/call_tool.py <tool_name> '<json_args>'")
         sys.exit(1)
+    configure_logging()
     tool = sys.argv[1]
     arguments = json.loads(sys.argv[2]) if len(sys.argv) > 2 else {}
     asyncio.run(call_tool(tool, arguments))
@@ -0,0 +1,16 @@
+"""Timing helper shared by the benchmark tests (marker `benchmark`)."""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+
+def cpu_per_call(func: Callable[[], Any], repeat: int = 5, number: int = 20) -> float:
+    """Best CPU time of one `func()` call over `repeat` runs of `number` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        for _ in range(number):
+            func()
+        best = min(best, (time.process_time() - start) / number)
+    return best
@@ -0,0 +1,47 @@
+from collections.abc import Awaitable, Callable
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+
+from helpers import metrics_api_client, metrics_store, shared_cache, tool_cache
+from tests.tool_results import text
+from tools import register_tools
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Tests call the same tools with different mocked upstreams."""
+    tool_cache.clear()
+    shared_cache.clear()
+    yield
+    tool_cache.clear()
+    shared_cache.clear()
+
+
+@pytest.fixture
+def app() -> FastMCP:
+    app = FastMCP()
+    register_tools(app)
+    return app
+
+
+@pytest.fixture
+def tool_text(app: FastMCP) -> Callable[[str, dict], Awaitable[str]]:
+    """Call a tool and return its text content."""
+
+    async def call(name: str, arguments: dict) -> str:
+        return text(await app.call_tool(name, arguments))
+
+    return call
+
+
+@pytest.fixture
+def fixed_months(monkeypatch) -> None:
+    """Metrics tools see 2025-05 as the current month, without the disk cache."""
+    metrics_store.clear()
+    monkeypatch.setattr(metrics_store, "CACHE_PATH", None)
+    monkeypatch.setattr(metrics_api_client, "_in_filter_supported", True)
+    months = {0: "2025-05", 1: "2025-04", 2: "2025-03"}
+    monkeypatch.setattr(metrics_store, "months_ago", lambda count: months[count])
+    monkeypatch.setattr(metrics_store, "latest_closed_month", lambda: "2025-03")
+    monkeypatch.setattr(metrics_store, "first_open_month", lambda: "2025-04")
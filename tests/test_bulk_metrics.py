@@ -0,0 +1,126 @@
+"""Unit tests for bulk metrics retrieval and the compare_metrics tool (mocked HTTP)."""
+
+import re
+
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import metrics_api_client
+from tests import tool_results
+
+_DATA_URL = re.compile(r"https://metric-api\.data\.gouv\.fr/api/datasets/data/.*")
+
+
+pytestmark = pytest.mark.usefixtures("fixed_months")
+
+
+def _record(dataset_id: str, month: str, visits: int) -> dict:
+    return {
+        "dataset_id": dataset_id,
+        "metric_month": month,
+        "monthly_visit": visits,
+        "monthly_download_resource": visits // 10,
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_metrics_uses_in_filter_and_stops_at_window_start(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(
+        url=_DATA_URL,
+        json={
+            "data": [
+                _record("a", "2025-05", 10),
+                _record("b", "2025-05", 20),
+                _record("a", "2025-04", 30),
+            ],
+            "links": {
+                "next": "https://metric-api.data.gouv.fr/api/datasets/data/?page=2"
+            },
+        },
+    )
+    httpx_mock.add_response(
+        url=_DATA_URL,
+        json={
+            "data": [_record("b", "2025-03", 40), _record("a", "2025-02", 50)],
+            "links": {
+                "next": "https://metric-api.data.gouv.fr/api/datasets/data/?page=3"
+            },
+        },
+    )
+
+    results = await metrics_api_client.get_bulk_metrics(
+        "datasets", ["a", "b", "c", "a", " "], months=3
+    )
+
+    assert {k: [r["metric_month"] for r in v] for k, v in results.items()} == {
+        "a": ["2025-05", "2025-04"],
+        "b": ["2025-05", "2025-03"],
+        "c": [],
+    }
+    requests = httpx_mock.get_requests()
+    # Page 3 is never requested: page 2 already reached months before the window
+    assert len(requests) == 2
+    assert requests[0].url.params["dataset_id__in"] == "a,b,c"
+    assert requests[0].url.params["metric_month__sort"] == "desc"
+
+
+@pytest.mark.asyncio
+async def test_bulk_metrics_falls_back_to_fan_out(httpx_mock: HTTPXMock) -> None:
+    def respond(request):
+        if "dataset_id__in" in request.url.params:
+            return httpx.Response(400, json={"errors": ["unknown operator"]})
+        dataset_id = request.url.params["dataset_id__exact"]
+        return httpx.Response(
+            200, json={"data": [_record(dataset_id, "2025-05", len(dataset_id))]}
+        )
+
+    httpx_mock.add_callback(respond, url=_DATA_URL, is_reusable=True)
+
+    results = await metrics_api_client.get_bulk_metrics(
+        "datasets", ["a", "bb"], months=3
+    )
+
+    assert results["a"][0]["monthly_visit"] == 1
+    assert results["bb"][0]["monthly_visit"] == 2
+    assert metrics_api_client._in_filter_supported is False
+
+
+@pytest.mark.asyncio
+async def test_bulk_metrics_rejects_too_many_ids() -> None:
+    with pytest.raises(ValueError):
+        await metrics_api_client.get_bulk_metrics(
+            "datasets", [str(i) for i in range(metrics_api_client.MAX_BULK_IDS + 1)]
+        )
+
+
+@pytest.mark.asyncio
+async def test_compare_metrics_ranks_entities(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url=_DATA_URL,
+        json={
+            "data": [
+                _record("small", "2025-05", 10),
+                _record("big", "2025-05", 500),
+                _record("big", "2025-04", 300),
+            ],
+            "links": {"next": None},
+        },
+    )
+
+    result = await app.call_tool(
+        "compare_metrics", {"ids": ["small", "big", "none"], "months": 3}
+    )
+    text = tool_results.text(result)
+
+    lines = text.splitlines()
+    rank_lines = [line for line in lines if re.match(r"^\d+\s", line)]
+    assert rank_lines[0].split()[:3] == ["1", "big", "800"]
+    assert rank_lines[1].split()[:3] == ["2", "small", "10"]
+    assert "No data: none" in text
+    assert re.search(r"2025-04\s+300\s+-", text)
@@ -0,0 +1,176 @@
+"""Tests for helpers.continuation and the cursors of paginated tools."""
+
+import re
+from typing import Any
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import continuation, datagouv_api_client, tabular_api_client
+from helpers.models import Dataset
+from tests.tool_results import structured, text, tool_result
+
+
+def test_round_trip() -> None:
+    state = {"query": "élections", "page": 2, "params": {"dep__exact": "75"}}
+
+    token = continuation.encode("search_datasets", state)
+
+    assert re.fullmatch(r"[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+", token)
+    assert continuation.decode("search_datasets", token) == state
+
+
+def test_tampered_token_is_rejected() -> None:
+    token = continuation.encode("search_datasets", {"page": 2})
+    payload, _, signature = token.partition(".")
+    forged = continuation._b64encode(b'{"s":{"page":99},"e":9999999999}')
+
+    with pytest.raises(continuation.InvalidTokenError, match="invalid cursor"):
+        continuation.decode("search_datasets", f"{forged}.{signature}")
+    with pytest.raises(continuation.InvalidTokenError):
+        continuation.decode("search_datasets", payload)
+    with pytest.raises(continuation.InvalidTokenError, match="malformed"):
+        continuation.decode("search_datasets", "not a token!")
+
+
+def test_token_is_bound_to_its_tool() -> None:
+    token = continuation.encode("search_datasets", {"page": 2})
+
+    with pytest.raises(continuation.InvalidTokenError, match="search_organizations"):
+        continuation.decode("search_organizations", token)
+
+
+def test_expired_token_is_rejected(monkeypatch) -> None:
+    monkeypatch.setattr(continuation, "TTL_SECONDS", -1)
+    token = continuation.encode("search_datasets", {"page": 2})
+
+    with pytest.raises(continuation.InvalidTokenError, match="expired"):
+        continuation.decode("search_datasets", token)
+
+
+@pytest.mark.asyncio
+async def test_query_resource_data_cursor_makes_one_upstream_call(
+    app: FastMCP, monkeypatch
+) -> None:
+    calls: list[str] = []
+
+    async def get_resource_metadata(resource_id: str, **kwargs: Any) -> dict:
+        calls.append("resource")
+        return {"title": "Communes", "dataset_id": "ds1"}
+
+    async def get_dataset_summary(dataset_id: str, **kwargs: Any) -> Dataset:
+        calls.append("dataset")
+        return Dataset(id=dataset_id, title="Découpage")
+
+    async def fetch_resource_data(
+        resource_id: str, page: int, page_size: int, params: Any = None, **kwargs: Any
+    ) -> dict:
+        calls.append(f"data:{page}:{page_size}:{params}")
+        return {
+            "data": [{"code": "75056", "dep": "75"}],
+            "meta": {"page": page, "page_size": page_size, "total": 3},
+            "links": {"next": "..." if page < 3 else None},
+        }
+
+    monkeypatch.setattr(
+        datagouv_api_client, "get_resource_metadata", get_resource_metadata
+    )
+    monkeypatch.setattr(datagouv_api_client, "get_dataset_summary", get_dataset_summary)
+    monkeypatch.setattr(tabular_api_client, "fetch_resource_data", fetch_resource_data)
+
+    first = await app.call_tool(
+        "query_resource_data",
+        {
+            "resource_id": "r1",
+            "page_size": 1,
+            "filter_column": "dep",
+            "filter_value": "75",
+        },
+    )
+    cursor = structured(first)["next_cursor"]
+    assert f"Cursor for page 2 (same query): {cursor}" in text(first)
+    calls.clear()
+
+    second = await app.call_tool("query_resource_data", {"cursor": cursor})
+
+    assert calls == ["data:2:1:{'dep__exact': '75'}"]
+    assert structured(second)["page"] == 2
+    assert structured(second)["resource_title"] == "Communes"
+    assert "Dataset: Découpage (ID: ds1)" in text(second)
+    assert "Filter: dep exact 75" in text(second)
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_reuses_the_matching_query(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    search_url = re.compile(r"https://www\.data\.gouv\.fr/api/2/datasets/search/.*")
+    httpx_mock.add_response(url=search_url, json={"data": [], "total": 0})
+    httpx_mock.add_response(
+        url=search_url, json={"data": [{"id": "ds1", "title": "T"}], "total": 30}
+    )
+
+    first = await app.call_tool(
+        "search_datasets",
+        {"query": "fichier budget", "page_size": 20, "sort": "-created"},
+    )
+    cursor = structured(first)["next_cursor"]
+    httpx_mock.add_response(
+        url=search_url, json={"data": [{"id": "ds2", "title": "U"}], "total": 30}
+    )
+
+    second = await app.call_tool("search_datasets", {"cursor": cursor})
+
+    requests = httpx_mock.get_requests()
+    assert len(requests) == 3
+    # The first page fell back to the original query, so the cursor keeps it
+    assert requests[2].url.params["q"] == "fichier budget"
+    assert requests[2].url.params["page"] == "2"
+    assert requests[2].url.params["sort"] == "-created"
+    assert structured(second)["query"] == "fichier budget"
+    assert structured(second)["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_falls_back_to_the_arguments(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/2/dataservices/search/.*"),
+        json={"data": [{"id": "api1", "title": "API"}], "total": 1},
+    )
+    foreign = continuation.encode("search_datasets", {"page": 2})
+
+    result = tool_result(
+        await app.call_tool(
+            "search_dataservices", {"query": "adresse", "cursor": foreign}
+        )
+    )
+
+    assert not result.isError
+    assert httpx_mock.get_requests()[0].url.params["q"] == "adresse"
+    assert structured(result)["query"] == "adresse"
+
+
+@pytest.mark.asyncio
+async def test_query_or_resource_id_is_required_without_a_valid_cursor(
+    app: FastMCP,
+) -> None:
+    foreign = continuation.encode("search_datasets", {"page": 2})
+
+    search = tool_result(
+        await app.call_tool("search_dataservices", {"cursor": foreign})
+    )
+    datasets = tool_result(await app.call_tool("search_datasets", {}))
+    query = tool_result(
+        await app.call_tool("query_resource_data", {"cursor": "garbage"})
+    )
+
+    assert search.isError
+    assert search.structuredContent == {
+        "error": "Error: query is required (cursor is missing or no longer valid)."
+    }
+    assert datasets.isError
+    assert query.isError
+    assert "resource_id is required" in structured(query)["error"]
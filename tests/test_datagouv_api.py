@@ -78,21 +78,6 @@ class TestAsyncFunctions:
         if result["dataset"]:
             assert "id" in result["dataset"]
 
-    async def test_get_resources_for_dataset(self, known_dataset_id):
-        """Test fetching resources for a dataset."""
-        result = await datagouv_api_client.get_resources_for_dataset(known_dataset_id)
-
-        assert "dataset" in result
-        assert "resources" in result
-        assert isinstance(result["resources"], list)
-        assert result["dataset"]["id"] == known_dataset_id
-
-        # Check resources structure
-        if result["resources"]:
-            resource_id, resource_title = result["resources"][0]
-            assert isinstance(resource_id, str)
-            assert len(resource_id) > 0
-
     async def test_search_datasets_basic(self):
         """Test basic dataset search."""
         result = await datagouv_api_client.search_datasets(
@@ -390,10 +375,10 @@ class TestAsyncFunctions:
         dataservice_id = "672cf67802ef6b1be63b8975"
         details = await datagouv_api_client.get_dataservice_details(dataservice_id)
 
-        assert details.get("id") == dataservice_id
-        assert details.get("title")
-        assert details.get("base_api_url")
-        assert details.get("machine_documentation_url")
+        assert details.id == dataservice_id
+        assert details.title
+        assert details.base_api_url
+        assert details.machine_documentation_url
 
     async def test_get_dataservice_details_invalid_id(self):
         """Test that an invalid dataservice_id raises an error."""
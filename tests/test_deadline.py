@@ -0,0 +1,95 @@
+"""Tests for request deadline propagation (no live API)."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from helpers import deadline, upstream
+from helpers.logging import log_tool
+
+
+def test_remaining_timeout_without_deadline_is_unchanged() -> None:
+    assert deadline.time_left() is None
+    assert deadline.remaining_timeout(15.0) == 15.0
+
+
+def test_remaining_timeout_is_clamped_to_deadline() -> None:
+    token = deadline.apply_deadline(2.0)
+    try:
+        assert deadline.remaining_timeout(15.0) <= 2.0
+        assert deadline.remaining_timeout(0.5) == 0.5
+    finally:
+        deadline.reset_deadline(token)
+    assert deadline.time_left() is None
+
+
+def test_nested_deadline_never_extends_outer() -> None:
+    outer = deadline.apply_deadline(1.0)
+    inner = deadline.apply_deadline(60.0)
+    try:
+        left = deadline.time_left()
+        assert left is not None and left <= 1.0
+    finally:
+        deadline.reset_deadline(inner)
+        deadline.reset_deadline(outer)
+
+
+def test_remaining_timeout_raises_once_expired() -> None:
+    token = deadline.apply_deadline(-1.0)
+    try:
+        with pytest.raises(deadline.DeadlineExceededError):
+            deadline.remaining_timeout(15.0)
+    finally:
+        deadline.reset_deadline(token)
+
+
+@pytest.mark.asyncio
+async def test_upstream_get_uses_remaining_time_as_timeout() -> None:
+    mock_client = MagicMock()
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_client.get = AsyncMock(return_value=mock_response)
+
+    token = deadline.apply_deadline(3.0)
+    try:
+        await upstream.get(
+            mock_client, "https://x.example/", upstream="test_api", timeout=30.0
+        )
+    finally:
+        deadline.reset_deadline(token)
+
+    _args, kwargs = mock_client.get.call_args
+    assert 0 < kwargs["timeout"] <= 3.0
+
+
+@pytest.mark.asyncio
+async def test_log_tool_cancels_work_past_the_deadline(monkeypatch) -> None:
+    monkeypatch.setattr(deadline, "TOOL_TIMEOUT_SECONDS", 0.05)
+    cancelled = asyncio.Event()
+
+    @log_tool
+    async def slow_tool() -> str:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "done"
+
+    result = await slow_tool()
+
+    assert result.isError
+    assert result.content[0].text.startswith("Error: slow_tool did not complete")
+    assert cancelled.is_set()
+    assert deadline.time_left() is None
+
+
+@pytest.mark.asyncio
+async def test_log_tool_propagates_inner_timeouts() -> None:
+    @log_tool
+    async def failing_tool() -> str:
+        raise TimeoutError("inner")
+
+    with pytest.raises(TimeoutError, match="inner"):
+        await failing_tool()
@@ -0,0 +1,118 @@
+"""Tests for helpers.disk_cache (on-disk tier of the shared cache)."""
+
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import datagouv_api_client, disk_cache, shared_cache
+from helpers.models import Dataset
+
+
+def test_entries_survive_a_restart(tmp_path: Path) -> None:
+    path = tmp_path / "cache" / disk_cache.FILENAME
+    store = disk_cache.DiskStore(path)
+    store.set("k", "é".encode(), 60)
+    store.set("expired", b"x", 0.01)
+    store.close()
+    time.sleep(0.02)
+
+    restarted = disk_cache.DiskStore(path)
+    assert (entry := restarted.get("k")) is not None
+    value, ttl = entry
+
+    assert value == "é".encode()
+    assert 55 < ttl <= 60
+    assert restarted.get("expired") is None
+    # Purged when the database was opened
+    assert restarted._size == len("k") + len("é".encode())
+
+
+def test_store_is_bounded_and_evicts_soonest_to_expire(tmp_path: Path) -> None:
+    store = disk_cache.DiskStore(tmp_path / disk_cache.FILENAME, max_bytes=1000)
+
+    for i in range(10):
+        store.set(f"k{i}", b"x" * 198, 100 + i)
+
+    assert store._size <= 1000
+    assert store.get("k0") is None
+    assert store.get("k9") is not None
+    (total,) = store._connection().execute("SELECT SUM(size) FROM entries").fetchone()
+    assert total == store._size
+
+
+def test_overwrite_and_delete_keep_the_size_accurate(tmp_path: Path) -> None:
+    store = disk_cache.DiskStore(tmp_path / disk_cache.FILENAME)
+
+    store.set("k", b"x" * 100, 60)
+    store.set("k", b"x" * 10, 60)
+    assert store._size == 11
+    store.delete("k")
+    store.delete("missing")
+    assert store._size == 0
+    assert store.get("k") is None
+
+
+def test_corrupt_database_is_moved_aside(tmp_path: Path) -> None:
+    path = tmp_path / disk_cache.FILENAME
+    path.write_bytes(b"not a sqlite database" * 100)
+
+    store = disk_cache.DiskStore(path)
+    store.set("k", b"v", 60)
+
+    assert store.get("k") == (b"v", pytest.approx(60, abs=1))
+    assert len(list(tmp_path.glob(f"{disk_cache.FILENAME}.corrupt-*"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_restart_resumes_with_a_warm_cache(
+    tmp_path: Path, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/2/datasets/ds1/",
+        json={"id": "ds1", "title": "Titre"},
+    )
+    previous = shared_cache.backend()
+
+    def tiered() -> shared_cache.TieredBackend:
+        return shared_cache.TieredBackend(
+            shared_cache.MemoryBackend(), disk_cache.DiskBackend(str(tmp_path))
+        )
+
+    try:
+        first = tiered()
+        shared_cache.set_backend(first)
+        await datagouv_api_client.get_dataset_summary("ds1")
+        await first.close()
+
+        # New process: empty memory, same directory
+        shared_cache.set_backend(tiered())
+        summary = await datagouv_api_client.get_dataset_summary("ds1")
+    finally:
+        await shared_cache.backend().close()
+        shared_cache.set_backend(previous)
+
+    assert summary == Dataset(id="ds1", title="Titre")
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_locked_database_is_not_moved_aside(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / disk_cache.FILENAME
+    first = disk_cache.DiskStore(path)
+    first.set("k", b"v", 60)
+    first.close()
+    store = disk_cache.DiskStore(path)
+    open_database = store._open
+
+    def busy() -> sqlite3.Connection:
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "_open", busy)
+    with pytest.raises(sqlite3.OperationalError):
+        store.get("k")
+    monkeypatch.setattr(store, "_open", open_database)
+
+    assert not list(tmp_path.glob(f"{disk_cache.FILENAME}.corrupt-*"))
+    assert store.get("k") == (b"v", pytest.approx(60, abs=1))
@@ -0,0 +1,135 @@
+"""Unit tests for the get_metrics tool (mocked HTTP, no live API)."""
+
+import asyncio
+import re
+
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from tests.tool_results import structured, text, tool_result
+
+pytestmark = pytest.mark.usefixtures("fixed_months")
+
+
+@pytest.mark.asyncio
+async def test_dataset_and_resource_calls_run_concurrently(
+    tool_text,
+    httpx_mock: HTTPXMock,
+) -> None:
+    # Every response waits until all four requests are in flight: run serially,
+    # the first one would time out
+    arrived = 0
+    all_in_flight = asyncio.Event()
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal arrived
+        arrived += 1
+        if arrived == 4:
+            all_in_flight.set()
+        await asyncio.wait_for(all_in_flight.wait(), timeout=2)
+        if request.url.host == "metric-api.data.gouv.fr":
+            return httpx.Response(
+                200,
+                json={
+                    "data": [
+                        {
+                            "metric_month": "2025-04",
+                            "monthly_visit": 7,
+                            "monthly_download_resource": 3,
+                        }
+                    ]
+                },
+            )
+        if "/resources/" in request.url.path:
+            return httpx.Response(
+                200, json={"resource": {"title": "R"}, "dataset_id": "ds1"}
+            )
+        return httpx.Response(200, json={"id": "ds1", "title": "D"})
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+
+    text = await tool_text("get_metrics", {"dataset_id": "ds1", "resource_id": "res1"})
+
+    assert text.startswith("Dataset Metrics: D\nDataset ID: ds1\n")
+    assert "\n\n\nResource Metrics: R\nResource ID: res1\n" in text
+    assert re.search(r"2025-04\s+7\s+3", text)
+    assert len(httpx_mock.get_requests()) == 4
+
+
+@pytest.mark.asyncio
+async def test_branch_failures_are_isolated(tool_text, httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/1/datasets/.*"),
+        status_code=404,
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://metric-api\.data\.gouv\.fr/api/datasets/.*"),
+        json={"data": []},
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/2/datasets/resources/.*"),
+        json={"resource": {"title": "R"}},
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://metric-api\.data\.gouv\.fr/api/resources/.*"),
+        status_code=400,
+    )
+
+    text = await tool_text("get_metrics", {"dataset_id": "ds1", "resource_id": "res1"})
+
+    assert text.startswith("Dataset Metrics\nDataset ID: ds1\n")
+    assert "No metrics available for this dataset." in text
+    assert "Resource Metrics: R" in text
+    assert "Error fetching resource metrics:" in text
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_are_not_memoized(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/1/datasets/.*"),
+        json={"id": "ds1", "title": "D"},
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://metric-api\.data\.gouv\.fr/api/datasets/.*"),
+        status_code=400,
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://metric-api\.data\.gouv\.fr/api/datasets/.*"),
+        json={"data": [{"metric_month": "2025-03", "monthly_visit": 5}]},
+    )
+
+    failed = tool_result(await app.call_tool("get_metrics", {"dataset_id": "ds1"}))
+    # Same call, with the default spelled out: same cache entry
+    retried = tool_result(
+        await app.call_tool("get_metrics", {"dataset_id": "ds1", "limit": 12})
+    )
+
+    assert failed.isError
+    assert "error" in structured(failed)["dataset"]
+    assert not retried.isError
+    assert re.search(r"2025-03\s+5", text(retried))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("tool", "arguments"),
+    [
+        ("get_metrics", {"dataset_id": "ds1"}),
+        ("get_organization_metrics", {"organization": "org"}),
+        ("compare_metrics", {"ids": ["ds1"]}),
+    ],
+)
+async def test_metrics_tools_are_unavailable_in_demo(
+    app: FastMCP, monkeypatch, tool: str, arguments: dict
+) -> None:
+    monkeypatch.setenv("DATAGOUV_API_ENV", "demo")
+
+    result = tool_result(await app.call_tool(tool, arguments))
+
+    assert result.isError
+    assert "not available in the demo environment" in text(result)
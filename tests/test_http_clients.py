@@ -0,0 +1,25 @@
+"""Tests for helpers.http_clients (shared upstream clients)."""
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import datagouv_api_client, http_clients
+from helpers.user_agent import USER_AGENT
+
+
+@pytest.mark.asyncio
+async def test_one_client_per_upstream_is_reused_across_calls(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(json={"id": "org1"}, is_reusable=True)
+    client = http_clients.client("datagouv_api")
+
+    await datagouv_api_client.get_organization_details("org1")
+    await datagouv_api_client.get_organization_details("org2")
+
+    assert http_clients.client("datagouv_api") is client
+    assert http_clients.client("tabular_api") is not client
+    assert not client.is_closed
+    assert all(r.headers["User-Agent"] == USER_AGENT for r in httpx_mock.get_requests())
+    await http_clients.close()
+    assert client.is_closed
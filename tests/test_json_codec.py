@@ -0,0 +1,79 @@
+"""Unit tests and decode benchmark for helpers.json_codec (mocked HTTP)."""
+
+import json
+import sys
+
+import httpx
+import pytest
+
+from helpers import json_codec
+from tests.benchmark import cpu_per_call
+
+
+def _dataset_document(resources: int) -> bytes:
+    """A dataset payload shaped like /api/1/datasets/{id}/ with many resources."""
+    return json.dumps(
+        {
+            "id": "ds1",
+            "title": "Données de test",
+            "resources": [
+                {
+                    "id": f"res-{i}",
+                    "title": f"Fichier {i}.csv",
+                    "format": "csv",
+                    "filesize": 1024 * i,
+                    "url": f"https://static.data.gouv.fr/resources/{i}.csv",
+                    "extras": {"analysis:checksum": "x" * 40, "check:status": 200},
+                }
+                for i in range(resources)
+            ],
+        }
+    ).encode()
+
+
+def test_decode_response_matches_stdlib() -> None:
+    body = _dataset_document(3)
+    resp = httpx.Response(200, content=body)
+
+    assert json_codec.decode_response(resp) == resp.json()
+    assert json_codec.loads(body.decode()) == json.loads(body)
+
+
+def test_accelerated_backend_decodes_response_bytes(monkeypatch) -> None:
+    received: list[bytes | str] = []
+
+    def fake_loads(data: bytes | str) -> dict:
+        received.append(data)
+        return {}
+
+    monkeypatch.setattr(json_codec, "_loads", fake_loads)
+    json_codec.decode_response(httpx.Response(200, content=b"{}"))
+
+    assert received == [b"{}"]
+
+
+def test_invalid_json_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        json_codec.loads(b"{not json")
+
+
+def test_falls_back_to_stdlib_without_accelerated_decoders(monkeypatch) -> None:
+    # A None entry in sys.modules makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+
+    backend, loads = json_codec._select_backend()
+
+    assert backend == "json"
+    assert loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+
+
+@pytest.mark.benchmark
+def test_decode_cpu_per_request_benchmark() -> None:
+    """Decode CPU for a 500-resource dataset: the codec is never slower."""
+    body = _dataset_document(500)
+    stdlib = cpu_per_call(lambda: json.loads(body))
+    codec = cpu_per_call(lambda: json_codec.loads(body))
+
+    # Loose bound: equal backends differ only by timer noise
+    assert codec <= stdlib * 1.5 + 0.001
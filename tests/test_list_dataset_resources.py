@@ -0,0 +1,116 @@
+"""Unit tests for paginated resource listing (mocked HTTP, no live API)."""
+
+import re
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import datagouv_api_client
+from tests.tool_results import text
+from tools import register_tools
+
+_DATASET_URL = "https://www.data.gouv.fr/api/2/datasets/ds1/"
+_RESOURCES_URL = re.compile(
+    r"https://www\.data\.gouv\.fr/api/2/datasets/ds1/resources/.*"
+)
+
+
+def _resource(i: int, fmt: str = "csv") -> dict:
+    return {
+        "id": f"r{i}",
+        "title": f"Daily file {i}",
+        "format": fmt,
+        "filesize": 2048,
+        "url": f"https://static.data.gouv.fr/{i}.{fmt}",
+        "checksum": {"type": "sha1", "value": "x" * 40},
+        "extras": {"analysis:parsing:finished_at": "2025-01-01"},
+    }
+
+
+async def _call(arguments: dict) -> str:
+    app = FastMCP()
+    register_tools(app)
+    return text(await app.call_tool("list_dataset_resources", arguments))
+
+
+@pytest.mark.asyncio
+async def test_list_dataset_resources_trims_and_forwards_filters(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(
+        url=_RESOURCES_URL,
+        json={"data": [_resource(1)], "page": 2, "page_size": 1, "total": 3},
+    )
+
+    result = await datagouv_api_client.list_dataset_resources(
+        "ds1", page=2, page_size=500, resource_type="main", query="daily"
+    )
+
+    assert result["data"] == [
+        {
+            "id": "r1",
+            "title": "Daily file 1",
+            "format": "csv",
+            "filesize": 2048,
+            "url": "https://static.data.gouv.fr/1.csv",
+        }
+    ]
+    assert result["total"] == 3
+    params = httpx_mock.get_requests()[0].url.params
+    assert params["page"] == "2"
+    assert params["page_size"] == "100"
+    assert params["type"] == "main"
+    assert params["q"] == "daily"
+
+
+@pytest.mark.asyncio
+async def test_tool_shows_totals_and_next_page_hint(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=_DATASET_URL,
+        json={"id": "ds1", "title": "Big dataset", "resources": {"total": 1500}},
+    )
+    httpx_mock.add_response(
+        url=_RESOURCES_URL,
+        json={
+            "data": [_resource(3), _resource(4, "json")],
+            "page": 2,
+            "page_size": 2,
+            "total": 5,
+            "next_page": "https://www.data.gouv.fr/api/2/datasets/ds1/resources/?page=3",
+        },
+    )
+
+    text = await _call(
+        {
+            "dataset_id": "ds1",
+            "page": 2,
+            "page_size": 2,
+            "type": "main",
+            "format": "CSV",
+        }
+    )
+
+    assert "Resources matching type=main: 5 (out of 1500)" in text
+    assert "Page 2 of 3" in text
+    assert "1 of the 2 resources on this page have format csv." in text
+    # Numbering continues across pages
+    assert "3. Daily file 3" in text
+    assert "Daily file 4" not in text
+    assert "Size: 2.0 KB" in text
+    assert text.endswith("More resources available. Use page=3 to see the next 2.")
+
+
+@pytest.mark.asyncio
+async def test_tool_reports_empty_dataset(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=_DATASET_URL, json={"id": "ds1", "title": "Empty", "resources": {}}
+    )
+    httpx_mock.add_response(
+        url=_RESOURCES_URL, json={"data": [], "page": 1, "page_size": 50, "total": 0}
+    )
+
+    text = await _call({"dataset_id": "ds1"})
+
+    assert "Total resources: 0" in text
+    assert text.endswith("This dataset has no resources.")
@@ -0,0 +1,100 @@
+import json
+import logging
+import queue
+import sys
+
+from helpers import logging as logging_helpers
+from helpers.logging import (
+    JsonFormatter,
+    SamplingFilter,
+    bind_request_id,
+    parse_sampling_rates,
+    request_id_from_header,
+    reset_request_id,
+)
+
+
+def _record(name: str = "mcp.main", level: int = logging.INFO, msg: str = "hello"):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def test_queue_handler_stamps_request_context():
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging_helpers._ContextQueueHandler(log_queue)
+    record = logging.LogRecord(
+        "mcp.main", logging.INFO, __file__, 1, "fetched %d rows", (3,), None
+    )
+
+    token = bind_request_id("req-123")
+    try:
+        handler.handle(record)
+    finally:
+        reset_request_id(token)
+
+    queued = log_queue.get_nowait()
+    assert queued.getMessage() == "fetched 3 rows"
+    assert queued.request_id == "req-123"
+    assert queued.tool == "-"
+
+
+def test_queue_handler_keeps_exception_text_apart():
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging_helpers._ContextQueueHandler(log_queue)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.LogRecord(
+            "mcp.main",
+            logging.ERROR,
+            __file__,
+            1,
+            "failed",
+            None,
+            sys.exc_info(),
+        )
+    handler.handle(record)
+
+    payload = json.loads(JsonFormatter().format(log_queue.get_nowait()))
+    assert payload["message"] == "failed"
+    assert "ValueError: boom" in payload["exception"]
+
+
+def test_json_formatter_outputs_one_object_per_record():
+    record = _record(msg="tool done")
+    record.request_id = "abc"
+    record.tool = "search_datasets"
+
+    line = JsonFormatter().format(record)
+
+    assert "\n" not in line
+    payload = json.loads(line)
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "mcp.main"
+    assert payload["message"] == "tool done"
+    assert payload["request_id"] == "abc"
+    assert payload["tool"] == "search_datasets"
+    assert payload["timestamp"].endswith("Z")
+
+
+def test_sampling_filter_drops_low_severity_records_only():
+    sampling = SamplingFilter({"mcp.main.tabular_api": 0.0})
+
+    assert not sampling.filter(_record("mcp.main.tabular_api"))
+    assert not sampling.filter(_record("mcp.main.tabular_api.child"))
+    assert sampling.filter(_record("mcp.main.tabular_api", level=logging.WARNING))
+    assert sampling.filter(_record("mcp.main"))
+    assert sampling.filter(_record("mcp.tools"))
+
+
+def test_parse_sampling_rates_ignores_malformed_entries():
+    assert parse_sampling_rates(
+        "mcp.main.tabular_api=0.1, mcp.tools=2, broken, other=abc"
+    ) == {"mcp.main.tabular_api": 0.1, "mcp.tools": 1.0}
+
+
+def test_request_id_from_header():
+    assert request_id_from_header("client-42") == "client-42"
+    generated = request_id_from_header("bad id\nwith newline")
+    assert generated != "bad id\nwith newline"
+    assert len(generated) == 32
+    assert len(request_id_from_header(None)) == 32
@@ -0,0 +1,135 @@
+"""Unit tests for streamed metrics CSV aggregation (mocked HTTP, no live API)."""
+
+import re
+
+import httpx
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import metrics_api_client, upstream
+from helpers.metrics_aggregation import MonthlyAggregator, iter_csv_rows
+from tests import tool_results
+from tools import register_tools
+
+_CSV_URL = re.compile(r"https://metric-api\.data\.gouv\.fr/api/\w+/data/csv/.*")
+
+
+async def _lines(*lines: str):
+    for line in lines:
+        yield line
+
+
+async def _collect(lines) -> list[dict[str, str]]:
+    return [row async for row in iter_csv_rows(lines)]
+
+
+def _csv(months: list[str], separator: str = ";") -> str:
+    header = separator.join(
+        ["dataset_id", "metric_month", "monthly_visit", "monthly_download_resource"]
+    )
+    rows = [
+        separator.join(["ds1", month, str(100 + i), str(10 + i)])
+        for i, month in enumerate(months)
+    ]
+    return "\n".join([header, *rows]) + "\n"
+
+
+@pytest.mark.asyncio
+async def test_iter_csv_rows_detects_delimiter_and_multiline_fields() -> None:
+    rows = await _collect(
+        _lines('id;title;"count"', '1;"first;', 'line";3', "", "2;plain;4")
+    )
+    assert rows == [
+        {"id": "1", "title": "first;\nline", "count": "3"},
+        {"id": "2", "title": "plain", "count": "4"},
+    ]
+
+    rows = await _collect(_lines("a,b", "1,2"))
+    assert rows == [{"a": "1", "b": "2"}]
+
+
+def test_aggregator_totals_moving_average_and_year_over_year() -> None:
+    aggregator = MonthlyAggregator(["visits"])
+    for month, visits in [
+        ("2024-03", 50),
+        ("2024-12", 10),
+        ("2025-01", 20),
+        ("2025-01", 10),
+        ("2025-02", "60.0"),
+        ("2025-03", "75"),
+        ("", 1000),
+    ]:
+        aggregator.add({"metric_month": month, "visits": str(visits)})
+
+    assert aggregator.rows == 6
+    assert aggregator.months() == [
+        "2025-03",
+        "2025-02",
+        "2025-01",
+        "2024-12",
+        "2024-03",
+    ]
+    assert aggregator.total("2025-01", "visits") == 30
+    assert aggregator.grand_total("visits") == 225
+    assert aggregator.moving_average("2025-02", "visits") == pytest.approx(100 / 3)
+    # 2024-11 is missing: not enough months for a 3-month window
+    assert aggregator.moving_average("2025-01", "visits") is None
+    assert aggregator.year_over_year("2025-03", "visits") == pytest.approx(0.5)
+    assert aggregator.year_over_year("2025-02", "visits") is None
+
+
+@pytest.mark.asyncio
+async def test_aggregate_metrics_csv_streams_export(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_CSV_URL, text=_csv(["2025-02", "2025-01"]))
+
+    aggregator = await metrics_api_client.aggregate_metrics_csv(
+        "datasets", "ds1", ["monthly_visit"]
+    )
+
+    assert aggregator.months() == ["2025-02", "2025-01"]
+    assert aggregator.grand_total("monthly_visit") == 201
+    request = httpx_mock.get_requests()[0]
+    assert request.url.params["dataset_id__exact"] == "ds1"
+
+
+@pytest.mark.asyncio
+async def test_stream_retries_before_yielding(httpx_mock: HTTPXMock) -> None:
+    upstream.reset_state()
+    httpx_mock.add_response(url=_CSV_URL, status_code=503, headers={"Retry-After": "0"})
+    httpx_mock.add_response(url=_CSV_URL, text=_csv(["2025-01"], separator=","))
+
+    async with httpx.AsyncClient() as client:
+        async with upstream.stream(
+            client,
+            "https://metric-api.data.gouv.fr/api/datasets/data/csv/",
+            upstream="metrics_api",
+        ) as resp:
+            rows = await _collect(resp.aiter_lines())
+
+    assert resp.status_code == 200
+    assert rows[0]["monthly_visit"] == "100"
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_full_history(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/.*"),
+        json={"id": "ds1", "title": "Test dataset"},
+    )
+    months = ["2025-03", "2025-02", "2025-01", "2024-12", "2024-03"]
+    httpx_mock.add_response(url=_CSV_URL, text=_csv(months))
+    app = FastMCP()
+    register_tools(app)
+
+    result = await app.call_tool(
+        "get_metrics", {"dataset_id": "ds1", "full_history": True}
+    )
+    text = tool_results.text(result)
+
+    assert "Full history: 5 months (2024-03 to 2025-03)" in text
+    # 2025-03: 100 visits, averaging 100/101/102, down 4% from 104 in 2024-03
+    assert re.search(r"2025-03\s+100\s+101\s+-4%\s+10\s+11\s+-29%", text)
+    assert re.search(r"2024-03\s+104\s+-\s+-", text)
+    assert re.search(r"Total\s+510\s+60", text)
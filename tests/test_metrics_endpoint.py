@@ -0,0 +1,88 @@
+"""Tests for the Prometheus /metrics endpoint and instrumentation."""
+
+import httpx
+import pytest
+from httpx import ASGITransport, AsyncClient
+from pytest_httpx import HTTPXMock
+
+from helpers import prometheus, tabular_api_client, upstream
+from helpers.logging import log_tool
+from main import asgi_app
+
+
+def test_histogram_renders_cumulative_buckets(monkeypatch) -> None:
+    # Register the test histogram in a throwaway registry, not the served one
+    monkeypatch.setattr(prometheus, "_REGISTRY", [])
+    hist = prometheus.Histogram(
+        "test_render_seconds", "Test histogram.", ("op",), buckets=(0.1, 1.0)
+    )
+    hist.observe(0.05, op="a")
+    hist.observe(0.5, op="a")
+    rendered = hist.render()
+
+    assert "# TYPE test_render_seconds histogram" in rendered
+    assert 'test_render_seconds_bucket{op="a",le="0.1"} 1' in rendered
+    assert 'test_render_seconds_bucket{op="a",le="1.0"} 2' in rendered
+    assert 'test_render_seconds_bucket{op="a",le="+Inf"} 2' in rendered
+    assert 'test_render_seconds_count{op="a"} 2' in rendered
+    assert prometheus._REGISTRY == [hist]
+
+
+def test_metric_rejects_unknown_labels() -> None:
+    with pytest.raises(ValueError):
+        prometheus.TOOL_CALLS.inc(tool="x", extra="y")
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_and_errors_are_counted() -> None:
+    @log_tool
+    async def flaky_tool() -> str:
+        try:
+            raise tabular_api_client.TabularApiRequestError("boom")
+        except tabular_api_client.TabularApiRequestError as e:
+            prometheus.record_tool_error(e)
+            return "Error"
+
+    await flaky_tool()
+
+    assert prometheus.TOOL_CALLS.value(tool="flaky_tool") == 1
+    assert prometheus.TOOL_DURATION.count(tool="flaky_tool") == 1
+    assert prometheus.TOOLS_IN_FLIGHT.value(tool="flaky_tool") == 0
+    assert (
+        prometheus.TOOL_ERRORS.value(
+            tool="flaky_tool", error_type="TabularApiRequestError"
+        )
+        == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_upstream_latency_is_recorded_by_status(httpx_mock: HTTPXMock) -> None:
+    upstream.reset_state()
+    httpx_mock.add_response(url="https://metrics-test.example/", status_code=404)
+    before = prometheus.UPSTREAM_REQUEST_DURATION.count(
+        upstream="metrics_test", status=404
+    )
+
+    async with httpx.AsyncClient() as client:
+        await upstream.get(
+            client, "https://metrics-test.example/", upstream="metrics_test"
+        )
+
+    after = prometheus.UPSTREAM_REQUEST_DURATION.count(
+        upstream="metrics_test", status=404
+    )
+    assert after == before + 1
+    assert prometheus.UPSTREAM_REQUESTS_IN_FLIGHT.value(upstream="metrics_test") == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text() -> None:
+    transport = ASGITransport(app=asgi_app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE mcp_tool_calls_total counter" in response.text
+    assert "# TYPE upstream_request_duration_seconds histogram" in response.text
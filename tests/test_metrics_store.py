@@ -0,0 +1,156 @@
+"""Unit tests for the closed-month metrics store (mocked HTTP, no live API)."""
+
+import asyncio
+import json
+import threading
+from datetime import date
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import metrics_api_client, metrics_store
+
+# Keep the real helpers: the fixture below pins them to a fixed date
+_first_open_month = metrics_store.first_open_month
+_latest_closed_month = metrics_store.latest_closed_month
+
+
+@pytest.fixture(autouse=True)
+def clean_store(monkeypatch) -> None:
+    metrics_store.clear()
+    monkeypatch.setattr(metrics_store, "CACHE_PATH", None)
+    monkeypatch.setattr(metrics_store, "latest_closed_month", lambda: "2025-03")
+    monkeypatch.setattr(metrics_store, "first_open_month", lambda: "2025-04")
+
+
+def _records(months: list[str]) -> list[dict]:
+    return [
+        {"dataset_id": "ds1", "metric_month": m, "monthly_visit": i}
+        for i, m in enumerate(months)
+    ]
+
+
+def _history(count: int) -> list[str]:
+    """`count` months ending at 2025-05, most recent first."""
+    months = []
+    year, month = 2025, 5
+    for _ in range(count):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+
+@pytest.mark.parametrize(
+    "today, first_open, latest_closed",
+    [
+        (date(2025, 5, 10), "2025-04", "2025-03"),
+        (date(2025, 1, 31), "2024-12", "2024-11"),
+        (date(2025, 2, 1), "2025-01", "2024-12"),
+    ],
+)
+def test_month_helpers(today, first_open, latest_closed) -> None:
+    assert _first_open_month(today) == first_open
+    assert _latest_closed_month(today) == latest_closed
+
+
+@pytest.mark.asyncio
+async def test_closed_months_are_served_from_the_store(httpx_mock: HTTPXMock) -> None:
+    history = _history(20)
+    httpx_mock.add_response(json={"data": _records(history)})
+    httpx_mock.add_response(json={"data": _records(history[:2])})
+
+    first = await metrics_api_client.get_metrics("datasets", "ds1", limit=12)
+    second = await metrics_api_client.get_metrics("datasets", "ds1", limit=12)
+
+    assert [r["metric_month"] for r in first] == history[:12]
+    assert [r["metric_month"] for r in second] == history[:12]
+    requests = httpx_mock.get_requests()
+    assert requests[0].url.params["page_size"] == "50"
+    # Second call only asks for the open months
+    assert requests[1].url.params["page_size"] == str(metrics_store.OPEN_MONTHS)
+
+
+@pytest.mark.asyncio
+async def test_ascending_query_uses_store_when_history_is_complete(
+    httpx_mock: HTTPXMock,
+) -> None:
+    history = _history(20)
+    httpx_mock.add_response(json={"data": _records(history)})
+
+    await metrics_api_client.get_metrics("datasets", "ds1", limit=12)
+    oldest = await metrics_api_client.get_metrics(
+        "datasets", "ds1", limit=3, sort_order="asc"
+    )
+
+    assert [r["metric_month"] for r in oldest] == history[::-1][:3]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_is_refreshed_when_a_month_closes(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    history = _history(5)
+    httpx_mock.add_response(json={"data": _records(history)}, is_reusable=True)
+
+    await metrics_api_client.get_metrics("datasets", "ds1", limit=5)
+    monkeypatch.setattr(metrics_store, "latest_closed_month", lambda: "2025-04")
+    monkeypatch.setattr(metrics_store, "first_open_month", lambda: "2025-05")
+    await metrics_api_client.get_metrics("datasets", "ds1", limit=5)
+
+    requests = httpx_mock.get_requests()
+    assert [r.url.params["page_size"] for r in requests] == ["50", "50"]
+
+
+@pytest.mark.asyncio
+async def test_store_is_persisted_to_disk(
+    httpx_mock: HTTPXMock, monkeypatch, tmp_path
+) -> None:
+    path = tmp_path / "metrics.json"
+    monkeypatch.setattr(metrics_store, "CACHE_PATH", str(path))
+    monkeypatch.setattr(metrics_store, "SAVE_DELAY_SECONDS", 0.0)
+    history = _history(4)
+    httpx_mock.add_response(json={"data": _records(history)})
+
+    await metrics_api_client.get_metrics("datasets", "ds1", limit=4)
+    assert metrics_store._save_task is not None
+    await metrics_store._save_task
+
+    saved = json.loads(path.read_text())
+    (entry,) = saved.values()
+    assert entry["closed_through"] == "2025-03"
+    assert entry["exhausted"] is True
+    assert [r["metric_month"] for r in entry["records"]] == history[2:]
+
+    metrics_store.clear()
+    httpx_mock.add_response(json={"data": _records(history[:2])})
+    reloaded = await metrics_api_client.get_metrics("datasets", "ds1", limit=4)
+    assert [r["metric_month"] for r in reloaded] == history
+    assert httpx_mock.get_requests()[-1].url.params["page_size"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_cache_file_is_read_once_off_the_event_loop(
+    monkeypatch, tmp_path
+) -> None:
+    path = tmp_path / "metrics.json"
+    path.write_text(
+        json.dumps(
+            {"k": {"closed_through": "2025-03", "records": [], "exhausted": True}}
+        )
+    )
+    monkeypatch.setattr(metrics_store, "CACHE_PATH", str(path))
+    threads: list[str] = []
+    read = metrics_store._read
+
+    def spy(path: str) -> dict[str, metrics_store.MonthlyEntry]:
+        threads.append(threading.current_thread().name)
+        return read(path)
+
+    monkeypatch.setattr(metrics_store, "_read", spy)
+
+    entries = await asyncio.gather(metrics_store.get("k"), metrics_store.get("k"))
+
+    assert all(entry is not None and entry.exhausted for entry in entries)
+    assert len(threads) == 1
+    assert threads[0].startswith("cpu-worker")
@@ -0,0 +1,120 @@
+"""Unit tests for helpers.models."""
+
+import dataclasses
+
+import pytest
+
+from helpers.models import Dataservice, Dataset, Resource, TabularPage, format_filesize
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (None, None),
+        (0, None),
+        (True, None),
+        ("1024", None),
+        (512, "512 B"),
+        (1536, "1.5 KB"),
+        (5 * 1024 * 1024, "5.0 MB"),
+        (3 * 1024**3, "3.0 GB"),
+    ],
+)
+def test_format_filesize(size, expected) -> None:
+    assert format_filesize(size) == expected
+
+
+def test_dataset_resources_total_from_v1_and_v2_payloads() -> None:
+    v1 = Dataset.from_api({"id": "ds1", "resources": [{"id": "a"}, {"id": "b"}]})
+    v2 = Dataset.from_api(
+        {
+            "id": "ds1",
+            "title": "Titre",
+            "organization": {"id": "org1", "name": "Org"},
+            "resources": {"rel": "subsection", "total": 12},
+            "tags": ["transport", "bus"],
+        }
+    )
+
+    assert v1.resources_total == 2
+    assert v1.title == "Unknown"
+    assert v2.resources_total == 12
+    assert v2.organization is not None and v2.organization.name == "Org"
+    assert v2.tags == ("transport", "bus")
+
+
+def test_models_are_slotted_and_frozen() -> None:
+    dataset = Dataset.from_api({"id": "ds1", "title": "T", "extras": {"a": 1}})
+
+    assert not hasattr(dataset, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        dataset.title = "Other"  # type: ignore[misc]
+
+
+def test_resource_title_falls_back_to_name() -> None:
+    resource = Resource.from_api(
+        {"id": "r1", "name": "fichier.csv", "filesize": 2048}, dataset_id=42
+    )
+
+    assert resource.title == "fichier.csv"
+    assert resource.size_label == "2.0 KB"
+    assert resource.dataset_id == "42"
+
+
+def test_dataservice_datasets_total() -> None:
+    dataservice = Dataservice.from_api(
+        {"id": "api1", "title": "API", "datasets": {"total": 3}}
+    )
+
+    assert dataservice.datasets_total == 3
+    assert dataservice.organization is None
+
+
+@pytest.mark.parametrize(
+    ("model", "payload"),
+    [
+        (
+            Dataset,
+            {
+                "id": "ds1",
+                "title": "Titre",
+                "organization": {"id": "org1", "name": "Org", "badges": []},
+                "resources": {"rel": "subsection", "total": 12},
+                "tags": ["bus"],
+                "harvest": {"remote_id": "x"},
+            },
+        ),
+        (Dataset, {"id": "ds1"}),
+        (Dataservice, {"id": "api1", "title": "API", "datasets": {"total": 3}}),
+    ],
+)
+def test_to_api_round_trips(model, payload) -> None:
+    instance = model.from_api(payload)
+
+    assert model.from_api(instance.to_api()) == instance
+    assert "harvest" not in instance.to_api()
+
+
+def test_tabular_page() -> None:
+    page = TabularPage.from_api(
+        {
+            "data": [{"a": 1, "b": 2}],
+            "meta": {"page_size": 20, "total": 41},
+            "links": {"next": "https://tabular-api.data.gouv.fr/...?page=3"},
+        },
+        page=2,
+    )
+
+    assert page.page == 2
+    assert page.columns == ["a", "b"]
+    assert page.total_pages == 3
+    assert page.has_next
+
+
+def test_empty_tabular_page() -> None:
+    page = TabularPage.from_api({}, page=1)
+
+    assert page.rows == []
+    assert page.columns == []
+    assert page.total_pages is None
+    assert not page.has_next
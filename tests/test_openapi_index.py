@@ -0,0 +1,166 @@
+"""Unit tests for the OpenAPI spec index and the paginated spec tool (mocked HTTP)."""
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import openapi_spec_cache
+from helpers.openapi_index import build_index
+from tests import tool_results
+from tools import register_tools
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Geo API", "version": "2.0"},
+    "servers": [{"url": "https://geo.example.gouv.fr"}],
+    "components": {
+        "parameters": {
+            "Code": {
+                "name": "code",
+                "in": "path",
+                "required": True,
+                "schema": {"type": "string"},
+            }
+        },
+        "schemas": {"Format": {"type": "string", "enum": ["json", "geojson"]}},
+    },
+    "paths": {
+        "/communes": {
+            "get": {
+                "tags": ["Communes"],
+                "summary": "Search communes by name or postal code",
+                "parameters": [
+                    {"name": "nom", "in": "query", "schema": {"type": "string"}},
+                    {
+                        "name": "format",
+                        "in": "query",
+                        "schema": {"$ref": "#/components/schemas/Format"},
+                    },
+                ],
+            }
+        },
+        "/communes/{code}": {
+            "parameters": [{"$ref": "#/components/parameters/Code"}],
+            "get": {"tags": ["Communes"], "summary": "Get one commune"},
+        },
+        "/departements": {
+            "get": {"tags": ["Departements"], "summary": "List departements"},
+            "post": {"tags": ["Departements"], "summary": "Create a departement"},
+        },
+    },
+}
+
+
+def test_build_index_flattens_operations_and_resolves_refs() -> None:
+    index = build_index(SPEC)
+
+    assert [(op.method, op.path) for op in index.operations] == [
+        ("get", "/communes"),
+        ("get", "/communes/{code}"),
+        ("get", "/departements"),
+        ("post", "/departements"),
+    ]
+    assert index.tag_counts == {"Communes": 2, "Departements": 2}
+    commune = index.operations[1]
+    assert commune.parameters == [
+        {"name": "code", "in": "path", "type": "string", "required": True}
+    ]
+    search_params = index.operations[0].parameters
+    assert search_params[1]["type"] == "string enum: json, geojson"
+
+
+def test_search_filters_combine() -> None:
+    index = build_index(SPEC)
+
+    assert [op.path for op in index.search(query="postal CODE")] == ["/communes"]
+    assert [op.path for op in index.search(path_prefix="/communes/")] == [
+        "/communes/{code}"
+    ]
+    assert len(index.search(tag="departements")) == 2
+    assert [op.method for op in index.search(tag="Departements", method="POST")] == [
+        "post"
+    ]
+    assert index.search(query="nothing-like-this") == []
+
+
+def test_build_index_tolerates_malformed_specs() -> None:
+    index = build_index(
+        {"paths": {"/a": {"get": "oops", "x-extra": {}}, "/b": None, "/c": {}}}
+    )
+    assert index.operations == []
+    assert build_index({}).operations == []
+
+
+@pytest.fixture
+def mcp() -> FastMCP:
+    openapi_spec_cache.clear_cache()
+    app = FastMCP()
+    register_tools(app)
+    return app
+
+
+def _mock_dataservice(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/1/dataservices/ds1/",
+        json={
+            "title": "Geo API",
+            "machine_documentation_url": "https://geo.example.gouv.fr/openapi.json",
+            "base_api_url": "https://geo.example.gouv.fr",
+        },
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        url="https://geo.example.gouv.fr/openapi.json", json=SPEC, is_reusable=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_spec_tool_paginates_endpoints(
+    mcp: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    _mock_dataservice(httpx_mock)
+
+    result = await mcp.call_tool(
+        "get_dataservice_openapi_spec", {"dataservice_id": "ds1", "page_size": 3}
+    )
+    text = tool_results.text(result)
+
+    assert "API: Geo API" in text
+    assert "Tags: Communes (2), Departements (2)" in text
+    assert "Endpoints 1-3 of 4:" in text
+    assert "POST /departements" not in text
+    assert "Use page=2" in text
+
+    result = await mcp.call_tool(
+        "get_dataservice_openapi_spec",
+        {"dataservice_id": "ds1", "page": 2, "page_size": 3},
+    )
+    text = tool_results.text(result)
+    assert "Endpoints 4-4 of 4:" in text
+    assert "POST /departements" in text
+    assert "Use page=" not in text
+    # The spec was downloaded once and served from the cache afterwards
+    spec_requests = [
+        r for r in httpx_mock.get_requests() if r.url.host == "geo.example.gouv.fr"
+    ]
+    assert len(spec_requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_spec_tool_search(mcp: FastMCP, httpx_mock: HTTPXMock) -> None:
+    _mock_dataservice(httpx_mock)
+
+    result = await mcp.call_tool(
+        "get_dataservice_openapi_spec", {"dataservice_id": "ds1", "query": "postal"}
+    )
+    text = tool_results.text(result)
+
+    assert "Endpoints 1-1 of 1 matching query='postal' (4 in total):" in text
+    assert "GET /communes" in text
+    assert "- nom [query, string]" in text
+    assert "/departements" not in text.split("Endpoints")[1]
+
+    result = await mcp.call_tool(
+        "get_dataservice_openapi_spec", {"dataservice_id": "ds1", "tag": "unknown"}
+    )
+    assert "No endpoints found" in tool_results.text(result)
@@ -0,0 +1,132 @@
+"""Unit tests for the OpenAPI spec cache (mocked HTTP, no live API)."""
+
+import asyncio
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import openapi_spec_cache, upstream
+
+_URL = "https://api.example.gouv.fr/openapi.yaml"
+_SPEC_YAML = """
+openapi: 3.0.0
+info:
+  title: Example API
+  version: "1.0"
+paths:
+  /items:
+    get:
+      summary: List items
+"""
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch) -> None:
+    openapi_spec_cache.clear_cache()
+    upstream.reset_state()
+    monkeypatch.setattr(upstream, "RETRY_BASE_DELAY", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_get_spec_caches_parsed_document(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, text=_SPEC_YAML)
+
+    first = await openapi_spec_cache.get_spec(_URL)
+    first.summary = "summary"
+    second = await openapi_spec_cache.get_spec(_URL)
+
+    assert second is first
+    assert second.spec["info"]["title"] == "Example API"
+    assert second.summary == "summary"
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_download(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, text=_SPEC_YAML)
+
+    results = await asyncio.gather(
+        *(openapi_spec_cache.get_spec(_URL) for _ in range(5))
+    )
+
+    assert all(result is results[0] for result in results)
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_revalidated_with_etag(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    httpx_mock.add_response(
+        url=_URL,
+        text=_SPEC_YAML,
+        headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+    httpx_mock.add_response(url=_URL, status_code=304)
+
+    first = await openapi_spec_cache.get_spec(_URL)
+    first.summary = "summary"
+    monkeypatch.setattr(openapi_spec_cache, "CACHE_TTL_SECONDS", 0.0)
+    second = await openapi_spec_cache.get_spec(_URL)
+
+    assert second is first
+    assert second.summary == "summary"
+    revalidation = httpx_mock.get_requests()[1]
+    assert revalidation.headers["If-None-Match"] == '"v1"'
+    assert revalidation.headers["If-Modified-Since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_served_when_revalidation_fails(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    httpx_mock.add_response(url=_URL, text=_SPEC_YAML)
+    httpx_mock.add_exception(httpx.ConnectError("down"), url=_URL, is_reusable=True)
+
+    first = await openapi_spec_cache.get_spec(_URL)
+    monkeypatch.setattr(openapi_spec_cache, "CACHE_TTL_SECONDS", 0.0)
+
+    assert await openapi_spec_cache.get_spec(_URL) is first
+
+
+@pytest.mark.asyncio
+async def test_failed_revalidation_is_retried_after_a_delay(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(url=_URL, text=_SPEC_YAML)
+    httpx_mock.add_exception(httpx.ConnectError("down"), url=_URL, is_reusable=True)
+    first = await openapi_spec_cache.get_spec(_URL)
+    first.fetched_at -= openapi_spec_cache.CACHE_TTL_SECONDS + 1
+
+    assert await openapi_spec_cache.get_spec(_URL) is first
+    attempts = len(httpx_mock.get_requests())
+    assert await openapi_spec_cache.get_spec(_URL) is first
+    assert len(httpx_mock.get_requests()) == attempts
+
+    first.fetched_at -= openapi_spec_cache.REVALIDATE_RETRY_SECONDS
+    assert await openapi_spec_cache.get_spec(_URL) is first
+    assert len(httpx_mock.get_requests()) > attempts
+
+
+@pytest.mark.asyncio
+async def test_oversized_spec_is_rejected(httpx_mock: HTTPXMock, monkeypatch) -> None:
+    monkeypatch.setattr(openapi_spec_cache, "OPENAPI_SPEC_MAX_BYTES", 64)
+    httpx_mock.add_response(url=_URL, text=_SPEC_YAML * 10)
+
+    with pytest.raises(upstream.ResponseTooLargeError):
+        await openapi_spec_cache.get_spec(_URL)
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_entry_is_evicted(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    monkeypatch.setattr(openapi_spec_cache, "CACHE_MAX_ENTRIES", 2)
+    httpx_mock.add_response(text=_SPEC_YAML, is_reusable=True)
+    urls = [f"https://api.example.gouv.fr/{name}.yaml" for name in ("a", "b", "c")]
+
+    for url in urls:
+        await openapi_spec_cache.get_spec(url)
+
+    assert list(openapi_spec_cache._cache) == urls[1:]
@@ -0,0 +1,91 @@
+"""Unit tests for the get_organization_metrics tool (mocked HTTP, no live API)."""
+
+import re
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+_ORG_URL = re.compile(r"https://www\.data\.gouv\.fr/api/1/organizations/.*")
+_ORG_METRICS_URL = re.compile(
+    r"https://metric-api\.data\.gouv\.fr/api/organizations/data/.*"
+)
+_DATASET_METRICS_URL = re.compile(
+    r"https://metric-api\.data\.gouv\.fr/api/datasets/data/.*"
+)
+
+
+pytestmark = pytest.mark.usefixtures("fixed_months")
+
+
+@pytest.mark.asyncio
+async def test_organization_metrics_summary(tool_text, httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=_ORG_URL,
+        json={
+            "id": "org1",
+            "name": "Institut national",
+            "acronym": "IN",
+            "metrics": {"datasets": 42, "reuses": 7, "followers": 3},
+        },
+    )
+    httpx_mock.add_response(
+        url=_ORG_METRICS_URL,
+        json={
+            "data": [
+                {
+                    "organization_id": "org1",
+                    "metric_month": "2025-04",
+                    "monthly_visit_dataset": 1200,
+                    "monthly_download_resource": 300,
+                },
+                {
+                    "organization_id": "org1",
+                    "metric_month": "2025-03",
+                    "monthly_visit_dataset": 800,
+                    "monthly_download_resource": 100,
+                },
+            ]
+        },
+    )
+    httpx_mock.add_response(
+        url=_DATASET_METRICS_URL,
+        json={
+            "data": [
+                {"dataset_id": "ds-big", "monthly_visit": 500},
+                {"dataset_id": "ds-small", "monthly_visit": 20},
+            ]
+        },
+    )
+
+    text = await tool_text(
+        "get_organization_metrics",
+        {"organization": "institut-national", "months": 2, "top": 2},
+    )
+
+    assert "Organization Metrics: Institut national (IN)" in text
+    assert "Catalog: datasets=42, reuses=7, followers=3" in text
+    # Reuse visits are absent from every record: the column is dropped
+    assert "Reuse visits" not in text
+    assert re.search(r"Total\s+2,000\s+400", text)
+    assert re.search(r"1\s+ds-big\s+500\s+0", text)
+    assert "Top 2 dataset(s) by visits in 2025-03" in text
+
+    org_request, *metric_requests = httpx_mock.get_requests()
+    assert org_request.url.path.endswith("/organizations/institut-national/")
+    top_request = next(r for r in metric_requests if "datasets" in r.url.path)
+    assert top_request.url.params["organization_id__exact"] == "org1"
+    assert top_request.url.params["metric_month__exact"] == "2025-03"
+    assert top_request.url.params["monthly_visit__sort"] == "desc"
+    assert top_request.url.params["page_size"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_organization_metrics_unknown_organization(
+    tool_text,
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(url=_ORG_URL, status_code=404, json={"message": "nope"})
+
+    text = await tool_text("get_organization_metrics", {"organization": "missing"})
+
+    assert text == "Error: Organization 'missing' not found."
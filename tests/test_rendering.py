@@ -0,0 +1,167 @@
+"""Unit tests and microbenchmarks for helpers.rendering."""
+
+import json
+import re
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import rendering
+from tests import tool_results
+from tests.benchmark import cpu_per_call
+from tools import register_tools
+
+
+def _size(text: str) -> int:
+    return len(text.encode())
+
+
+def test_render_within_budget_is_unchanged() -> None:
+    parts = ["Title", "", "Description: é" * 10]
+
+    assert rendering.render(parts, budget=4096) == "\n".join(parts)
+
+
+def test_render_truncates_long_lines_proportionally() -> None:
+    parts = ["ID: abc", "A: " + "a" * 3000, "B: " + "b" * 6000, "Total: 3"]
+
+    text = rendering.render(parts, budget=4096)
+    lines = text.split("\n")
+
+    assert _size(text) <= 4096
+    # Short lines are kept whole, long ones give up the same share of their excess
+    assert lines[0] == "ID: abc"
+    assert lines[3] == "Total: 3"
+    assert lines[1].endswith("...") and lines[2].endswith("...")
+    a_ratio = (len(lines[1]) - 80) / (len(parts[1]) - 80)
+    b_ratio = (len(lines[2]) - 80) / (len(parts[2]) - 80)
+    assert a_ratio == pytest.approx(b_ratio, rel=0.01)
+    assert lines[-1].startswith("[Output truncated to 4,096 bytes.")
+
+
+def test_render_drops_trailing_lines_when_needed() -> None:
+    parts = [f"Row {i}: " + "x" * 200 for i in range(500)]
+
+    text = rendering.render(
+        parts, budget=2048, continuation={"page": 3, "page_size": 5}
+    )
+
+    assert _size(text) <= 2048
+    assert text.startswith("Row 0: ")
+    hint = text.split("\n")[-1]
+    assert re.match(r"\[Output truncated to 2,048 bytes, \d+ line\(s\) omitted\.", hint)
+    assert hint.endswith("To see the rest, call again with page=3, page_size=5.]")
+
+
+def test_render_never_splits_multibyte_characters() -> None:
+    parts: list[str] = ["Libellé: " + "é€" * 5000]
+
+    text = rendering.render(parts, budget=1024)
+
+    assert _size(text) <= 1024
+    assert "�" not in text
+    assert text.split("\n")[0].endswith("...")
+
+
+def test_shorten_and_join_limited() -> None:
+    assert rendering.shorten("abc", 5) == "abc"
+    assert rendering.shorten("abcdef", 3) == "abc..."
+    assert rendering.join_limited(["a", "b"], 5) == "a, b"
+    assert rendering.join_limited("abcdefg", 3) == "a, b, c, ... (+4 more)"
+
+
+@pytest.mark.parametrize(
+    ("page", "page_size", "expected"),
+    [
+        (1, 20, {"page": 1, "page_size": 10}),
+        (3, 20, {"page": 5, "page_size": 10}),
+        (2, 5, {"page": 3, "page_size": 2}),
+        (4, 1, {"page": 4, "page_size": 1}),
+    ],
+)
+def test_narrower_page_starts_at_or_before_the_same_row(
+    page: int, page_size: int, expected: dict[str, int]
+) -> None:
+    result = rendering.narrower_page(page, page_size)
+
+    assert result == expected
+    assert (result["page"] - 1) * result["page_size"] <= (page - 1) * page_size
+
+
+def test_parse_budgets() -> None:
+    assert rendering.parse_budgets(
+        "query_resource_data=131072, search_datasets=10,bad,x=y"
+    ) == {"query_resource_data": 131072, "search_datasets": rendering.MIN_BUDGET_BYTES}
+
+
+@pytest.mark.asyncio
+async def test_tool_output_respects_its_budget(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    monkeypatch.setattr(rendering, "TOOL_BUDGETS", {"search_datasets": 2048})
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/2/datasets/search/.*"),
+        json={
+            "data": [
+                {
+                    "id": f"ds{i}",
+                    "title": f"Jeu de données {i} " + "t" * 300,
+                    "description_short": "d" * 500,
+                    "tags": [f"tag{j}" for j in range(20)],
+                    "url": f"https://www.data.gouv.fr/datasets/ds{i}/",
+                }
+                for i in range(40)
+            ],
+            "total": 1000,
+            "page": 2,
+        },
+    )
+
+    app = FastMCP()
+    register_tools(app)
+    result = await app.call_tool(
+        "search_datasets", {"query": "budget", "page": 2, "page_size": 40}
+    )
+    text = tool_results.text(result)
+
+    assert _size(text) <= 2048
+    assert text.startswith("Found 1000 dataset(s) for query: 'budget'")
+    assert text.endswith("call again with page=3, page_size=20.]")
+
+
+@pytest.mark.benchmark
+def test_render_cpu_benchmark() -> None:
+    """Render CPU for a typical and an oversized response."""
+    typical = [f"  Row {i}:" for i in range(20)] + [
+        f"    column_{i}: value {i}" for i in range(400)
+    ]
+    oversized = [f"    column_{i}: " + "v" * 500 for i in range(2000)]
+
+    small = cpu_per_call(lambda: rendering.render(typical, budget=65536))
+    large = cpu_per_call(lambda: rendering.render(oversized, budget=65536))
+
+    # Loose bounds: rendering must stay negligible next to the upstream calls
+    assert small < 0.005
+    assert large < 0.05
+
+
+def test_fit_data_shortens_strings_then_drops_trailing_items() -> None:
+    data = {"id": "r1", "rows": [{"a": "x" * 3000, "b": i} for i in range(100)]}
+
+    fitted = rendering.fit_data(data, budget=4096, continuation={"page": 2})
+
+    assert _size(json.dumps(fitted)) <= 4096
+    assert fitted["id"] == "r1"
+    assert fitted["rows"][0] == {"a": "x" * 80 + "...", "b": 0}
+    assert fitted["truncated"] == {
+        "budget_bytes": 4096,
+        "omitted_items": 100 - len(fitted["rows"]),
+        "max_string_length": 80,
+        "continuation": {"page": 2},
+    }
+    # The input is left untouched
+    original = data["rows"][0]["a"]
+    assert isinstance(original, str)
+    assert len(data["rows"]) == 100 and len(original) == 3000
+    assert rendering.fit_data({"id": "r1"}, budget=4096) == {"id": "r1"}
@@ -0,0 +1,97 @@
+"""Tests for cancelling tool work when the HTTP client disconnects."""
+
+import asyncio
+
+import pytest
+from mcp.types import CallToolResult
+
+from helpers import prometheus, request_cancellation
+from helpers.logging import log_tool
+from main import with_monitoring
+from tests.tool_results import text
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_running_tool_and_fan_out() -> None:
+    started = asyncio.Event()
+    cancelled_children: list[str] = []
+
+    async def child(name: str) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled_children.append(name)
+            raise
+
+    @log_tool
+    async def slow_tool() -> str:
+        started.set()
+        await asyncio.gather(child("a"), child("b"))
+        return "done"
+
+    results: list[CallToolResult] = []
+
+    async def inner_app(scope, receive, send) -> None:
+        await receive()
+        results.append(await slow_tool())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    client_gone = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+
+    async def receive() -> dict:
+        if messages:
+            return messages.pop(0)
+        await client_gone.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        pass
+
+    cancelled = prometheus.TOOL_CALLS_CANCELLED
+    before = cancelled.value(tool="slow_tool", reason="disconnect")
+    app = with_monitoring(inner_app)
+    scope = {"type": "http", "path": "/mcp", "headers": []}
+    task = asyncio.create_task(app(scope, receive, send))
+    await started.wait()
+    client_gone.set()
+    await asyncio.wait_for(task, timeout=2)
+
+    assert [text(r) for r in results] == [
+        "Error: slow_tool was cancelled (client disconnected)."
+    ]
+    assert sorted(cancelled_children) == ["a", "b"]
+    assert cancelled.value(tool="slow_tool", reason="disconnect") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_tool_started_after_disconnect_is_cancelled_immediately() -> None:
+    @log_tool
+    async def late_tool() -> str:
+        await asyncio.sleep(10)
+        return "done"
+
+    cancellation, token = request_cancellation.bind()
+    try:
+        cancellation.cancel()
+        result = await asyncio.wait_for(late_tool(), timeout=2)
+    finally:
+        request_cancellation.reset(token)
+
+    assert result.isError
+    assert text(result) == ("Error: late_tool was cancelled (client disconnected).")
+
+
+@pytest.mark.asyncio
+async def test_completed_request_is_not_cancelled() -> None:
+    @log_tool
+    async def quick_tool() -> str:
+        return "done"
+
+    cancellation, token = request_cancellation.bind()
+    try:
+        assert await quick_tool() == "done"
+    finally:
+        request_cancellation.reset(token)
+    assert cancellation.disconnected is False
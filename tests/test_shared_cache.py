@@ -0,0 +1,381 @@
+"""Tests for helpers.shared_cache, against a local Redis-protocol stand-in."""
+
+import asyncio
+import json
+import re
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import crawler_api_client, datagouv_api_client, shared_cache
+from helpers.models import Dataset
+
+
+class FakeRedis:
+    """Just enough of a Redis server: AUTH, SELECT, PING, GET, SET [PX] [NX], DEL.
+
+    EVAL only runs the compare-and-delete script of shared_cache.
+    """
+
+    def __init__(self, password: str | None = None) -> None:
+        self.password = password
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.commands: list[list[bytes]] = []
+        self.delay = 0.0
+        self.server: asyncio.Server | None = None
+
+    @property
+    def url(self) -> str:
+        assert self.server is not None
+        port = self.server.sockets[0].getsockname()[1]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{port}/2"
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        header = await reader.readuntil(b"\r\n")
+        assert header[:1] == b"*"
+        args = []
+        for _ in range(int(header[1:-2])):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _execute(self, args: list[bytes], state: dict) -> bytes:
+        name = args[0].upper()
+        if name == b"AUTH":
+            state["auth"] = args[-1].decode() == self.password
+            return b"+OK\r\n" if state["auth"] else b"-WRONGPASS invalid password\r\n"
+        if self.password and not state.get("auth"):
+            return b"-NOAUTH Authentication required.\r\n"
+        if name in (b"SELECT", b"PING"):
+            return b"+OK\r\n"
+        now = time.monotonic()
+        if name == b"GET":
+            value, expires = self.data.get(args[1], (None, None))
+            if value is None or (expires is not None and expires <= now):
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            options = [a.upper() for a in args[3:]]
+            expires = None
+            if b"PX" in options:
+                expires = now + int(args[3 + options.index(b"PX") + 1]) / 1000
+            current = self.data.get(args[1])
+            live = current is not None and (current[1] is None or current[1] > now)
+            if b"NX" in options and live:
+                return b"$-1\r\n"
+            self.data[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if name == b"DEL":
+            return b":%d\r\n" % int(self.data.pop(args[1], None) is not None)
+        if name == b"EVAL":
+            assert args[1].decode() == shared_cache._DELETE_IF_SCRIPT
+            value, expires = self.data.get(args[3], (None, None))
+            live = expires is None or expires > now
+            if value != args[4] or not live:
+                return b":0\r\n"
+            del self.data[args[3]]
+            return b":1\r\n"
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        state: dict = {}
+        try:
+            while True:
+                args = await self._read_command(reader)
+                self.commands.append(args)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(self._execute(args, state))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[FakeRedis]:
+    server = FakeRedis(password="s3cret")
+    await server.start()
+    backend = shared_cache.RedisBackend(server.url)
+    previous = shared_cache.backend()
+    shared_cache.set_backend(backend)
+    yield server
+    shared_cache.set_backend(previous)
+    await backend.close()
+    await server.stop()
+
+
+def _redis_backend() -> shared_cache.RedisBackend:
+    """The backend installed by the `redis` fixture."""
+    backend = shared_cache.backend()
+    assert isinstance(backend, shared_cache.RedisBackend)
+    return backend
+
+
+def test_resp_encoding() -> None:
+    command = shared_cache.RedisBackend._command("SET", "k", b"\xc3\xa9", "PX", "5")
+
+    assert (
+        command
+        == b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\xc3\xa9\r\n$2\r\nPX\r\n$1\r\n5\r\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_round_trip(redis: FakeRedis) -> None:
+    backend = _redis_backend()
+
+    assert await backend.get("missing") is None
+    await backend.set("k", "é\r\n".encode(), 60)
+    assert await backend.get("k") == "é\r\n".encode()
+    assert await backend.add("k", b"other", 60) is False
+    await backend.delete("k")
+    assert await backend.add("k", b"other", 60) is True
+    # AUTH and SELECT were sent once, on the single pooled connection
+    names = [args[0] for args in redis.commands]
+    assert names[:2] == [b"AUTH", b"SELECT"]
+    assert names.count(b"AUTH") == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_are_namespaced_per_environment(
+    redis: FakeRedis, monkeypatch
+) -> None:
+    monkeypatch.setenv("DATAGOUV_API_ENV", "demo")
+    await shared_cache.put("metadata", "ds1", {"title": "Démo"}, 60)
+
+    assert b"datagouv-mcp:demo:metadata:ds1" in redis.data
+    assert await shared_cache.get("metadata", "ds1") == {"title": "Démo"}
+    monkeypatch.setenv("DATAGOUV_API_ENV", "prod")
+    assert await shared_cache.get("metadata", "ds1") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_load_once(redis: FakeRedis) -> None:
+    loads = 0
+
+    async def load() -> dict:
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return {"n": loads}
+
+    results = await asyncio.gather(
+        *(shared_cache.get_or_load("search", "q", load, ttl=60) for _ in range(5))
+    )
+
+    assert loads == 1
+    assert results == [{"n": 1}] * 5
+    assert not any(key.endswith(b":lock") for key in redis.data)
+
+
+@pytest.mark.asyncio
+async def test_other_replica_waits_for_the_lock_holder(
+    redis: FakeRedis, monkeypatch
+) -> None:
+    monkeypatch.setattr(shared_cache, "LOCK_POLL_SECONDS", 0.01)
+    lock = shared_cache.full_key("search", "q") + ":lock"
+    await _redis_backend().add(lock, b"replica-1", 5)
+
+    async def publish_later() -> None:
+        await asyncio.sleep(0.05)
+        await shared_cache.put("search", "q", ["from replica 1"], 60)
+
+    async def load() -> list[str]:
+        raise AssertionError("the lock holder loads the value")
+
+    task = asyncio.create_task(publish_later())
+    value = await shared_cache.get_or_load("search", "q", load, ttl=60)
+    await task
+
+    assert value == ["from replica 1"]
+
+
+@pytest.mark.asyncio
+async def test_expired_lock_taken_by_another_replica_is_kept(redis: FakeRedis) -> None:
+    lock = shared_cache.full_key("search", "q") + ":lock"
+
+    async def slow_load() -> str:
+        # Our lock expired meanwhile and another replica took it
+        await _redis_backend().set(lock, b"replica-2", 5)
+        return "fresh"
+
+    assert await shared_cache.get_or_load("search", "q", slow_load) == "fresh"
+    assert await _redis_backend().get(lock) == b"replica-2"
+
+
+@pytest.mark.asyncio
+async def test_waiters_load_as_soon_as_the_holder_gives_up(
+    redis: FakeRedis, monkeypatch
+) -> None:
+    monkeypatch.setattr(shared_cache, "LOCK_POLL_SECONDS", 0.01)
+    lock = shared_cache.full_key("search", "q") + ":lock"
+    await _redis_backend().add(lock, b"replica-1", 5)
+
+    async def fail_later() -> None:
+        # Replica 1's load failed: it releases the lock without a value
+        await asyncio.sleep(0.05)
+        await _redis_backend().delete(lock)
+
+    async def load() -> str:
+        return "fresh"
+
+    task = asyncio.create_task(fail_later())
+    start = time.perf_counter()
+    value = await shared_cache.get_or_load("search", "q", load, ttl=60)
+    await task
+
+    assert value == "fresh"
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_none_is_cached_briefly(redis: FakeRedis) -> None:
+    loads = 0
+
+    async def load() -> None:
+        nonlocal loads
+        loads += 1
+
+    assert await shared_cache.get_or_load("search", "q", load, ttl=3600) is None
+    assert await shared_cache.get_or_load("search", "q", load, ttl=3600) is None
+
+    assert loads == 1
+    _, expires = redis.data[shared_cache.full_key("search", "q").encode()]
+    assert expires - time.monotonic() <= shared_cache.NEGATIVE_TTL_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_memory_lock_is_released_only_by_its_holder() -> None:
+    backend = shared_cache.MemoryBackend()
+    await backend.add("lock", b"mine", 5)
+
+    await backend.delete_if("lock", b"theirs")
+    assert await backend.get("lock") == b"mine"
+    await backend.delete_if("lock", b"mine")
+    assert await backend.get("lock") is None
+
+
+@pytest.mark.asyncio
+async def test_unreachable_backend_falls_back_to_loading(monkeypatch) -> None:
+    monkeypatch.setattr(shared_cache, "TIMEOUT_SECONDS", 0.2)
+    previous = shared_cache.backend()
+    shared_cache.set_backend(shared_cache.RedisBackend("redis://127.0.0.1:1/0"))
+    try:
+
+        async def load() -> str:
+            return "fresh"
+
+        assert await shared_cache.get_or_load("search", "q", load) == "fresh"
+    finally:
+        shared_cache.set_backend(previous)
+
+
+@pytest.mark.asyncio
+async def test_slow_backend_is_bounded(redis: FakeRedis, monkeypatch) -> None:
+    monkeypatch.setattr(shared_cache, "TIMEOUT_SECONDS", 0.05)
+    redis.delay = 0.5
+
+    start = time.perf_counter()
+    assert await shared_cache.get("search", "q") is None
+    assert time.perf_counter() - start < 0.3
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded_in_bytes() -> None:
+    backend = shared_cache.MemoryBackend(max_bytes=100)
+
+    for i in range(10):
+        await backend.set(f"k{i}", b"x" * 20, 60)
+    await backend.set("expired", b"x", -1)
+
+    assert await backend.get("k9") == b"x" * 20
+    assert await backend.get("k0") is None
+    assert await backend.get("expired") is None
+    assert backend._size <= 100
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_api_responses(
+    redis: FakeRedis, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/2/datasets/ds1/",
+        json={"id": "ds1", "title": "Titre"},
+    )
+
+    first = await datagouv_api_client.get_dataset_summary("ds1")
+    # Another replica: same backend server, empty in-process state
+    shared_cache.set_backend(shared_cache.RedisBackend(redis.url))
+    second = await datagouv_api_client.get_dataset_summary("ds1")
+
+    assert first == second == Dataset(id="ds1", title="Titre")
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_crawler_exceptions_are_shared(
+    redis: FakeRedis, httpx_mock: HTTPXMock
+) -> None:
+    crawler_api_client.clear_cache()
+    httpx_mock.add_response(
+        url=re.compile(r"https://crawler\.data\.gouv\.fr/api/resources-exceptions"),
+        json=[{"resource_id": "r2"}, {"resource_id": "r1"}],
+    )
+
+    assert await crawler_api_client.fetch_resource_exceptions() == {"r1", "r2"}
+    crawler_api_client.clear_cache()
+    assert await crawler_api_client.is_in_exceptions_list("r2")
+    assert len(httpx_mock.get_requests()) == 1
+    crawler_api_client.clear_cache()
+
+
+@pytest.mark.asyncio
+async def test_in_process_hits_return_the_decoded_model(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/2/datasets/ds1/",
+        json={"id": "ds1", "title": "Titre", "harvest": {"remote_id": "x"}},
+    )
+
+    first = await datagouv_api_client.get_dataset_summary("ds1")
+
+    def no_decoding(data: bytes) -> None:
+        raise AssertionError("in-process hits are not decoded")
+
+    monkeypatch.setattr(shared_cache.json_codec, "loads", no_decoding)
+    second = await datagouv_api_client.get_dataset_summary("ds1")
+
+    assert second is first
+    assert first == Dataset(id="ds1", title="Titre")
+
+
+@pytest.mark.asyncio
+async def test_models_are_stored_as_their_payload(
+    redis: FakeRedis, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/2/datasets/ds1/",
+        json={"id": "ds1", "title": "Titre", "harvest": {"remote_id": "x"}},
+    )
+
+    await datagouv_api_client.get_dataset_summary("ds1")
+
+    (key,) = [k for k in redis.data if b":metadata:get_dataset_summary:" in k]
+    stored = json.loads(redis.data[key][0])
+    assert stored == Dataset(id="ds1", title="Titre").to_api()
@@ -0,0 +1,112 @@
+"""Tests for server startup: import-time budget, lazy imports and warm-up."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import crawler_api_client, env_config, http_clients, warmup
+
+# Generous enough for slow CI machines: importing main takes well under a second
+IMPORT_BUDGET_SECONDS = 3.0
+
+# Only needed by optional features, so they must not be imported at startup
+LAZY_MODULES = ("yaml", "sentry_sdk", "helpers.mcp_client")
+
+_IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def test_import_main_within_budget() -> None:
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if k not in ("SENTRY_DSN", "OTEL_EXPORTER_OTLP_ENDPOINT")
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["loaded"] == []
+    assert report["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_upstream_connections_and_preloads_exceptions(
+    httpx_mock: HTTPXMock,
+) -> None:
+    crawler_api_client.clear_cache()
+    for name in http_clients.UPSTREAMS:
+        httpx_mock.add_response(method="HEAD", url=env_config.get_base_url(name))
+    httpx_mock.add_response(method="GET", json=[{"resource_id": "r1"}])
+
+    await warmup.warm_up()
+
+    heads = [r for r in httpx_mock.get_requests() if r.method == "HEAD"]
+    assert len(heads) == len(http_clients.UPSTREAMS)
+    # Served from the cache filled by the warm-up
+    assert await crawler_api_client.is_in_exceptions_list("r1")
+    assert len(httpx_mock.get_requests()) == len(http_clients.UPSTREAMS) + 1
+    crawler_api_client.clear_cache()
+
+
+@pytest.mark.asyncio
+async def test_lifespan_startup_waits_for_warm_up(monkeypatch) -> None:
+    import main
+
+    events: list[str] = []
+
+    async def fake_warm_up() -> None:
+        events.append("warm-up")
+
+    async def inner_app(scope, receive, send) -> None:
+        await send({"type": "lifespan.startup.complete"})
+
+    async def send(message) -> None:
+        events.append(message["type"])
+
+    monkeypatch.setattr(warmup, "ENABLED", True)
+    monkeypatch.setattr(warmup, "warm_up", fake_warm_up)
+
+    await main.with_monitoring(inner_app)({"type": "lifespan"}, None, send)
+
+    assert events == ["warm-up", "lifespan.startup.complete"]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_shutdown_closes_the_upstream_clients() -> None:
+    import main
+
+    client = http_clients.client("datagouv_api")
+    events: list[str] = []
+
+    async def inner_app(scope, receive, send) -> None:
+        await send({"type": "lifespan.shutdown.complete"})
+
+    async def send(message) -> None:
+        events.append(message["type"])
+
+    await main.with_monitoring(inner_app)({"type": "lifespan"}, None, send)
+
+    assert events == ["lifespan.shutdown.complete"]
+    assert client.is_closed
+    assert http_clients.client("datagouv_api") is not client
@@ -24,7 +24,10 @@ async def test_fetch_resource_data_404_llm_hint(httpx_mock: HTTPXMock) -> None:
 @pytest.mark.asyncio
 async def test_fetch_resource_data_502_server_hint(httpx_mock: HTTPXMock) -> None:
     pattern = re.compile(rf".*/resources/{re.escape(_MOCK_RID)}/data/")
-    httpx_mock.add_response(method="GET", url=pattern, status_code=502)
+    # 502 is retried by helpers.upstream before surfacing the error
+    httpx_mock.add_response(
+        method="GET", url=pattern, status_code=502, is_reusable=True
+    )
     with pytest.raises(tabular_api_client.TabularApiRequestError) as exc:
         await tabular_api_client.fetch_resource_data(_MOCK_RID, page_size=1)
     assert "try again" in str(exc.value).lower()
@@ -0,0 +1,175 @@
+"""Tests for helpers.tool_cache (memoized tool results)."""
+
+import asyncio
+import re
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult, TextContent
+from pytest_httpx import HTTPXMock
+
+from helpers import tool_cache, tool_output
+from tests.tool_results import text
+from tools import register_tools
+
+
+def _result(text: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+class _Counter:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self) -> CallToolResult:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return _result(f"call {self.calls}")
+
+
+def test_cache_key_is_canonical_and_per_environment(monkeypatch) -> None:
+    monkeypatch.setenv("DATAGOUV_API_ENV", "prod")
+    key = tool_cache.cache_key("t", {"b": 1, "a": "é"})
+
+    assert key == tool_cache.cache_key("t", {"a": "é", "b": 1})
+    assert key != tool_cache.cache_key("other", {"a": "é", "b": 1})
+    monkeypatch.setenv("DATAGOUV_API_ENV", "demo")
+    assert key != tool_cache.cache_key("t", {"a": "é", "b": 1})
+
+
+def test_parse_ttls() -> None:
+    assert tool_cache.parse_ttls("search_datasets=60, get_metrics=-5,bad,x=y") == {
+        "search_datasets": 60.0,
+        "get_metrics": 0.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_repeated_call_is_served_from_memory() -> None:
+    run = _Counter()
+
+    first = await tool_cache.call("t", {"q": "a"}, run)
+    second = await tool_cache.call("t", {"q": "a"}, run)
+    other = await tool_cache.call("t", {"q": "b"}, run)
+
+    assert run.calls == 2
+    assert second is first
+    assert other.content[0].text == "call 2"
+
+
+@pytest.mark.asyncio
+async def test_expired_and_error_results_are_recomputed(monkeypatch) -> None:
+    run = _Counter()
+    monkeypatch.setitem(tool_cache.TOOL_TTLS, "t", 0.01)
+    await tool_cache.call("t", {}, run)
+    await asyncio.sleep(0.02)
+    await tool_cache.call("t", {}, run)
+    assert run.calls == 2
+
+    failures = 0
+
+    async def failing() -> CallToolResult:
+        nonlocal failures
+        failures += 1
+        return tool_output.error("Error: upstream down")
+
+    await tool_cache.call("t", {"x": 1}, failing)
+    await tool_cache.call("t", {"x": 1}, failing)
+    assert failures == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced() -> None:
+    run = _Counter(delay=0.05)
+
+    results = await asyncio.gather(
+        *(tool_cache.call("t", {"q": "a"}, run) for _ in range(5))
+    )
+
+    assert run.calls == 1
+    assert all(result is results[0] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_waiters_run_the_call_when_the_first_one_is_cancelled() -> None:
+    run = _Counter(delay=0.05)
+    leader = asyncio.create_task(tool_cache.call("t", {}, run))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(tool_cache.call("t", {}, run))
+    await asyncio.sleep(0.01)
+
+    leader.cancel()
+    result = await follower
+
+    assert run.calls == 2
+    assert result.content[0].text == "call 2"
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded_in_bytes(monkeypatch) -> None:
+    monkeypatch.setattr(tool_cache, "MAX_BYTES", 600)
+
+    for i in range(10):
+        text = f"{i}" * 100
+
+        async def run(text: str = text) -> CallToolResult:
+            return _result(text)
+
+        await tool_cache.call("t", {"i": i}, run)
+
+    assert 0 < tool_cache._size <= 600
+    assert len(tool_cache._cache) < 10
+    assert tool_cache.cache_key("t", {"i": 9}) in tool_cache._cache
+    assert tool_cache.cache_key("t", {"i": 0}) not in tool_cache._cache
+
+
+@pytest.mark.asyncio
+async def test_no_cache_header_skips_the_lookup() -> None:
+    run = _Counter()
+    await tool_cache.call("t", {}, run)
+
+    token = tool_cache.bind_bypass({"cache-control": "max-age=0, No-Cache"})
+    try:
+        fresh = await tool_cache.call("t", {}, run)
+    finally:
+        tool_cache.reset_bypass(token)
+
+    assert fresh.content[0].text == "call 2"
+    # The fresh result replaced the cached one
+    assert (await tool_cache.call("t", {}, run)) is fresh
+    assert run.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_memoized(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/2/datasets/search/.*"),
+        json={"data": [{"id": "ds1", "title": "T"}], "total": 1},
+    )
+    app = FastMCP()
+    register_tools(app)
+
+    first = await app.call_tool("search_datasets", {"query": "budget"})
+    second = await app.call_tool("search_datasets", {"query": "budget"})
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert text(second) == text(first)
+
+
+@pytest.mark.asyncio
+async def test_results_reporting_an_upstream_error_are_not_cached() -> None:
+    calls = 0
+
+    async def partial_failure() -> CallToolResult:
+        nonlocal calls
+        calls += 1
+        return CallToolResult(
+            content=[TextContent(type="text", text="Error fetching metrics")],
+            structuredContent={"dataset": {"id": "ds1", "error": "HTTP 502"}},
+        )
+
+    await tool_cache.call("t", {}, partial_failure)
+    await tool_cache.call("t", {}, partial_failure)
+
+    assert calls == 2
@@ -1,5 +1,6 @@
 import ast
 import logging
+import re
 
 import pytest
 from mcp.server.fastmcp import FastMCP
@@ -51,13 +52,26 @@ async def test_tool_logs_kwargs(
     monkeypatch.setattr("helpers.matomo.MATOMO_SITE_ID", "1")
     httpx_mock.add_response(json={})  # Mock tool call
     httpx_mock.add_response(json={})  # Mock Matomo call
-    with caplog.at_level(logging.INFO, logger=TOOLS_LOGGER_NAME):
+    with caplog.at_level(logging.DEBUG, logger=TOOLS_LOGGER_NAME):
         await mcp.call_tool(tool_name, call_args)
 
-    record = next(r for r in caplog.records if tool_name in r.message)
+    record = next(r for r in caplog.records if "kwargs=" in r.message)
+    assert record.levelno == logging.DEBUG
 
     kwargs_str = record.message.split("kwargs=")[1]
     kwargs = ast.literal_eval(kwargs_str)
 
     for key, value in expected_kwargs.items():
         assert kwargs[key] == value, f"Expected {key}={value}, got {kwargs.get(key)}"
+
+
+@pytest.mark.asyncio
+async def test_tool_logs_its_duration_at_info(
+    mcp: FastMCP, caplog, httpx_mock: HTTPXMock
+):
+    httpx_mock.add_response(json={"data": [], "total": 0})
+    with caplog.at_level(logging.INFO, logger=TOOLS_LOGGER_NAME):
+        await mcp.call_tool("search_datasets", {"query": "population"})
+
+    (record,) = caplog.records
+    assert re.fullmatch(r"Tool search_datasets finished in \d+\.\d{3}s", record.message)
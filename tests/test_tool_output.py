@@ -0,0 +1,213 @@
+"""Tests for the structured content returned by the tools (mocked HTTP)."""
+
+import json
+import re
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from pytest_httpx import HTTPXMock
+
+from helpers import (
+    datagouv_api_client,
+    metrics_store,
+    rendering,
+    tabular_api_client,
+    tool_output,
+)
+from tests.tool_results import structured, text, tool_result
+
+
+@pytest.mark.asyncio
+async def test_every_tool_declares_an_output_schema(app: FastMCP) -> None:
+    tools = await app.list_tools()
+
+    assert tools
+    for tool in tools:
+        assert tool.outputSchema is not None, tool.name
+        assert "error" in tool.outputSchema["properties"], tool.name
+
+
+@pytest.mark.asyncio
+async def test_search_datasets_structured_hits(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/2/datasets/search/.*"),
+        json={
+            "data": [
+                {
+                    "id": "ds1",
+                    "title": "Population légale",
+                    "slug": "population-legale",
+                    "description_short": "Recensement",
+                    "organization": {"name": "INSEE"},
+                    "tags": ["population"],
+                    "resources": {"total": 4},
+                }
+            ],
+            "total": 45,
+        },
+    )
+
+    result = await app.call_tool("search_datasets", {"query": "population"})
+    data = structured(result)
+
+    assert text(result).startswith("Found 45 dataset(s)")
+    assert isinstance(data.pop("next_cursor"), str)
+    assert data == {
+        "query": "population",
+        "total": 45,
+        "page": 1,
+        "page_size": 20,
+        "next_page": 2,
+        "datasets": [
+            {
+                "id": "ds1",
+                "title": "Population légale",
+                "description_short": "Recensement",
+                "organization": "INSEE",
+                "tags": ["population"],
+                "resources_count": 4,
+                "url": "https://www.data.gouv.fr/datasets/population-legale",
+            }
+        ],
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_dataset_info_structured_dataset(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url="https://www.data.gouv.fr/api/2/datasets/ds1/",
+        json={
+            "id": "ds1",
+            "title": "Titre",
+            "slug": "titre",
+            "organization": {"id": "org1", "name": "Org"},
+            "resources": {"total": 3},
+            "tags": ["a", "b"],
+            "license": "lov2",
+        },
+    )
+
+    result = tool_result(await app.call_tool("get_dataset_info", {"dataset_id": "ds1"}))
+    dataset = structured(result)["dataset"]
+
+    assert not result.isError
+    assert "Resources: 3 file(s)" in text(result)
+    assert dataset["organization"] == {"id": "org1", "name": "Org"}
+    assert dataset["resources_total"] == 3
+    assert dataset["tags"] == ["a", "b"]
+    assert dataset["url"] == "https://www.data.gouv.fr/datasets/titre/"
+
+
+@pytest.mark.asyncio
+async def test_get_metrics_structured_series(
+    app: FastMCP, httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    metrics_store.clear()
+    monkeypatch.setattr(metrics_store, "CACHE_PATH", None)
+    monkeypatch.setattr(metrics_store, "latest_closed_month", lambda: "2025-03")
+    monkeypatch.setattr(metrics_store, "first_open_month", lambda: "2025-04")
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/1/datasets/.*"),
+        json={"id": "ds1", "title": "D"},
+    )
+    httpx_mock.add_response(
+        url=re.compile(r"https://metric-api\.data\.gouv\.fr/api/datasets/.*"),
+        json={
+            "data": [
+                {
+                    "metric_month": "2025-04",
+                    "monthly_visit": 7,
+                    "monthly_download_resource": 3,
+                }
+            ]
+        },
+    )
+
+    result = await app.call_tool("get_metrics", {"dataset_id": "ds1"})
+
+    assert structured(result) == {
+        "dataset": {
+            "id": "ds1",
+            "title": "D",
+            "months": [
+                {
+                    "month": "2025-04",
+                    "values": {"monthly_visit": 7, "monthly_download_resource": 3},
+                }
+            ],
+            "totals": {"monthly_visit": 7, "monthly_download_resource": 3},
+        }
+    }
+
+
+@pytest.mark.asyncio
+async def test_errors_are_flagged_and_structured(
+    app: FastMCP, httpx_mock: HTTPXMock
+) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r"https://www\.data\.gouv\.fr/api/1/organizations/.*"),
+        status_code=404,
+    )
+
+    result = tool_result(
+        await app.call_tool("get_organization_metrics", {"organization": "nope"})
+    )
+
+    assert result.isError
+    assert text(result) == "Error: Organization 'nope' not found."
+    assert result.structuredContent == {
+        "error": "Error: Organization 'nope' not found."
+    }
+
+
+def test_result_flags_errors_of_nested_series() -> None:
+    ok = tool_output.result(["Dataset"], {"dataset": {"id": "ds1", "months": []}})
+    failed = tool_output.result(
+        ["Dataset"], {"dataset": {"id": "ds1", "error": "HTTP 502"}}
+    )
+
+    assert not ok.isError
+    assert failed.isError
+    assert structured(failed)["dataset"]["error"] == "HTTP 502"
+
+
+@pytest.mark.asyncio
+async def test_structured_rows_respect_the_output_budget(
+    app: FastMCP, monkeypatch
+) -> None:
+    monkeypatch.setattr(rendering, "TOOL_BUDGETS", {"query_resource_data": 65536})
+    row = {f"column_{i}": "v" * 5000 for i in range(20)}
+
+    async def fetch_resource_data(resource_id: str, **kwargs) -> dict:
+        return {
+            "data": [row] * 50,
+            "meta": {"page": 1, "page_size": 50, "total": 500},
+            "links": {"next": "..."},
+        }
+
+    async def get_resource_metadata(resource_id: str, **kwargs) -> dict:
+        return {"title": "Big", "dataset_id": None}
+
+    monkeypatch.setattr(tabular_api_client, "fetch_resource_data", fetch_resource_data)
+    monkeypatch.setattr(
+        datagouv_api_client, "get_resource_metadata", get_resource_metadata
+    )
+
+    result = await app.call_tool(
+        "query_resource_data", {"resource_id": "r1", "page_size": 50}
+    )
+    data = structured(result)
+
+    assert (
+        len(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode())
+        <= 65536
+    )
+    assert data["resource_id"] == "r1"
+    assert data["total"] == 500
+    assert data["truncated"]["budget_bytes"] == 65536
+    assert data["truncated"]["omitted_items"] == 50 - len(data["rows"])
+    assert data["truncated"]["continuation"] == {"page": 1, "page_size": 25}
@@ -0,0 +1,94 @@
+"""Tests for optional OpenTelemetry tracing (skipped when the SDK is not installed)."""
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import tracing, upstream
+from helpers.logging import log_tool
+
+
+def test_endpoint_template_collapses_identifiers() -> None:
+    assert (
+        tracing.endpoint_template(
+            "https://www.data.gouv.fr/api/1/datasets/55e4129788ee386899a46ec1/?x=1"
+        )
+        == "https://www.data.gouv.fr/api/1/datasets/{id}/"
+    )
+    assert (
+        tracing.endpoint_template(
+            "https://crawler.data.gouv.fr/api/resources-exceptions"
+        )
+        == "https://crawler.data.gouv.fr/api/resources-exceptions"
+    )
+
+
+def test_start_span_is_a_noop_when_disabled(monkeypatch) -> None:
+    monkeypatch.setattr(tracing, "_tracer", None)
+    with tracing.start_span("anything") as span:
+        tracing.set_attribute("key", "value")
+    assert span is None
+
+
+@pytest.fixture
+def span_exporter(monkeypatch):
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    monkeypatch.setattr(tracing, "_tracer", None)
+    tracing.init_tracing(span_processor=SimpleSpanProcessor(exporter))
+    return exporter
+
+
+@pytest.mark.asyncio
+async def test_tool_and_upstream_spans_are_nested(
+    span_exporter, httpx_mock: HTTPXMock
+) -> None:
+    url = "https://tabular.example/api/resources/11111111-1111-1111-1111-111111111111/"
+    httpx_mock.add_response(url=url, json={"ok": True})
+
+    @log_tool
+    async def traced_tool() -> str:
+        async with httpx.AsyncClient() as client:
+            await upstream.get(client, url, upstream="tabular_api")
+        return "done"
+
+    await traced_tool()
+
+    spans = {span.name: span for span in span_exporter.get_finished_spans()}
+    tool_span = spans["tool traced_tool"]
+    http_span = spans["GET tabular_api"]
+    assert http_span.parent.span_id == tool_span.context.span_id
+    assert http_span.attributes["upstream"] == "tabular_api"
+    assert http_span.attributes["url.template"] == (
+        "https://tabular.example/api/resources/{id}/"
+    )
+    assert http_span.attributes["http.response.status_code"] == 200
+    assert http_span.attributes["http.response.body.size"] == len(b'{"ok":true}')
+
+
+@pytest.mark.asyncio
+async def test_streamed_upstream_call_has_the_same_span(
+    span_exporter, httpx_mock: HTTPXMock
+) -> None:
+    url = "https://metrics.example/api/datasets/data/csv/?dataset_id__exact=ds1"
+    body = b"__id,visit\n1,2\n"
+    httpx_mock.add_response(url=url, content=body)
+
+    async with httpx.AsyncClient() as client:
+        async with upstream.stream(client, url, upstream="metrics_api") as resp:
+            assert await resp.aread() == body
+
+    (span,) = span_exporter.get_finished_spans()
+    assert span.name == "GET metrics_api"
+    assert span.attributes["upstream"] == "metrics_api"
+    assert span.attributes["http.request.method"] == "GET"
+    assert span.attributes["url.template"] == (
+        "https://metrics.example/api/datasets/data/csv/"
+    )
+    assert span.attributes["http.response.status_code"] == 200
+    assert span.attributes["http.response.body.size"] == len(body)
@@ -0,0 +1,168 @@
+"""Unit tests for the shared upstream GET path (mocked HTTP, no live API)."""
+
+import asyncio
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from helpers import upstream
+
+_URL = "https://upstream.example/api/items/"
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch) -> None:
+    """Reset budgets/latencies and remove backoff waits between attempts."""
+    upstream.reset_state()
+    monkeypatch.setattr(upstream, "RETRY_BASE_DELAY", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_get_retries_502_then_succeeds(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, status_code=502)
+    httpx_mock.add_response(url=_URL, json={"ok": True})
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 200
+    assert resp.json() == {"ok": True}
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_returns_last_response_when_retries_exhausted(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(url=_URL, status_code=503, is_reusable=True)
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 503
+    assert len(httpx_mock.get_requests()) == upstream.MAX_RETRIES + 1
+
+
+@pytest.mark.asyncio
+async def test_get_does_not_retry_client_errors(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, status_code=400)
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 400
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_retries_transport_errors(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_exception(httpx.ConnectError("boom"), url=_URL)
+    httpx_mock.add_response(url=_URL, json={"ok": True})
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_get_honours_retry_after(httpx_mock: HTTPXMock, monkeypatch) -> None:
+    delays: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(upstream.asyncio, "sleep", fake_sleep)
+    httpx_mock.add_response(url=_URL, status_code=429, headers={"Retry-After": "2"})
+    httpx_mock.add_response(url=_URL, json={})
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 200
+    assert delays == [2.0]
+
+
+@pytest.mark.asyncio
+async def test_get_gives_up_when_retry_after_too_long(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, status_code=429, headers={"Retry-After": "3600"})
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api")
+
+    assert resp.status_code == 429
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_stops_retrying_when_budget_exhausted(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    monkeypatch.setattr(upstream, "RETRY_BUDGET", 1)
+    httpx_mock.add_response(url=_URL, status_code=502, is_reusable=True)
+
+    async with httpx.AsyncClient() as client:
+        await upstream.get(client, _URL, upstream="test_api")
+        await upstream.get(client, _URL, upstream="test_api")
+
+    # First call: 1 attempt + 1 budgeted retry; second call: budget empty, no retry
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_retry_after_delay_parses_http_date() -> None:
+    resp = httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert upstream.retry_after_delay(resp) == 0.0
+    assert upstream.retry_after_delay(httpx.Response(429)) is None
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_primary(
+    httpx_mock: HTTPXMock, monkeypatch
+) -> None:
+    monkeypatch.setattr(upstream, "HEDGING_ENABLED", True)
+    for _ in range(upstream.HEDGE_MIN_SAMPLES):
+        upstream._record_latency("test_api", 0.01)
+
+    calls = 0
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+            return httpx.Response(200, json={"from": "primary"})
+        return httpx.Response(200, json={"from": "hedge"})
+
+    httpx_mock.add_callback(respond, url=_URL, is_reusable=True)
+
+    async with httpx.AsyncClient() as client:
+        resp = await asyncio.wait_for(
+            upstream.get(client, _URL, upstream="test_api"), timeout=2
+        )
+
+    assert resp.json() == {"from": "hedge"}
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_get_with_max_bytes_streams_body(httpx_mock: HTTPXMock) -> None:
+    httpx_mock.add_response(url=_URL, json={"ok": True})
+
+    async with httpx.AsyncClient() as client:
+        resp = await upstream.get(client, _URL, upstream="test_api", max_bytes=1024)
+
+    assert resp.json() == {"ok": True}
+
+
+@pytest.mark.asyncio
+async def test_get_with_max_bytes_rejects_declared_length(
+    httpx_mock: HTTPXMock,
+) -> None:
+    httpx_mock.add_response(url=_URL, content=b"x" * 2048)
+
+    async with httpx.AsyncClient() as client:
+        with pytest.raises(upstream.ResponseTooLargeError):
+            await upstream.get(client, _URL, upstream="test_api", max_bytes=1024)
+
+    assert len(httpx_mock.get_requests()) == 1
@@ -0,0 +1,61 @@
+"""Unit tests for the CPU worker pool."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from helpers import prometheus, worker_pool
+from helpers.datagouv_api_client import parse_openapi_spec
+from helpers.logging import bind_request_id, current_request_id, reset_request_id
+
+
+@pytest.mark.asyncio
+async def test_run_executes_off_the_event_loop_and_records_duration() -> None:
+    before = prometheus.CPU_TASK_DURATION.count(task="test_task")
+
+    thread_name = await worker_pool.run(
+        "test_task", lambda: threading.current_thread().name
+    )
+
+    assert thread_name.startswith("cpu-worker")
+    assert prometheus.CPU_TASK_DURATION.count(task="test_task") == before + 1
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_context() -> None:
+    token = bind_request_id("req-worker")
+    try:
+        assert await worker_pool.run("test_task", current_request_id) == "req-worker"
+    finally:
+        reset_request_id(token)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_cpu_work() -> None:
+    ticks = 0
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    try:
+        await worker_pool.run("test_task", time.sleep, 0.2)
+    finally:
+        ticker_task.cancel()
+
+    assert ticks >= 5
+
+
+def test_parse_openapi_spec_json_and_yaml() -> None:
+    assert parse_openapi_spec('{"openapi": "3.0.0"}', "u") == {"openapi": "3.0.0"}
+    assert parse_openapi_spec("openapi: 3.0.0\npaths: {}\n", "u") == {
+        "openapi": "3.0.0",
+        "paths": {},
+    }
+    with pytest.raises(ValueError):
+        parse_openapi_spec("key: [unclosed", "u")
@@ -0,0 +1,25 @@
+"""Narrowing helpers for what FastMCP.call_tool() returns to the tests."""
+
+from typing import Any
+
+from mcp.types import CallToolResult, TextContent
+
+
+def tool_result(result: object) -> CallToolResult:
+    """The CallToolResult every tool returns (call_tool is typed more loosely)."""
+    assert isinstance(result, CallToolResult)
+    return result
+
+
+def text(result: object) -> str:
+    """Text of the first content block of a tool result."""
+    block = tool_result(result).content[0]
+    assert isinstance(block, TextContent)
+    return block.text
+
+
+def structured(result: object) -> dict[str, Any]:
+    """Structured content of a tool result, which every tool sets."""
+    content = tool_result(result).structuredContent
+    assert content is not None
+    return content
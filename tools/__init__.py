@@ -1,11 +1,13 @@
 from mcp.server.fastmcp import FastMCP
 
+from tools.compare_metrics import register_compare_metrics_tool
 from tools.get_dataservice_info import register_get_dataservice_info_tool
 from tools.get_dataservice_openapi_spec import (
     register_get_dataservice_openapi_spec_tool,
 )
 from tools.get_dataset_info import register_get_dataset_info_tool
 from tools.get_metrics import register_get_metrics_tool
+from tools.get_organization_metrics import register_get_organization_metrics_tool
 from tools.get_resource_info import register_get_resource_info_tool
 from tools.list_dataset_resources import register_list_dataset_resources_tool
 from tools.query_resource_data import register_query_resource_data_tool
@@ -26,3 +28,5 @@ def register_tools(mcp: FastMCP) -> None:
     register_list_dataset_resources_tool(mcp)
     register_get_resource_info_tool(mcp)
     register_get_metrics_tool(mcp)
+    register_compare_metrics_tool(mcp)
+    register_get_organization_metrics_tool(mcp)
@@ -0,0 +1,160 @@
+import logging
+from typing import Annotated, Any
+
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+
+from helpers import (
+    metrics_api_client,
+    metrics_store,
+    prometheus,
+    tool_output,
+)
+from helpers.logging import MAIN_LOGGER_NAME, log_tool
+from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+# Metric fields per model: (label, field) pairs, in display order
+_MODEL_FIELDS: dict[str, list[tuple[str, str]]] = {
+    "datasets": [
+        ("visits", "monthly_visit"),
+        ("downloads", "monthly_download_resource"),
+    ],
+    "resources": [("downloads", "monthly_download_resource")],
+}
+
+
+def _total(records: list[dict[str, Any]], field: str) -> int:
+    return sum(record.get(field, 0) or 0 for record in records)
+
+
+def register_compare_metrics_tool(mcp: FastMCP) -> None:
+    @mcp.tool(
+        title="Compare and rank usage metrics",
+        annotations=READ_ONLY_EXTERNAL_API_TOOL,
+    )
+    @log_tool
+    async def compare_metrics(
+        ids: list[str],
+        model: str = "datasets",
+        months: int = 12,
+        sort_by: str = "visits",
+    ) -> Annotated[CallToolResult, tool_output.ComparisonOutput]:
+        """
+        Compare usage metrics of several datasets or resources in one call.
+
+        Ranks the given IDs by total visits or downloads over the last `months`
+        months (max: 24) and shows a month × entity table. Use this instead of
+        calling get_metrics once per dataset.
+
+        `model` is "datasets" (visits and downloads) or "resources" (downloads
+        only). `sort_by` is "visits" or "downloads". Up to 50 IDs per call.
+        Note: Only available in production environment (not demo).
+        """
+        demo_error = metrics_api_client.demo_environment_error()
+        if demo_error:
+            return tool_output.error(demo_error)
+
+        fields = _MODEL_FIELDS.get(model)
+        if fields is None:
+            return tool_output.error("Error: model must be 'datasets' or 'resources'.")
+        sort_fields = dict(fields)
+        if sort_by not in sort_fields:
+            if model == "resources" and sort_by == "visits":
+                sort_by = "downloads"
+            else:
+                return tool_output.error(
+                    f"Error: sort_by must be one of: {', '.join(sort_fields)}."
+                )
+        months = max(1, min(months, metrics_api_client.MAX_BULK_MONTHS))
+
+        try:
+            results = await metrics_api_client.get_bulk_metrics(
+                model, ids, months=months
+            )
+        except ValueError as e:
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
+        except Exception as e:  # noqa: BLE001
+            prometheus.record_tool_error(e)
+            logger.exception("Unexpected error in compare_metrics")
+            return tool_output.error(f"Error fetching metrics: {str(e)}")
+
+        sort_field = sort_fields[sort_by]
+        ranked = sorted(
+            (entity_id for entity_id, records in results.items() if records),
+            key=lambda entity_id: _total(results[entity_id], sort_field),
+            reverse=True,
+        )
+        missing = [entity_id for entity_id, records in results.items() if not records]
+
+        first_month = metrics_store.months_ago(months - 1)
+        data: tool_output.ComparisonOutput = {
+            "model": model,
+            "months": months,
+            "since": first_month,
+            "sort_by": sort_by,
+            "ranking": [
+                {
+                    "rank": rank,
+                    "id": entity_id,
+                    "totals": {
+                        label: _total(results[entity_id], field)
+                        for label, field in fields
+                    },
+                }
+                for rank, entity_id in enumerate(ranked, 1)
+            ],
+            "missing": missing,
+            "monthly": {},
+        }
+        content_parts = [
+            f"Metrics comparison: {len(results)} {model} over the last {months} "
+            f"month(s) (since {first_month}), ranked by {sort_by}",
+            "",
+        ]
+        if not ranked:
+            content_parts.append("No metrics available for any of these IDs.")
+            return tool_output.result(content_parts, data)
+
+        header = f"{'Rank':<6} {'ID':<38}" + "".join(
+            f" {label.capitalize():>14}" for label, _ in fields
+        )
+        content_parts.append(header)
+        content_parts.append("-" * len(header))
+        for rank, entity_id in enumerate(ranked, 1):
+            totals = "".join(
+                f" {_total(results[entity_id], field):>14,}" for _, field in fields
+            )
+            content_parts.append(f"{rank:<6} {entity_id:<38}{totals}")
+        if missing:
+            content_parts.append("")
+            content_parts.append(f"No data: {', '.join(missing)}")
+
+        # Month × entity matrix for the ranking metric, columns in ranking order
+        by_month: dict[str, dict[str, int]] = {}
+        for entity_id in ranked:
+            for record in results[entity_id]:
+                month = str(record.get("metric_month", ""))[:7]
+                by_month.setdefault(month, {})[entity_id] = (
+                    record.get(sort_field, 0) or 0
+                )
+        data["monthly"] = by_month
+        content_parts.append("")
+        content_parts.append(f"Monthly {sort_by} (column #N is rank N):")
+        content_parts.append(
+            f"{'Month':<8}"
+            + "".join(f" {'#' + str(i):>9}" for i in range(1, len(ranked) + 1))
+        )
+        for month in sorted(by_month, reverse=True):
+            values = by_month[month]
+            content_parts.append(
+                f"{month:<8}"
+                + "".join(
+                    f" {values[entity_id]:>9,}" if entity_id in values else f" {'-':>9}"
+                    for entity_id in ranked
+                )
+            )
+
+        return tool_output.result(content_parts, data)
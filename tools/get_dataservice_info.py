@@ -1,9 +1,10 @@
-from typing import Any
+from typing import Annotated
 
 import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client, env_config
+from helpers import datagouv_api_client, env_config, prometheus, rendering, tool_output
 from helpers.logging import log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
 
@@ -14,7 +15,9 @@ def register_get_dataservice_info_tool(mcp: FastMCP) -> None:
         annotations=READ_ONLY_EXTERNAL_API_TOOL,
     )
     @log_tool
-    async def get_dataservice_info(dataservice_id: str) -> str:
+    async def get_dataservice_info(
+        dataservice_id: str,
+    ) -> Annotated[CallToolResult, tool_output.DataserviceOutput]:
         """
         Get detailed metadata about a specific third-party API (dataservice).
 
@@ -25,69 +28,78 @@ def register_get_dataservice_info_tool(mcp: FastMCP) -> None:
         via get_dataservice_openapi_spec, (3) call base_api_url per spec.
         """
         try:
-            data = await datagouv_api_client.get_dataservice_details(dataservice_id)
+            dataservice = await datagouv_api_client.get_dataservice_details(
+                dataservice_id
+            )
 
             content_parts = [
-                f"Third-party API information: {data.get('title', 'Unknown')}",
+                f"Third-party API information: {dataservice.title}",
                 "",
             ]
 
-            if data.get("id"):
-                content_parts.append(f"ID: {data.get('id')}")
+            if dataservice.id:
+                content_parts.append(f"ID: {dataservice.id}")
             content_parts.append(
-                f"URL: {env_config.get_base_url('site')}dataservices/{data.get('id', '')}/"
+                f"URL: {env_config.get_base_url('site')}dataservices/{dataservice.id or ''}/"
             )
 
-            if data.get("description"):
+            if dataservice.description:
                 content_parts.append("")
-                desc = data.get("description", "")[:500]
-                content_parts.append(f"Description: {desc}...")
+                content_parts.append(
+                    f"Description: {rendering.shorten(dataservice.description, 500)}"
+                )
 
             # Catalog resource fields for this third-party API (dataservice)
             content_parts.append("")
-            if data.get("base_api_url"):
-                content_parts.append(f"Base API URL: {data.get('base_api_url')}")
-            if data.get("machine_documentation_url"):
+            if dataservice.base_api_url:
+                content_parts.append(f"Base API URL: {dataservice.base_api_url}")
+            if dataservice.machine_documentation_url:
                 content_parts.append(
-                    f"OpenAPI/Swagger spec: {data.get('machine_documentation_url')}"
+                    f"OpenAPI/Swagger spec: {dataservice.machine_documentation_url}"
                 )
 
-            if data.get("organization"):
-                org = data.get("organization", {})
-                if isinstance(org, dict):
-                    content_parts.append("")
-                    content_parts.append(f"Organization: {org.get('name', 'Unknown')}")
-                    if org.get("id"):
-                        content_parts.append(f"  Organization ID: {org.get('id')}")
+            org = dataservice.organization
+            if org:
+                content_parts.append("")
+                content_parts.append(f"Organization: {org.name}")
+                if org.id:
+                    content_parts.append(f"  Organization ID: {org.id}")
 
-            tags: list[str] = data.get("tags") or []
-            if tags:
+            if dataservice.tags:
                 content_parts.append("")
-                content_parts.append(f"Tags: {', '.join(tags[:10])}")
+                content_parts.append(
+                    f"Tags: {rendering.join_limited(dataservice.tags, 10)}"
+                )
 
             # Dates
-            if data.get("created_at"):
+            if dataservice.created_at:
                 content_parts.append("")
-                content_parts.append(f"Created: {data.get('created_at')}")
-            if data.get("last_update"):
-                content_parts.append(f"Last updated: {data.get('last_update')}")
+                content_parts.append(f"Created: {dataservice.created_at}")
+            if dataservice.last_update:
+                content_parts.append(f"Last updated: {dataservice.last_update}")
 
             # License
-            if data.get("license"):
+            if dataservice.license:
                 content_parts.append("")
-                content_parts.append(f"License: {data.get('license')}")
+                content_parts.append(f"License: {dataservice.license}")
 
             # Related datasets (API returns a link object, not a list)
-            datasets: dict[str, Any] = data.get("datasets", {})
-            if isinstance(datasets, dict) and datasets.get("total"):
+            if dataservice.datasets_total:
                 content_parts.append("")
-                content_parts.append(f"Related datasets: {datasets['total']}")
+                content_parts.append(f"Related datasets: {dataservice.datasets_total}")
 
-            return "\n".join(content_parts)
+            return tool_output.result(
+                content_parts,
+                {"dataservice": tool_output.dataservice_info(dataservice)},
+            )
 
         except httpx.HTTPStatusError as e:
+            prometheus.record_tool_error(e)
             if e.response.status_code == 404:
-                return f"Error: Third-party API not found (dataservice_id='{dataservice_id}')."
-            return f"Error: HTTP {e.response.status_code} - {str(e)}"
+                return tool_output.error(
+                    f"Error: Third-party API not found (dataservice_id='{dataservice_id}')."
+                )
+            return tool_output.error(f"Error: HTTP {e.response.status_code} - {str(e)}")
         except Exception as e:  # noqa: BLE001
-            return f"Error: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
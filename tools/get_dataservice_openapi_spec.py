@@ -1,35 +1,39 @@
 import logging
-from typing import Any
+from typing import Annotated, Any
 
 import httpx
 from mcp.server.fastmcp import FastMCP
-
-from helpers import datagouv_api_client
+from mcp.types import CallToolResult
+
+from helpers import (
+    datagouv_api_client,
+    openapi_spec_cache,
+    prometheus,
+    rendering,
+    tool_output,
+    worker_pool,
+)
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+from helpers.openapi_index import Operation, build_index
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
 
 def _summarize_parameters(params: list[dict[str, Any]]) -> str:
-    """Summarize OpenAPI parameters into a compact string."""
+    """Summarize indexed OpenAPI parameters into a compact string."""
     parts = []
     for p in params:
-        name = p.get("name", "?")
-        location = p.get("in", "")
-        required = p.get("required", False)
-        schema = p.get("schema", {})
-        ptype = schema.get("type", "")
-        marker = " (required)" if required else ""
-        parts.append(f"      - {name} [{location}, {ptype}]{marker}")
+        marker = " (required)" if p.get("required") else ""
+        parts.append(f"      - {p['name']} [{p['in']}, {p['type']}]{marker}")
     return "\n".join(parts)
 
 
 def _summarize_spec(spec: dict[str, Any]) -> str:
     """
-    Summarize an OpenAPI spec into a concise text representation.
-    Includes: API info, servers, and endpoints with parameters.
-    Skips: response schemas, model definitions, examples.
+    Summarize the general part of an OpenAPI spec into a concise text representation.
+    Includes: API info, servers and base URL. Endpoints are listed from the
+    spec index (see helpers.openapi_index), page by page.
     """
     parts: list[str] = []
 
@@ -40,8 +44,7 @@ def _summarize_spec(spec: dict[str, Any]) -> str:
     if info.get("version"):
         parts.append(f"Version: {info['version']}")
     if info.get("description"):
-        desc = info["description"][:300]
-        parts.append(f"Description: {desc}...")
+        parts.append(f"Description: {rendering.shorten(info['description'], 300)}")
 
     # Servers / base URL
     servers = spec.get("servers", [])
@@ -59,55 +62,58 @@ def _summarize_spec(spec: dict[str, Any]) -> str:
         base_path = spec.get("basePath", "")
         parts.append(f"\nBase URL: {scheme}://{spec['host']}{base_path}")
 
-    # Endpoints
-    paths = spec.get("paths", {})
-    if paths:
-        parts.append("")
-        parts.append(f"Endpoints ({len(paths)} paths):")
-        for path, methods in paths.items():
-            if not isinstance(methods, dict):
-                continue
-            for method, details in methods.items():
-                if method.startswith("x-") or method == "parameters":
-                    continue
-                if not isinstance(details, dict):
-                    continue
-                summary = details.get("summary", details.get("description", ""))
-                if summary:
-                    summary = summary.split("\n")[0][:120]
-                parts.append(f"  {method.upper()} {path}")
-                if summary:
-                    parts.append(f"    {summary}")
-                params = details.get("parameters", [])
-                if params:
-                    parts.append(_summarize_parameters(params))
-
     return "\n".join(parts)
 
 
+def _format_operations(operations: list[Operation]) -> list[str]:
+    parts: list[str] = []
+    for operation in operations:
+        parts.append(f"  {operation.method.upper()} {operation.path}")
+        if operation.summary:
+            parts.append(f"    {operation.summary}")
+        if operation.parameters:
+            parts.append(_summarize_parameters(operation.parameters))
+    return parts
+
+
 def register_get_dataservice_openapi_spec_tool(mcp: FastMCP) -> None:
     @mcp.tool(
         title="Get third-party API OpenAPI spec",
         annotations=READ_ONLY_EXTERNAL_API_TOOL,
     )
     @log_tool
-    async def get_dataservice_openapi_spec(dataservice_id: str) -> str:
+    async def get_dataservice_openapi_spec(
+        dataservice_id: str,
+        query: str | None = None,
+        tag: str | None = None,
+        path_prefix: str | None = None,
+        method: str | None = None,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> Annotated[CallToolResult, tool_output.OpenApiOutput]:
         """
         Fetch and summarize the OpenAPI/Swagger spec for a third-party API (dataservice).
 
         Retrieves machine_documentation_url from catalog metadata (dataservice record),
-        fetches the spec, and returns a summary of available endpoints with
-        their parameters. Use this to understand how to call the API.
+        fetches the spec, and returns the API info followed by one page of
+        endpoints with their parameters. Use this to understand how to call the API.
+
+        Large APIs have hundreds of endpoints: narrow them down with `query`
+        (keywords matched against path, summary, description and tags), `tag`
+        (one of the tags listed in the response), `path_prefix` (e.g. "/communes")
+        or `method` (e.g. "GET"), and use `page` to see more.
 
         Typical workflow: search_dataservices → get_dataservice_info →
         get_dataservice_openapi_spec → call the API using base_api_url per spec.
         """
         try:
-            data = await datagouv_api_client.get_dataservice_details(dataservice_id)
+            dataservice = await datagouv_api_client.get_dataservice_details(
+                dataservice_id
+            )
 
-            doc_url = data.get("machine_documentation_url")
-            base_api_url = data.get("base_api_url")
-            title = data.get("title", "Unknown")
+            doc_url = dataservice.machine_documentation_url
+            base_api_url = dataservice.base_api_url
+            title = dataservice.title
 
             if not doc_url:
                 msg = (
@@ -116,10 +122,18 @@ def register_get_dataservice_openapi_spec_tool(mcp: FastMCP) -> None:
                 )
                 if base_api_url:
                     msg += f" Base API URL is: {base_api_url}"
-                return msg
+                return tool_output.error(msg)
 
-            spec = await datagouv_api_client.fetch_openapi_spec(doc_url)
-            summary = _summarize_spec(spec)
+            cached = await openapi_spec_cache.get_spec(doc_url)
+            if cached.summary is None:
+                cached.summary = await worker_pool.run(
+                    "openapi_summary", _summarize_spec, cached.spec
+                )
+            if cached.index is None:
+                cached.index = await worker_pool.run(
+                    "openapi_index", build_index, cached.spec
+                )
+            index = cached.index
 
             content_parts = [
                 f"OpenAPI spec for: {title}",
@@ -128,13 +142,92 @@ def register_get_dataservice_openapi_spec_tool(mcp: FastMCP) -> None:
             if base_api_url:
                 content_parts.append(f"Base API URL: {base_api_url}")
             content_parts.append("")
-            content_parts.append(summary)
+            content_parts.append(cached.summary)
 
-            return "\n".join(content_parts)
+            if index.tag_counts:
+                tags = ", ".join(
+                    f"{name} ({count})" for name, count in index.tag_counts.items()
+                )
+                content_parts.append("")
+                content_parts.append(f"Tags: {tags}")
+
+            page = max(page, 1)
+            page_size = max(1, min(page_size, 100))
+            matching = index.search(
+                query=query, tag=tag, path_prefix=path_prefix, method=method
+            )
+            start = (page - 1) * page_size
+            operations = matching[start : start + page_size]
+
+            filters = [
+                f"{name}='{value}'"
+                for name, value in (
+                    ("query", query),
+                    ("tag", tag),
+                    ("path_prefix", path_prefix),
+                    ("method", method),
+                )
+                if value
+            ]
+            data: tool_output.OpenApiOutput = {
+                "dataservice_id": dataservice_id,
+                "title": title,
+                "source": doc_url,
+                "base_api_url": base_api_url,
+                "tags": dict(index.tag_counts),
+                "total": len(index.operations),
+                "matching": len(matching),
+                "page": page,
+                "page_size": page_size,
+                "next_page": tool_output.next_page(page, page_size, len(matching)),
+                "endpoints": [
+                    {
+                        "method": operation.method.upper(),
+                        "path": operation.path,
+                        "summary": operation.summary or None,
+                        "parameters": operation.parameters,
+                    }
+                    for operation in operations
+                ],
+            }
+            content_parts.append("")
+            if not operations:
+                content_parts.append(
+                    f"No endpoints found (page {page}, {len(matching)} matching"
+                    f" of {len(index.operations)} in total"
+                    + (f"; filters: {', '.join(filters)}" if filters else "")
+                    + ")."
+                )
+                return tool_output.result(content_parts, data)
+
+            content_parts.append(
+                f"Endpoints {start + 1}-{start + len(operations)} of {len(matching)}"
+                + (
+                    f" matching {', '.join(filters)} ({len(index.operations)} in total)"
+                    if filters
+                    else ""
+                )
+                + ":"
+            )
+            content_parts.extend(_format_operations(operations))
+            if start + len(operations) < len(matching):
+                content_parts.append("")
+                content_parts.append(
+                    f"More endpoints available. Use page={page + 1} to see the "
+                    "next page, or narrow down with query, tag, path_prefix or method."
+                )
+
+            return tool_output.result(
+                content_parts, data, rendering.narrower_page(page, page_size)
+            )
 
         except httpx.HTTPStatusError as e:
+            prometheus.record_tool_error(e)
             if e.response.status_code == 404:
-                return f"Error: Third-party API not found (dataservice_id='{dataservice_id}')."
-            return f"Error: HTTP {e.response.status_code} - {str(e)}"
+                return tool_output.error(
+                    f"Error: Third-party API not found (dataservice_id='{dataservice_id}')."
+                )
+            return tool_output.error(f"Error: HTTP {e.response.status_code} - {str(e)}")
         except Exception as e:  # noqa: BLE001
-            return f"Error fetching OpenAPI spec: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error fetching OpenAPI spec: {str(e)}")
@@ -1,7 +1,10 @@
+from typing import Annotated
+
 import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client, env_config
+from helpers import datagouv_api_client, env_config, prometheus, rendering, tool_output
 from helpers.logging import log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
 
@@ -12,7 +15,9 @@ def register_get_dataset_info_tool(mcp: FastMCP) -> None:
         annotations=READ_ONLY_EXTERNAL_API_TOOL,
     )
     @log_tool
-    async def get_dataset_info(dataset_id: str) -> str:
+    async def get_dataset_info(
+        dataset_id: str,
+    ) -> Annotated[CallToolResult, tool_output.DatasetOutput]:
         """
         Get detailed metadata about a specific dataset.
 
@@ -20,68 +25,77 @@ def register_get_dataset_info_tool(mcp: FastMCP) -> None:
         creation/update dates, and license information.
         """
         try:
-            # Get full dataset data from API v1 via helper
-            data = await datagouv_api_client.get_dataset_details(dataset_id)
-
-            content_parts = [f"Dataset Information: {data.get('title', 'Unknown')}", ""]
+            # API v2 links resources instead of embedding them: much lighter
+            dataset = await datagouv_api_client.get_dataset_summary(dataset_id)
+
+            url = (
+                f"{env_config.get_base_url('site')}datasets/{dataset.slug}/"
+                if dataset.slug
+                else None
+            )
+            content_parts = [f"Dataset Information: {dataset.title}", ""]
+
+            if dataset.id:
+                content_parts.append(f"ID: {dataset.id}")
+            if dataset.slug:
+                content_parts.append(f"Slug: {dataset.slug}")
+                content_parts.append(f"URL: {url}")
+
+            if dataset.description_short:
+                content_parts.append("")
+                content_parts.append(f"Description: {dataset.description_short}")
 
-            if data.get("id"):
-                content_parts.append(f"ID: {data.get('id')}")
-            if data.get("slug"):
-                content_parts.append(f"Slug: {data.get('slug')}")
+            description = dataset.description
+            if description and description != dataset.description_short:
+                content_parts.append("")
                 content_parts.append(
-                    f"URL: {env_config.get_base_url('site')}datasets/{data.get('slug')}/"
+                    f"Full description: {rendering.shorten(description, 500)}"
                 )
 
-            if data.get("description_short"):
+            org = dataset.organization
+            if org:
                 content_parts.append("")
-                content_parts.append(f"Description: {data.get('description_short')}")
+                content_parts.append(f"Organization: {org.name}")
+                if org.id:
+                    content_parts.append(f"  Organization ID: {org.id}")
 
-            description = data.get("description")
-            description_short = data.get("description_short")
-            if description and description != description_short:
+            if dataset.tags:
                 content_parts.append("")
-                content_parts.append(f"Full description: {description[:500]}...")
-
-            if data.get("organization"):
-                org = data.get("organization", {})
-                if isinstance(org, dict):
-                    content_parts.append("")
-                    content_parts.append(f"Organization: {org.get('name', 'Unknown')}")
-                    if org.get("id"):
-                        content_parts.append(f"  Organization ID: {org.get('id')}")
-
-            tags: list[str] = data.get("tags") or []
-            if tags:
-                content_parts.append("")
-                content_parts.append(f"Tags: {', '.join(tags[:10])}")
+                content_parts.append(
+                    f"Tags: {rendering.join_limited(dataset.tags, 10)}"
+                )
 
             # Resources info
-            resources = data.get("resources", [])
             content_parts.append("")
-            content_parts.append(f"Resources: {len(resources)} file(s)")
+            content_parts.append(f"Resources: {dataset.resources_total or 0} file(s)")
 
             # Dates
-            if data.get("created_at"):
+            if dataset.created_at:
                 content_parts.append("")
-                content_parts.append(f"Created: {data.get('created_at')}")
-            if data.get("last_update"):
-                content_parts.append(f"Last updated: {data.get('last_update')}")
+                content_parts.append(f"Created: {dataset.created_at}")
+            if dataset.last_update:
+                content_parts.append(f"Last updated: {dataset.last_update}")
 
             # License
-            if data.get("license"):
+            if dataset.license:
                 content_parts.append("")
-                content_parts.append(f"License: {data.get('license')}")
+                content_parts.append(f"License: {dataset.license}")
 
             # Frequency
-            if data.get("frequency"):
-                content_parts.append(f"Update frequency: {data.get('frequency')}")
+            if dataset.frequency:
+                content_parts.append(f"Update frequency: {dataset.frequency}")
 
-            return "\n".join(content_parts)
+            return tool_output.result(
+                content_parts, {"dataset": tool_output.dataset_info(dataset, url)}
+            )
 
         except httpx.HTTPStatusError as e:
+            prometheus.record_tool_error(e)
             if e.response.status_code == 404:
-                return f"Error: Dataset with ID '{dataset_id}' not found."
-            return f"Error: HTTP {e.response.status_code} - {str(e)}"
+                return tool_output.error(
+                    f"Error: Dataset with ID '{dataset_id}' not found."
+                )
+            return tool_output.error(f"Error: HTTP {e.response.status_code} - {str(e)}")
         except Exception as e:  # noqa: BLE001
-            return f"Error: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
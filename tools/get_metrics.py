@@ -1,14 +1,157 @@
+import asyncio
 import logging
-import os
+from typing import Annotated, Any
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client, metrics_api_client
+from helpers import (
+    datagouv_api_client,
+    metrics_api_client,
+    prometheus,
+    tool_output,
+)
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+from helpers.metrics_aggregation import MonthlyAggregator
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
+# Columns summed by full_history mode: (label, CSV column) pairs, in display order
+DATASET_COLUMNS = [
+    ("Visits", "monthly_visit"),
+    ("Downloads", "monthly_download_resource"),
+]
+RESOURCE_COLUMNS = [("Downloads", "monthly_download_resource")]
+
+
+def _format_change(change: float | None) -> str:
+    return f"{change:+.0%}" if change is not None else "-"
+
+
+def _format_history(
+    aggregator: MonthlyAggregator, columns: list[tuple[str, str]], noun: str
+) -> list[str]:
+    """Per-month totals with 3-month moving average and year-over-year change."""
+    months = aggregator.months()
+    if not months:
+        return [f"No metrics available for this {noun}."]
+    header = f"{'Month':<9}" + "".join(
+        f" {label:>12} {'3-mo avg':>10} {'YoY':>6}" for label, _ in columns
+    )
+    parts = [
+        f"Full history: {len(months)} months ({months[-1]} to {months[0]})",
+        "-" * len(header),
+        header,
+        "-" * len(header),
+    ]
+    for month in months:
+        line = f"{month:<9}"
+        for _, column in columns:
+            average = aggregator.moving_average(month, column)
+            average_text = f"{average:,.0f}" if average is not None else "-"
+            change = _format_change(aggregator.year_over_year(month, column))
+            line += f" {aggregator.total(month, column):>12,} {average_text:>10} {change:>6}"
+        parts.append(line)
+    parts.append("-" * len(header))
+    parts.append(
+        f"{'Total':<9}"
+        + "".join(
+            f" {aggregator.grand_total(column):>12,}{'':>18}" for _, column in columns
+        ).rstrip()
+    )
+    return parts
+
+
+def _format_monthly(
+    metrics: list[dict[str, Any]], columns: list[tuple[str, str]]
+) -> list[str]:
+    width = 20 + 20 * len(columns)
+    parts = [
+        "Monthly Statistics:",
+        "-" * width,
+        f"{'Month':<12}" + "".join(f" {label:<15}" for label, _ in columns),
+        "-" * width,
+    ]
+    totals = [0] * len(columns)
+    for entry in metrics:
+        month = entry.get("metric_month", "Unknown")
+        values = [entry.get(column, 0) or 0 for _, column in columns]
+        totals = [total + value for total, value in zip(totals, values)]
+        parts.append(f"{month:<12}" + "".join(f" {value:<15,}" for value in values))
+    parts.append("-" * width)
+    parts.append(f"{'Total':<12}" + "".join(f" {total:<15,}" for total in totals))
+    return parts
+
+
+def _format_section(
+    noun: str,
+    object_id: str,
+    meta: dict[str, Any] | BaseException,
+    metrics: list[dict[str, Any]] | MonthlyAggregator | BaseException,
+    columns: list[tuple[str, str]],
+) -> list[str]:
+    """Render one branch (dataset or resource); each of its calls may have failed."""
+    label = noun.capitalize()
+    if isinstance(meta, BaseException):
+        prometheus.record_tool_error(meta)
+        logger.warning("Could not fetch %s metadata: %s", noun, meta)
+        parts = [f"{label} Metrics"]
+    else:
+        parts = [f"{label} Metrics: {meta.get('title', 'Unknown')}"]
+    parts.extend([f"{label} ID: {object_id}", ""])
+
+    if isinstance(metrics, BaseException):
+        prometheus.record_tool_error(metrics)
+        logger.error("Error fetching %s metrics: %s", noun, metrics)
+        parts.append(f"Error fetching {noun} metrics: {str(metrics)}")
+    elif isinstance(metrics, MonthlyAggregator):
+        parts.extend(_format_history(metrics, columns, noun))
+    elif not metrics:
+        parts.append(f"No metrics available for this {noun}.")
+    else:
+        parts.extend(_format_monthly(metrics, columns))
+    return parts
+
+
+def _series(
+    object_id: str,
+    meta: dict[str, Any] | BaseException,
+    metrics: list[dict[str, Any]] | MonthlyAggregator | BaseException,
+    columns: list[tuple[str, str]],
+) -> tool_output.MetricsSeries:
+    """Structured counterpart of _format_section."""
+    series: tool_output.MetricsSeries = {
+        "id": object_id,
+        "title": None if isinstance(meta, BaseException) else meta.get("title"),
+    }
+    fields = [column for _, column in columns]
+    if isinstance(metrics, BaseException):
+        series["error"] = str(metrics)
+    elif isinstance(metrics, MonthlyAggregator):
+        series["months"] = [
+            {
+                "month": month,
+                "values": {f: metrics.total(month, f) for f in fields},
+                "moving_average": {f: metrics.moving_average(month, f) for f in fields},
+                "year_over_year": {f: metrics.year_over_year(month, f) for f in fields},
+            }
+            for month in metrics.months()
+        ]
+        series["totals"] = {f: metrics.grand_total(f) for f in fields}
+    else:
+        series["months"] = [
+            {
+                "month": str(entry.get("metric_month", "Unknown")),
+                "values": {f: entry.get(f, 0) or 0 for f in fields},
+            }
+            for entry in metrics
+        ]
+        series["totals"] = {
+            f: sum(entry.get(f, 0) or 0 for entry in metrics) for f in fields
+        }
+    return series
+
 
 def register_get_metrics_tool(mcp: FastMCP) -> None:
     @mcp.tool(
@@ -20,157 +163,99 @@ def register_get_metrics_tool(mcp: FastMCP) -> None:
         dataset_id: str | None = None,
         resource_id: str | None = None,
         limit: int = 12,
-    ) -> str:
+        full_history: bool = False,
+    ) -> Annotated[CallToolResult, tool_output.MetricsOutput]:
         """
         Get usage metrics (visits, downloads) for a dataset or resource.
 
         Returns monthly statistics sorted by most recent first.
         At least one of dataset_id or resource_id must be provided.
+        Set full_history=True to get every month since metrics began (limit is
+        then ignored), with 3-month moving averages and year-over-year changes.
         Note: Only available in production environment (not demo).
         """
-        # Check if we're in demo environment
-        current_env: str = os.getenv("DATAGOUV_API_ENV", "prod").strip().lower()
-        if current_env == "demo":
-            return (
-                "Error: The Metrics API is not available in the demo environment.\n"
-                "The Metrics API only exists in production. Please set DATAGOUV_API_ENV=prod "
-                "to use this tool, or switch to production environment to access metrics data."
-            )
+        demo_error = metrics_api_client.demo_environment_error()
+        if demo_error:
+            return tool_output.error(demo_error)
 
         if not dataset_id and not resource_id:
-            return "Error: At least one of dataset_id or resource_id must be provided."
+            return tool_output.error(
+                "Error: At least one of dataset_id or resource_id must be provided."
+            )
+
+        # Clean and validate IDs
+        if dataset_id is not None:
+            dataset_id = str(dataset_id).strip()
+            if not dataset_id:
+                return tool_output.error("Error: dataset_id cannot be empty.")
+        if resource_id is not None:
+            resource_id = str(resource_id).strip()
+            if not resource_id:
+                return tool_output.error("Error: resource_id cannot be empty.")
 
-        content_parts: list[str] = []
         limit = max(1, min(limit, 50))
 
+        # (noun, ID, columns, metadata getter) for each requested branch
+        branches: list[tuple[str, str, list[tuple[str, str]], Any]] = []
+        if dataset_id:
+            branches.append(
+                (
+                    "dataset",
+                    dataset_id,
+                    DATASET_COLUMNS,
+                    datagouv_api_client.get_dataset_metadata,
+                )
+            )
+        if resource_id:
+            branches.append(
+                (
+                    "resource",
+                    resource_id,
+                    RESOURCE_COLUMNS,
+                    datagouv_api_client.get_resource_metadata,
+                )
+            )
+
+        async def fetch_metrics(
+            model: str, object_id: str, columns: list[tuple[str, str]]
+        ) -> list[dict[str, Any]] | MonthlyAggregator:
+            if full_history:
+                return await metrics_api_client.aggregate_metrics_csv(
+                    model,
+                    object_id,
+                    [column for _, column in columns],
+                )
+            return await metrics_api_client.get_metrics(model, object_id, limit=limit)
+
         try:
-            if dataset_id:
-                # Clean and validate dataset_id
-                dataset_id = str(dataset_id).strip()
-                if not dataset_id:
-                    return "Error: dataset_id cannot be empty."
-
-                logger.debug(f"Fetching metrics for dataset_id: {dataset_id}")
-
-                # Get dataset metadata for context
-                try:
-                    dataset_meta = await datagouv_api_client.get_dataset_metadata(
-                        dataset_id
-                    )
-                    dataset_title = dataset_meta.get("title", "Unknown")
-                    content_parts.append(f"Dataset Metrics: {dataset_title}")
-                    content_parts.append(f"Dataset ID: {dataset_id}")
-                    content_parts.append("")
-                except Exception as e:  # noqa: BLE001
-                    logger.warning(f"Could not fetch dataset metadata: {e}")
-                    content_parts.append("Dataset Metrics")
-                    content_parts.append(f"Dataset ID: {dataset_id}")
-                    content_parts.append("")
-
-                # Get dataset metrics
-                try:
-                    logger.debug(
-                        f"Calling metrics_api_client.get_metrics with dataset_id: {dataset_id}"
-                    )
-                    metrics = await metrics_api_client.get_metrics(
-                        "datasets", dataset_id, limit=limit
-                    )
-                    logger.debug(
-                        f"Received {len(metrics) if metrics else 0} metric entries"
-                    )
-
-                    if not metrics:
-                        content_parts.append("No metrics available for this dataset.")
-                    else:
-                        content_parts.append("Monthly Statistics:")
-                        content_parts.append("-" * 60)
-                        content_parts.append(
-                            f"{'Month':<12} {'Visits':<15} {'Downloads':<15}"
-                        )
-                        content_parts.append("-" * 60)
-
-                        total_visits = 0
-                        total_downloads = 0
-                        for entry in metrics:
-                            month = entry.get("metric_month", "Unknown")
-                            visits = entry.get("monthly_visit", 0) or 0
-                            downloads = entry.get("monthly_download_resource", 0) or 0
-                            total_visits += visits
-                            total_downloads += downloads
-                            content_parts.append(
-                                f"{month:<12} {visits:<15,} {downloads:<15,}"
-                            )
-
-                        content_parts.append("-" * 60)
-                        content_parts.append(
-                            f"{'Total':<12} {total_visits:<15,} {total_downloads:<15,}"
-                        )
-                except Exception as e:  # noqa: BLE001
-                    logger.error(f"Error fetching dataset metrics: {e}")
-                    content_parts.append(f"Error fetching dataset metrics: {str(e)}")
-
-                if resource_id:
-                    content_parts.append("")
-                    content_parts.append("")
-
-            if resource_id:
-                # Clean and validate resource_id
-                resource_id = str(resource_id).strip()
-                if not resource_id:
-                    return "Error: resource_id cannot be empty."
-
-                logger.debug(f"Fetching metrics for resource_id: {resource_id}")
-
-                # Get resource metadata for context
-                try:
-                    resource_meta = await datagouv_api_client.get_resource_metadata(
-                        resource_id
-                    )
-                    resource_title = resource_meta.get("title", "Unknown")
-                    content_parts.append(f"Resource Metrics: {resource_title}")
-                    content_parts.append(f"Resource ID: {resource_id}")
-                    content_parts.append("")
-                except Exception as e:  # noqa: BLE001
-                    logger.warning(f"Could not fetch resource metadata: {e}")
-                    content_parts.append("Resource Metrics")
-                    content_parts.append(f"Resource ID: {resource_id}")
-                    content_parts.append("")
-
-                # Get resource metrics
-                try:
-                    logger.debug(
-                        f"Calling metrics_api_client.get_metrics with resource_id: {resource_id}"
-                    )
-                    metrics = await metrics_api_client.get_metrics(
-                        "resources", resource_id, limit=limit
-                    )
-                    logger.debug(
-                        f"Received {len(metrics) if metrics else 0} metric entries"
-                    )
-
-                    if not metrics:
-                        content_parts.append("No metrics available for this resource.")
-                    else:
-                        content_parts.append("Monthly Statistics:")
-                        content_parts.append("-" * 40)
-                        content_parts.append(f"{'Month':<12} {'Downloads':<15}")
-                        content_parts.append("-" * 40)
-
-                        total_downloads = 0
-                        for entry in metrics:
-                            month = entry.get("metric_month", "Unknown")
-                            downloads = entry.get("monthly_download_resource", 0) or 0
-                            total_downloads += downloads
-                            content_parts.append(f"{month:<12} {downloads:<15,}")
-
-                        content_parts.append("-" * 40)
-                        content_parts.append(f"{'Total':<12} {total_downloads:<15,}")
-                except Exception as e:  # noqa: BLE001
-                    logger.error(f"Error fetching resource metrics: {e}")
-                    content_parts.append(f"Error fetching resource metrics: {str(e)}")
-
-            return "\n".join(content_parts)
+            # Metadata and metrics of both branches are independent: fetch them
+            # all at once over the shared upstream clients, isolating failures
+            calls = []
+            for noun, object_id, columns, get_meta in branches:
+                logger.debug("Fetching metrics for %s_id: %s", noun, object_id)
+                calls.append(get_meta(object_id))
+                calls.append(fetch_metrics(f"{noun}s", object_id, columns))
+            results = await asyncio.gather(*calls, return_exceptions=True)
+
+            sections = [
+                _format_section(
+                    noun, object_id, results[2 * i], results[2 * i + 1], columns
+                )
+                for i, (noun, object_id, columns, _) in enumerate(branches)
+            ]
+            content_parts = sections[0]
+            for section in sections[1:]:
+                content_parts += ["", "", *section]
+            data: tool_output.MetricsOutput = {}
+            for i, (noun, object_id, columns, _) in enumerate(branches):
+                series = _series(object_id, results[2 * i], results[2 * i + 1], columns)
+                if noun == "dataset":
+                    data["dataset"] = series
+                else:
+                    data["resource"] = series
+            return tool_output.result(content_parts, data)
 
         except Exception as e:  # noqa: BLE001
+            prometheus.record_tool_error(e)
             logger.exception("Unexpected error in get_metrics")
-            return f"Error: {str(e)}"
+            return tool_output.error(f"Error: {str(e)}")
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from typing import Annotated, Any
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
+
+from helpers import (
+    datagouv_api_client,
+    metrics_api_client,
+    metrics_store,
+    prometheus,
+    tool_output,
+)
+from helpers.logging import MAIN_LOGGER_NAME, log_tool
+from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+
+logger = logging.getLogger(MAIN_LOGGER_NAME)
+
+# Organization-level fields of metric-api: (label, field) pairs, in display order
+_ORGANIZATION_FIELDS: list[tuple[str, str]] = [
+    ("Dataset visits", "monthly_visit_dataset"),
+    ("Downloads", "monthly_download_resource"),
+    ("Reuse visits", "monthly_visit_reuse"),
+]
+MAX_TOP_DATASETS: int = 50
+
+
+def register_get_organization_metrics_tool(mcp: FastMCP) -> None:
+    @mcp.tool(
+        title="Get organization usage metrics",
+        annotations=READ_ONLY_EXTERNAL_API_TOOL,
+    )
+    @log_tool
+    async def get_organization_metrics(
+        organization: str,
+        months: int = 12,
+        top: int = 10,
+    ) -> Annotated[CallToolResult, tool_output.OrganizationMetricsOutput]:
+        """
+        Get usage metrics for a whole organization's catalog in one call.
+
+        `organization` is an organization ID or slug (from search_organizations).
+        Returns the organization's monthly totals (dataset visits, resource
+        downloads, reuse visits) over the last `months` months (max: 50) and its
+        `top` most visited datasets (max: 50) in the latest complete month.
+        Use this instead of calling get_metrics on each of its datasets.
+        Note: Only available in production environment (not demo).
+        """
+        demo_error = metrics_api_client.demo_environment_error()
+        if demo_error:
+            return tool_output.error(demo_error)
+
+        organization = str(organization).strip()
+        if not organization:
+            return tool_output.error("Error: organization cannot be empty.")
+        months = max(1, min(months, metrics_api_client.MAX_PAGE_SIZE))
+        top = max(1, min(top, MAX_TOP_DATASETS))
+        ranked_month = metrics_store.latest_closed_month()
+
+        try:
+            org = await datagouv_api_client.get_organization_details(organization)
+        except httpx.HTTPStatusError as e:
+            prometheus.record_tool_error(e)
+            if e.response.status_code == 404:
+                return tool_output.error(
+                    f"Error: Organization '{organization}' not found."
+                )
+            return tool_output.error(f"Error: {str(e)}")
+        except Exception as e:  # noqa: BLE001
+            prometheus.record_tool_error(e)
+            logger.exception("Unexpected error in get_organization_metrics")
+            return tool_output.error(f"Error: {str(e)}")
+
+        org_id = str(org.get("id") or organization)
+        monthly, top_datasets = await asyncio.gather(
+            metrics_api_client.get_metrics("organizations", org_id, limit=months),
+            metrics_api_client.get_top_metrics(
+                "datasets",
+                filter_field="organization_id",
+                filter_value=org_id,
+                sort_field="monthly_visit",
+                month=ranked_month,
+                limit=top,
+            ),
+            return_exceptions=True,
+        )
+
+        title = org.get("name") or "Unknown"
+        if org.get("acronym"):
+            title = f"{title} ({org['acronym']})"
+        content_parts = [
+            f"Organization Metrics: {title}",
+            f"Organization ID: {org_id}",
+        ]
+        catalog = org.get("metrics") or {}
+        catalog_bits = [
+            f"{key}={catalog[key]}"
+            for key in ("datasets", "reuses", "dataservices", "followers")
+            if catalog.get(key) is not None
+        ]
+        if catalog_bits:
+            content_parts.append(f"Catalog: {', '.join(catalog_bits)}")
+        content_parts.append("")
+
+        content_parts.extend(_format_monthly(monthly))
+        content_parts.append("")
+        content_parts.extend(_format_top_datasets(top_datasets, ranked_month))
+
+        data: tool_output.OrganizationMetricsOutput = {
+            "organization": {
+                "id": org_id,
+                "name": org.get("name") or "Unknown",
+                "acronym": org.get("acronym"),
+                "metrics": {
+                    key: value
+                    for key, value in catalog.items()
+                    if isinstance(value, int)
+                },
+            },
+            "top_month": ranked_month,
+        }
+        failures = [
+            f"{label}: {result}"
+            for label, result in (
+                ("monthly metrics", monthly),
+                ("top datasets", top_datasets),
+            )
+            if isinstance(result, BaseException)
+        ]
+        if failures:
+            data["error"] = "; ".join(failures)
+        if not isinstance(monthly, BaseException):
+            fields = [field for _, field in _ORGANIZATION_FIELDS]
+            data["months"] = [
+                {
+                    "month": str(record.get("metric_month", "Unknown"))[:7],
+                    "values": {field: record.get(field, 0) or 0 for field in fields},
+                }
+                for record in monthly
+            ]
+            data["totals"] = {
+                field: sum(record.get(field, 0) or 0 for record in monthly)
+                for field in fields
+            }
+        if not isinstance(top_datasets, BaseException):
+            data["top_datasets"] = [
+                {
+                    "rank": rank,
+                    "dataset_id": str(record.get("dataset_id", "")),
+                    "visits": record.get("monthly_visit", 0) or 0,
+                    "downloads": record.get("monthly_download_resource", 0) or 0,
+                }
+                for rank, record in enumerate(top_datasets, 1)
+            ]
+        return tool_output.result(content_parts, data)
+
+
+def _format_monthly(monthly: list[dict[str, Any]] | BaseException) -> list[str]:
+    if isinstance(monthly, BaseException):
+        prometheus.record_tool_error(monthly)
+        logger.error("Error fetching organization metrics: %s", monthly)
+        return [f"Error fetching organization metrics: {str(monthly)}"]
+    if not monthly:
+        return ["No metrics available for this organization."]
+
+    fields = [
+        (label, field)
+        for label, field in _ORGANIZATION_FIELDS
+        if any(record.get(field) is not None for record in monthly)
+    ]
+    header = f"{'Month':<9}" + "".join(f" {label:>15}" for label, _ in fields)
+    parts = ["Monthly Statistics (whole catalog):", "-" * len(header), header]
+    parts.append("-" * len(header))
+    for record in monthly:
+        month = str(record.get("metric_month", "Unknown"))[:7]
+        parts.append(
+            f"{month:<9}"
+            + "".join(f" {record.get(field, 0) or 0:>15,}" for _, field in fields)
+        )
+    parts.append("-" * len(header))
+    parts.append(
+        f"{'Total':<9}"
+        + "".join(
+            f" {sum(r.get(field, 0) or 0 for r in monthly):>15,}" for _, field in fields
+        )
+    )
+    return parts
+
+
+def _format_top_datasets(
+    top_datasets: list[dict[str, Any]] | BaseException, month: str
+) -> list[str]:
+    if isinstance(top_datasets, BaseException):
+        prometheus.record_tool_error(top_datasets)
+        logger.error("Error fetching top datasets: %s", top_datasets)
+        return [f"Error fetching top datasets: {str(top_datasets)}"]
+    if not top_datasets:
+        return [f"No dataset metrics available for {month}."]
+
+    header = f"{'Rank':<6} {'Dataset ID':<26} {'Visits':>12} {'Downloads':>12}"
+    parts = [f"Top {len(top_datasets)} dataset(s) by visits in {month}:", header]
+    parts.append("-" * len(header))
+    for rank, record in enumerate(top_datasets, 1):
+        visits = record.get("monthly_visit", 0) or 0
+        downloads = record.get("monthly_download_resource", 0) or 0
+        parts.append(
+            f"{rank:<6} {str(record.get('dataset_id', '')):<26} "
+            f"{visits:>12,} {downloads:>12,}"
+        )
+    parts.append("")
+    parts.append("Use get_dataset_info with a dataset ID for its title and details.")
+    return parts
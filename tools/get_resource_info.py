@@ -1,9 +1,21 @@
+from typing import Annotated
+
 import httpx
 from mcp.server.fastmcp import FastMCP
-
-from helpers import crawler_api_client, datagouv_api_client, env_config
+from mcp.types import CallToolResult
+
+from helpers import (
+    crawler_api_client,
+    datagouv_api_client,
+    env_config,
+    http_clients,
+    prometheus,
+    tool_output,
+    upstream,
+)
 from helpers.logging import log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+from helpers.models import Resource
 
 
 def register_get_resource_info_tool(mcp: FastMCP) -> None:
@@ -12,7 +24,9 @@ def register_get_resource_info_tool(mcp: FastMCP) -> None:
         annotations=READ_ONLY_EXTERNAL_API_TOOL,
     )
     @log_tool
-    async def get_resource_info(resource_id: str) -> str:
+    async def get_resource_info(
+        resource_id: str,
+    ) -> Annotated[CallToolResult, tool_output.ResourceOutput]:
         """
         Get detailed information about a specific resource (file).
 
@@ -23,60 +37,54 @@ def register_get_resource_info_tool(mcp: FastMCP) -> None:
         try:
             # Get full resource data from API v2
             resource_data = await datagouv_api_client.get_resource_details(resource_id)
-            resource = resource_data.get("resource", {})
-            if not resource.get("id"):
-                return f"Error: Resource with ID '{resource_id}' not found."
-
-            resource_title = resource.get("title") or resource.get("name") or "Unknown"
+            resource = Resource.from_api(
+                resource_data.get("resource", {}), resource_data.get("dataset_id")
+            )
+            if not resource.id:
+                return tool_output.error(
+                    f"Error: Resource with ID '{resource_id}' not found."
+                )
 
+            data: tool_output.ResourceOutput = {
+                "resource": tool_output.resource_info(resource),
+                "description": resource.description,
+                "dataset_title": None,
+                "tabular_api_available": None,
+            }
             content_parts = [
-                f"Resource Information: {resource_title}",
+                f"Resource Information: {resource.title or 'Unknown'}",
                 "",
                 f"Resource ID: {resource_id}",
             ]
 
-            if resource.get("format"):
-                content_parts.append(f"Format: {resource.get('format')}")
-
-            if resource.get("filesize"):
-                size = resource.get("filesize")
-                if isinstance(size, int):
-                    # Format size in human-readable format
-                    if size < 1024:
-                        size_str = f"{size} B"
-                    elif size < 1024 * 1024:
-                        size_str = f"{size / 1024:.1f} KB"
-                    elif size < 1024 * 1024 * 1024:
-                        size_str = f"{size / (1024 * 1024):.1f} MB"
-                    else:
-                        size_str = f"{size / (1024 * 1024 * 1024):.1f} GB"
-                    content_parts.append(f"Size: {size_str}")
-
-            if resource.get("mime"):
-                content_parts.append(f"MIME type: {resource.get('mime')}")
-
-            if resource.get("type"):
-                content_parts.append(f"Type: {resource.get('type')}")
+            if resource.format:
+                content_parts.append(f"Format: {resource.format}")
+            if resource.size_label:
+                content_parts.append(f"Size: {resource.size_label}")
+            if resource.mime:
+                content_parts.append(f"MIME type: {resource.mime}")
+            if resource.type:
+                content_parts.append(f"Type: {resource.type}")
 
-            if resource.get("url"):
+            if resource.url:
                 content_parts.append("")
-                content_parts.append(f"URL: {resource.get('url')}")
+                content_parts.append(f"URL: {resource.url}")
 
-            if resource.get("description"):
+            if resource.description:
                 content_parts.append("")
-                content_parts.append(f"Description: {resource.get('description')}")
+                content_parts.append(f"Description: {resource.description}")
 
             # Dataset information
-            dataset_id = resource_data.get("dataset_id")
-            if dataset_id:
+            if resource.dataset_id:
                 content_parts.append("")
-                content_parts.append(f"Dataset ID: {dataset_id}")
+                content_parts.append(f"Dataset ID: {resource.dataset_id}")
                 try:
-                    dataset_meta = await datagouv_api_client.get_dataset_metadata(
-                        str(dataset_id)
+                    dataset = await datagouv_api_client.get_dataset_summary(
+                        resource.dataset_id
                     )
-                    if dataset_meta.get("title"):
-                        content_parts.append(f"Dataset: {dataset_meta.get('title')}")
+                    if dataset.id:
+                        data["dataset_title"] = dataset.title
+                        content_parts.append(f"Dataset: {dataset.title}")
                 except Exception:  # noqa: BLE001
                     pass
 
@@ -91,27 +99,34 @@ def register_get_resource_info_tool(mcp: FastMCP) -> None:
 
                 # Try to get profile to check if it's tabular
                 profile_url = f"{env_config.get_base_url('tabular_api')}resources/{resource_id}/profile/"
-                async with httpx.AsyncClient() as session:
-                    resp = await session.get(profile_url, timeout=10.0)
-                    if resp.status_code == 200:
-                        if is_exception:
-                            content_parts.append(
-                                "✅ Available via Tabular API (large file exception)"
-                            )
-                        else:
-                            content_parts.append(
-                                "✅ Available via Tabular API (can be queried)"
-                            )
+                resp = await upstream.get(
+                    http_clients.client("tabular_api"),
+                    profile_url,
+                    upstream="tabular_api",
+                    timeout=10.0,
+                )
+                data["tabular_api_available"] = resp.status_code == 200
+                if resp.status_code == 200:
+                    if is_exception:
+                        content_parts.append(
+                            "✅ Available via Tabular API (large file exception)"
+                        )
                     else:
                         content_parts.append(
-                            "⚠️  Not available via Tabular API (may not be tabular data)"
+                            "✅ Available via Tabular API (can be queried)"
                         )
+                else:
+                    content_parts.append(
+                        "⚠️  Not available via Tabular API (may not be tabular data)"
+                    )
             except Exception:  # noqa: BLE001
                 content_parts.append("⚠️  Could not check Tabular API availability")
 
-            return "\n".join(content_parts)
+            return tool_output.result(content_parts, data)
 
         except httpx.HTTPStatusError as e:
-            return f"Error: HTTP {e.response.status_code} - {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: HTTP {e.response.status_code} - {str(e)}")
         except Exception as e:  # noqa: BLE001
-            return f"Error: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
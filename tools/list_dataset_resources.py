@@ -1,8 +1,13 @@
+import asyncio
+from typing import Annotated
+
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client
+from helpers import datagouv_api_client, prometheus, rendering, tool_output
 from helpers.logging import log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+from helpers.models import Resource
 
 
 def register_list_dataset_resources_tool(mcp: FastMCP) -> None:
@@ -11,66 +16,130 @@ def register_list_dataset_resources_tool(mcp: FastMCP) -> None:
         annotations=READ_ONLY_EXTERNAL_API_TOOL,
     )
     @log_tool
-    async def list_dataset_resources(dataset_id: str) -> str:
+    async def list_dataset_resources(
+        dataset_id: str,
+        page: int = 1,
+        page_size: int = 50,
+        type: str | None = None,
+        format: str | None = None,
+        query: str | None = None,
+    ) -> Annotated[CallToolResult, tool_output.ResourceListOutput]:
         """
-        List all resources (files) in a dataset with their metadata.
+        List the resources (files) of a dataset with their metadata, page by page.
 
-        Returns resource ID, title, format, size, and URL for each file.
+        Returns resource ID, title, format, size, and URL for each file, with the
+        total number of resources and a hint for the next page (page_size max: 100).
+        Narrow large datasets with `type` (main, documentation, update, api, code,
+        other), `query` (words in the resource title) and `format` (e.g. csv;
+        applied to the resources of the current page).
         Next step: use query_resource_data for CSV/XLSX files via the Tabular API,
         or fetch the resource URL directly for other formats (JSON, JSONL) or large datasets.
         """
         try:
-            dataset = await datagouv_api_client.get_dataset_details(dataset_id)
-            resources = dataset.get("resources", [])
+            page = max(page, 1)
+            page_size = max(1, min(page_size, 100))
+            dataset, listing = await asyncio.gather(
+                datagouv_api_client.get_dataset_summary(dataset_id),
+                datagouv_api_client.list_dataset_resources(
+                    dataset_id,
+                    page=page,
+                    page_size=page_size,
+                    resource_type=type,
+                    query=query,
+                ),
+            )
 
-            if not dataset.get("id"):
-                return f"Error: Dataset with ID '{dataset_id}' not found."
+            if not dataset.id:
+                return tool_output.error(
+                    f"Error: Dataset with ID '{dataset_id}' not found."
+                )
 
-            dataset_title = dataset.get("title", "Unknown")
+            total = listing["total"]
+            resources = [Resource.from_api(r) for r in listing["data"]]
 
             content_parts = [
-                f"Resources in dataset: {dataset_title}",
+                f"Resources in dataset: {dataset.title}",
                 f"Dataset ID: {dataset_id}",
-                f"Total resources: {len(resources)}\n",
             ]
+            filters = [
+                f"{name}={value}"
+                for name, value in (("type", type), ("query", query))
+                if value
+            ]
+            if filters:
+                overall = dataset.resources_total
+                suffix = f" (out of {overall})" if overall is not None else ""
+                content_parts.append(
+                    f"Resources matching {', '.join(filters)}: {total}{suffix}"
+                )
+            else:
+                content_parts.append(f"Total resources: {total}")
+            if total > page_size:
+                last_page = (total + page_size - 1) // page_size
+                content_parts.append(f"Page {page} of {last_page}")
+            content_parts[-1] += "\n"
+
+            if format:
+                wanted = format.strip().lower().lstrip(".")
+                on_page = len(resources)
+                resources = [r for r in resources if (r.format or "").lower() == wanted]
+                content_parts.append(
+                    f"{len(resources)} of the {on_page} resources on this page "
+                    f"have format {wanted}.\n"
+                )
 
             if not resources:
-                content_parts.append("This dataset has no resources.")
-                return "\n".join(content_parts)
+                if total == 0:
+                    content_parts.append(
+                        "No resources match these filters."
+                        if filters
+                        else "This dataset has no resources."
+                    )
+                elif not format:
+                    content_parts.append(f"No resources on page {page}.")
 
-            for i, resource in enumerate(resources, 1):
-                resource_id = resource.get("id")
-                if not resource_id:
+            first = (page - 1) * page_size + 1
+            for i, resource in enumerate(resources, first):
+                if not resource.id:
                     continue
-                resource_title = resource.get("title") or resource.get("name")
-                content_parts.append(f"{i}. {resource_title or 'Untitled'}")
-                content_parts.append(f"   Resource ID: {resource_id}")
-
-                if resource.get("format"):
-                    content_parts.append(f"   Format: {resource.get('format')}")
-                if resource.get("filesize"):
-                    size = resource.get("filesize")
-                    if isinstance(size, int):
-                        # Format size in human-readable format
-                        if size < 1024:
-                            size_str = f"{size} B"
-                        elif size < 1024 * 1024:
-                            size_str = f"{size / 1024:.1f} KB"
-                        elif size < 1024 * 1024 * 1024:
-                            size_str = f"{size / (1024 * 1024):.1f} MB"
-                        else:
-                            size_str = f"{size / (1024 * 1024 * 1024):.1f} GB"
-                        content_parts.append(f"   Size: {size_str}")
-                if resource.get("mime"):
-                    content_parts.append(f"   MIME type: {resource.get('mime')}")
-                if resource.get("type"):
-                    content_parts.append(f"   Type: {resource.get('type')}")
-                if resource.get("url"):
-                    content_parts.append(f"   URL: {resource.get('url')}")
-
+                content_parts.append(f"{i}. {resource.title or 'Untitled'}")
+                content_parts.append(f"   Resource ID: {resource.id}")
+                if resource.format:
+                    content_parts.append(f"   Format: {resource.format}")
+                if resource.size_label:
+                    content_parts.append(f"   Size: {resource.size_label}")
+                if resource.mime:
+                    content_parts.append(f"   MIME type: {resource.mime}")
+                if resource.type:
+                    content_parts.append(f"   Type: {resource.type}")
+                if resource.url:
+                    content_parts.append(f"   URL: {resource.url}")
                 content_parts.append("")
 
-            return "\n".join(content_parts)
+            if listing["next_page"]:
+                content_parts.append(
+                    f"More resources available. Use page={page + 1} to see the next "
+                    f"{page_size}."
+                )
+
+            data: tool_output.ResourceListOutput = {
+                "dataset_id": dataset_id,
+                "dataset_title": dataset.title,
+                "total": total,
+                "resources_total": dataset.resources_total,
+                "page": page,
+                "page_size": page_size,
+                "next_page": page + 1 if listing["next_page"] else None,
+                "resources": [
+                    tool_output.resource_info(resource)
+                    for resource in resources
+                    if resource.id
+                ],
+            }
+            return tool_output.result(
+                content_parts, data, rendering.narrower_page(page, page_size)
+            )
 
         except Exception as e:  # noqa: BLE001
-            return f"Error: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
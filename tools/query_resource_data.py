@@ -1,15 +1,100 @@
 import logging
+from typing import Annotated, Any
 
 import httpx
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client, tabular_api_client
+from helpers import (
+    continuation,
+    datagouv_api_client,
+    prometheus,
+    rendering,
+    tabular_api_client,
+    tool_output,
+)
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
+from helpers.models import TabularPage
 
 logger = logging.getLogger(MAIN_LOGGER_NAME)
 
 
+_OPERATORS = (
+    "exact",
+    "contains",
+    "less",
+    "greater",
+    "strictly_less",
+    "strictly_greater",
+)
+
+
+async def _plan_query(
+    resource_id: str,
+    page: int,
+    page_size: int,
+    filter_column: str | None,
+    filter_value: str | None,
+    filter_operator: str,
+    sort_column: str | None,
+    sort_direction: str,
+) -> dict[str, Any] | str:
+    """
+    Validate the arguments and resolve the display context of a first call.
+
+    Returns the query plan carried by continuation tokens, or an error message.
+    """
+    filter_operator = filter_operator.lower()
+    sort_direction = sort_direction.lower()
+    has_filter = bool(filter_column) and filter_value is not None
+    if has_filter and filter_operator not in _OPERATORS:
+        supported = ", ".join(sorted(_OPERATORS))
+        return f"Error: invalid filter_operator. Supported values: {supported}."
+    if sort_column and sort_direction not in {"asc", "desc"}:
+        return "Error: invalid sort_direction. Supported values: asc, desc."
+
+    # Get resource metadata to display context
+    try:
+        resource_metadata = await datagouv_api_client.get_resource_metadata(resource_id)
+        resource_title = resource_metadata.get("title", "Unknown")
+        dataset_id = resource_metadata.get("dataset_id")
+    except Exception:  # noqa: BLE001
+        resource_title = "Unknown"
+        dataset_id = None
+
+    # Get dataset title if available
+    dataset_title = "Unknown"
+    if dataset_id:
+        try:
+            dataset = await datagouv_api_client.get_dataset_summary(str(dataset_id))
+            dataset_title = dataset.title
+        except Exception:  # noqa: BLE001
+            pass
+
+    # Filter and sort parameters of the Tabular API
+    api_params: dict[str, str] = {}
+    if has_filter:
+        api_params[f"{filter_column}__{filter_operator}"] = str(filter_value)
+    if sort_column:
+        api_params[f"{sort_column}__sort"] = sort_direction
+
+    return {
+        "resource_id": resource_id,
+        "page": page,
+        # Clamp page_size to the valid range
+        "page_size": max(1, min(page_size, 200)),
+        "params": api_params,
+        "filter": (
+            f"{filter_column} {filter_operator} {filter_value}" if has_filter else None
+        ),
+        "sort": f"{sort_column} ({sort_direction})" if sort_column else None,
+        "resource_title": resource_title,
+        "dataset_id": str(dataset_id) if dataset_id else None,
+        "dataset_title": dataset_title,
+    }
+
+
 def register_query_resource_data_tool(mcp: FastMCP) -> None:
     @mcp.tool(
         title="Query resource data",
@@ -17,7 +102,7 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
     )
     @log_tool
     async def query_resource_data(
-        resource_id: str,
+        resource_id: str | None = None,
         page: int = 1,
         page_size: int = 20,
         filter_column: str | None = None,
@@ -25,7 +110,8 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
         filter_operator: str = "exact",
         sort_column: str | None = None,
         sort_direction: str = "asc",
-    ) -> str:
+        cursor: str | None = None,
+    ) -> Annotated[CallToolResult, tool_output.TabularOutput]:
         """
         Query tabular data from a resource via the Tabular API (no download needed).
 
@@ -34,90 +120,69 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
         Filter operators: exact, contains, less, greater, strictly_less, strictly_greater.
         For large datasets requiring full analysis, paginate through pages or use
         get_resource_info to retrieve the raw file URL and fetch it directly.
+        To get the next page, pass only the `cursor` returned with this one: it
+        keeps the filters and skips the metadata lookups. resource_id is required
+        without a cursor, or when the cursor has expired (it is then ignored).
         """
         try:
-            filter_operator = filter_operator.lower()
-            sort_direction = sort_direction.lower()
-
-            operator_map = {
-                "exact": "exact",
-                "contains": "contains",
-                "less": "less",
-                "greater": "greater",
-                "strictly_less": "strictly_less",
-                "strictly_greater": "strictly_greater",
-            }
-            if filter_column and filter_value is not None:
-                if filter_operator not in operator_map:
-                    supported = ", ".join(sorted(operator_map.keys()))
-                    return (
-                        "Error: invalid filter_operator. "
-                        f"Supported values: {supported}."
+            plan = continuation.resume("query_resource_data", cursor)
+            if plan is None:
+                if not resource_id:
+                    return tool_output.error(
+                        "Error: resource_id is required "
+                        "(cursor is missing or no longer valid)."
                     )
-
-            if sort_column and sort_direction not in {"asc", "desc"}:
-                return "Error: invalid sort_direction. Supported values: asc, desc."
-
-            # Get resource metadata to display context
-            try:
-                resource_metadata = await datagouv_api_client.get_resource_metadata(
-                    resource_id
+                plan = await _plan_query(
+                    resource_id,
+                    page,
+                    page_size,
+                    filter_column,
+                    filter_value,
+                    filter_operator,
+                    sort_column,
+                    sort_direction,
                 )
-                resource_title = resource_metadata.get("title", "Unknown")
-                dataset_id = resource_metadata.get("dataset_id")
-            except Exception:  # noqa: BLE001
-                resource_title = "Unknown"
-                dataset_id = None
-
-            # Get dataset title if available
-            dataset_title = "Unknown"
-            if dataset_id:
-                try:
-                    dataset_metadata = await datagouv_api_client.get_dataset_metadata(
-                        str(dataset_id)
-                    )
-                    dataset_title = dataset_metadata.get("title", "Unknown")
-                except Exception:  # noqa: BLE001
-                    pass
+                if isinstance(plan, str):
+                    return tool_output.error(plan)
+
+            resource_id = plan["resource_id"]
+            page = plan["page"]
+            page_size = plan["page_size"]
+            api_params = plan["params"]
+            resource_title = plan["resource_title"]
+            dataset_id = plan["dataset_id"]
 
+            data: tool_output.TabularOutput = {
+                "resource_id": resource_id,
+                "resource_title": resource_title,
+                "dataset_id": dataset_id,
+            }
             content_parts = [
                 f"Querying resource: {resource_title}",
                 f"Resource ID: {resource_id}",
             ]
             if dataset_id:
-                content_parts.append(f"Dataset: {dataset_title} (ID: {dataset_id})")
+                content_parts.append(
+                    f"Dataset: {plan['dataset_title']} (ID: {dataset_id})"
+                )
             content_parts.append("")
 
             # Show applied filters if any
-            if filter_column and filter_value is not None:
-                content_parts.append(
-                    f"Filter: {filter_column} {filter_operator} {filter_value}"
-                )
-            if sort_column:
-                content_parts.append(f"Sort: {sort_column} ({sort_direction})")
-            if filter_column or sort_column:
+            if plan["filter"]:
+                content_parts.append(f"Filter: {plan['filter']}")
+            if plan["sort"]:
+                content_parts.append(f"Sort: {plan['sort']}")
+            if plan["filter"] or plan["sort"]:
                 content_parts.append("")
 
-            # Fetch data via the Tabular API (clamp page_size to valid range)
-            page_size = max(1, min(page_size, 200))
-
-            # Build filter and sort parameters for Tabular API
-            api_params = {}
-
-            # Add filter if provided
-            if filter_column and filter_value is not None:
-                operator = operator_map[filter_operator]
-                param_key = f"{filter_column}__{operator}"
-                api_params[param_key] = filter_value
-
-            # Add sort if provided
-            if sort_column:
-                api_params[f"{sort_column}__sort"] = sort_direction
-
             logger.info(
-                f"Querying Tabular API for resource: {resource_title} "
-                f"(ID: {resource_id}), page: {page}, page_size: {page_size}, "
-                f"filters: {api_params}"
+                "Querying Tabular API for resource: %s (ID: %s), page: %s, "
+                "page_size: %s, filters: %s",
+                resource_title,
+                resource_id,
+                page,
+                page_size,
+                api_params,
             )
 
             try:
@@ -127,36 +192,43 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
                     page_size=page_size,
                     params=api_params if api_params else None,
                 )
-                rows = tabular_data.get("data", [])
-                meta = tabular_data.get("meta", {})
-                total_count = meta.get("total")
-                page_info = meta.get("page")
-                page_size_meta = meta.get("page_size")
+                result = TabularPage.from_api(tabular_data, page)
+                rows = result.rows
+                total_count = result.total
+                next_cursor = (
+                    continuation.encode(
+                        "query_resource_data", {**plan, "page": page + 1}
+                    )
+                    if result.has_next
+                    else None
+                )
+                data.update(
+                    total=total_count,
+                    page=result.page,
+                    page_size=result.page_size,
+                    next_page=page + 1 if result.has_next else None,
+                    next_cursor=next_cursor,
+                    columns=result.columns,
+                    rows=rows,
+                )
 
                 if not rows:
                     content_parts.append(
                         "⚠️  No rows available (resource may be empty or filtered)."
                     )
-                    return "\n".join(content_parts)
+                    return tool_output.result(content_parts, data)
 
                 if total_count is not None:
                     content_parts.append(f"Total rows (Tabular API): {total_count}")
-                    # Calculate total pages
-                    if page_size_meta and page_size_meta > 0:
-                        total_pages = (
-                            total_count + page_size_meta - 1
-                        ) // page_size_meta
+                    if result.total_pages is not None:
                         content_parts.append(
-                            f"Total pages: {total_pages} (page size: {page_size_meta})"
+                            f"Total pages: {result.total_pages} "
+                            f"(page size: {result.page_size})"
                         )
                 content_parts.append(
-                    f"Retrieved: {len(rows)} row(s) from page {page_info or page}"
+                    f"Retrieved: {len(rows)} row(s) from page {result.page}"
                 )
-
-                # Show column names
-                if rows:
-                    columns = [str(k) if k is not None else "" for k in rows[0].keys()]
-                    content_parts.append(f"Columns: {', '.join(columns)}")
+                content_parts.append(f"Columns: {', '.join(result.columns)}")
 
                 # Show all retrieved data
                 content_parts.append("")
@@ -167,13 +239,12 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
                 for i, row in enumerate(rows, 1):
                     content_parts.append(f"  Row {i}:")
                     for key, value in row.items():
-                        val_str = str(value) if value is not None else ""
-                        if len(val_str) > 100:
-                            val_str = val_str[:100] + "..."
+                        val_str = rendering.shorten(
+                            str(value) if value is not None else "", 100
+                        )
                         content_parts.append(f"    {key}: {val_str}")
 
-                links = tabular_data.get("links", {})
-                if links.get("next"):
+                if result.has_next:
                     next_page = page + 1
                     content_parts.append("")
 
@@ -188,28 +259,45 @@ def register_query_resource_data_tool(mcp: FastMCP) -> None:
                         content_parts.append(
                             f"📄 More data available. Use page={next_page} to see the next page."
                         )
+                    content_parts.append(
+                        f"Cursor for page {next_page} (same query): {next_cursor}"
+                    )
 
             except tabular_api_client.ResourceNotAvailableError as e:
-                logger.warning(f"Resource not available: {resource_id} - {str(e)}")
+                prometheus.record_tool_error(e)
+                logger.warning("Resource not available: %s - %s", resource_id, e)
+                data["error"] = str(e)
                 content_parts.append(f"⚠️  {str(e)}")
             except tabular_api_client.TabularApiRequestError as e:
-                logger.warning(f"Tabular API request failed: {resource_id} - {str(e)}")
+                prometheus.record_tool_error(e)
+                logger.warning("Tabular API request failed: %s - %s", resource_id, e)
+                data["error"] = str(e)
                 content_parts.append(f"⚠️  {str(e)}")
             except httpx.HTTPStatusError as e:
+                prometheus.record_tool_error(e)
                 error_details = f"HTTP {e.response.status_code}: {str(e)}"
                 if e.request:
                     error_details += f" - URL: {e.request.url}"
                 logger.warning(
-                    f"Tabular API HTTP error for resource {resource_id}: {error_details}"
+                    "Tabular API HTTP error for resource %s: %s",
+                    resource_id,
+                    error_details,
                 )
+                data["error"] = f"Tabular API error ({error_details})"
                 content_parts.append(f"❌ Tabular API error ({error_details})")
             except Exception as e:  # noqa: BLE001
-                logger.exception(f"Unexpected error querying resource {resource_id}")
+                prometheus.record_tool_error(e)
+                logger.exception("Unexpected error querying resource %s", resource_id)
+                data["error"] = str(e)
                 content_parts.append(f"❌ Error querying resource: {str(e)}")
 
-            return "\n".join(content_parts)
+            return tool_output.result(
+                content_parts, data, rendering.narrower_page(page, page_size)
+            )
 
         except httpx.HTTPStatusError as e:
-            return f"Error: HTTP {e.response.status_code} - {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: HTTP {e.response.status_code} - {str(e)}")
         except Exception as e:  # noqa: BLE001
-            return f"Error: {str(e)}"
+            prometheus.record_tool_error(e)
+            return tool_output.error(f"Error: {str(e)}")
@@ -1,8 +1,10 @@
 import logging
+from typing import Annotated
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client
+from helpers import continuation, datagouv_api_client, rendering, tool_output
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
 from tools.search_datasets import clean_search_query
@@ -17,8 +19,11 @@ def register_search_dataservices_tool(mcp: FastMCP) -> None:
     )
     @log_tool
     async def search_dataservices(
-        query: str, page: int = 1, page_size: int = 20
-    ) -> str:
+        query: str = "",
+        page: int = 1,
+        page_size: int = 20,
+        cursor: str | None = None,
+    ) -> Annotated[CallToolResult, tool_output.DataserviceSearchOutput]:
         """
         Search for third-party APIs (dataservices) on data.gouv.fr by keywords.
 
@@ -27,30 +32,79 @@ def register_search_dataservices_tool(mcp: FastMCP) -> None:
         Use short, specific queries (the API uses AND logic, so generic words
         like "données" or "fichier" may return zero results).
 
+        To get the next page, pass only the `cursor` returned with this one
+        (`query` is then optional); an expired cursor is ignored in favor of the
+        other arguments.
+
         Typical workflow: search_dataservices → get_dataservice_info →
         get_dataservice_openapi_spec → call the API using base_api_url per spec.
         """
-        cleaned_query = clean_search_query(query)
+        state = continuation.resume("search_dataservices", cursor)
+        if state is not None:
+            query, page, page_size = state["query"], state["page"], state["page_size"]
+            search_query = state["search_query"]
+        elif not query.strip():
+            return tool_output.error(
+                "Error: query is required (cursor is missing or no longer valid)."
+            )
+        else:
+            search_query = clean_search_query(query)
 
         result = await datagouv_api_client.search_dataservices(
-            query=cleaned_query, page=page, page_size=page_size
+            query=search_query, page=page, page_size=page_size
         )
 
         dataservices = result.get("data", [])
 
-        if not dataservices and cleaned_query != query:
+        if not dataservices and state is None and search_query != query:
             logger.debug(
                 "No results with cleaned query '%s', trying original query '%s'",
-                cleaned_query,
+                search_query,
                 query,
             )
+            search_query = query
             result = await datagouv_api_client.search_dataservices(
                 query=query, page=page, page_size=page_size
             )
             dataservices = result.get("data", [])
 
+        total = result.get("total", len(dataservices))
+        next_page = tool_output.next_page(page, min(page_size, 100), total)
+        next_cursor = None
+        if next_page is not None:
+            next_cursor = continuation.encode(
+                "search_dataservices",
+                {
+                    "query": query,
+                    "search_query": search_query,
+                    "page": next_page,
+                    "page_size": page_size,
+                },
+            )
+        data: tool_output.DataserviceSearchOutput = {
+            "query": query,
+            "total": total,
+            "page": result.get("page", page),
+            "page_size": page_size,
+            "next_page": next_page,
+            "next_cursor": next_cursor,
+            "dataservices": [
+                {
+                    "id": ds.get("id"),
+                    "title": ds.get("title", "Untitled"),
+                    "description": ds.get("description") or None,
+                    "organization": ds.get("organization"),
+                    "base_api_url": ds.get("base_api_url"),
+                    "tags": ds.get("tags", []),
+                    "url": ds.get("url"),
+                }
+                for ds in dataservices
+            ],
+        }
         if not dataservices:
-            return f"No third-party APIs found for query: '{query}'"
+            return tool_output.result(
+                [f"No third-party APIs found for query: '{query}'"], data
+            )
 
         content_parts = [
             f"Found {result.get('total', len(dataservices))} third-party API(s) for query: '{query}'",
@@ -60,16 +114,20 @@ def register_search_dataservices_tool(mcp: FastMCP) -> None:
             content_parts.append(f"{i}. {ds.get('title', 'Untitled')}")
             content_parts.append(f"   ID: {ds.get('id')}")
             if ds.get("description"):
-                desc = ds.get("description", "")[:200]
-                content_parts.append(f"   Description: {desc}...")
+                desc = rendering.shorten(ds.get("description", ""), 200)
+                content_parts.append(f"   Description: {desc}")
             if ds.get("organization"):
                 content_parts.append(f"   Organization: {ds.get('organization')}")
             if ds.get("base_api_url"):
                 content_parts.append(f"   Base API URL: {ds.get('base_api_url')}")
             if ds.get("tags"):
-                tags = ", ".join(ds.get("tags", [])[:5])
+                tags = rendering.join_limited(ds.get("tags", []), 5)
                 content_parts.append(f"   Tags: {tags}")
             content_parts.append(f"   URL: {ds.get('url')}")
             content_parts.append("")
+        if next_cursor:
+            content_parts.append(f"Cursor for page {next_page}: {next_cursor}")
 
-        return "\n".join(content_parts)
+        return tool_output.result(
+            content_parts, data, rendering.narrower_page(page, page_size)
+        )
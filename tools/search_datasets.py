@@ -1,8 +1,10 @@
 import logging
+from typing import Annotated
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client
+from helpers import continuation, datagouv_api_client, rendering, tool_output
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
 
@@ -65,12 +67,13 @@ def register_search_datasets_tool(mcp: FastMCP) -> None:
     )
     @log_tool
     async def search_datasets(
-        query: str,
+        query: str = "",
         page: int = 1,
         page_size: int = 20,
         sort: str | None = None,
         last_update_range: str | None = None,
-    ) -> str:
+        cursor: str | None = None,
+    ) -> Annotated[CallToolResult, tool_output.DatasetSearchOutput]:
         """
         Search for datasets on data.gouv.fr by keywords.
 
@@ -84,14 +87,29 @@ def register_search_datasets_tool(mcp: FastMCP) -> None:
         results to recently updated datasets: last_30_days, last_12_months,
         last_3_years.
 
+        To get the next page, pass only the `cursor` returned with this one
+        (`query` is then optional); an expired cursor is ignored in favor of the
+        other arguments.
+
         Typical workflow: search_datasets → list_dataset_resources → query_resource_data.
         """
-        # Clean the query to remove generic stop words that break AND-based searches
-        cleaned_query = clean_search_query(query)
+        state = continuation.resume("search_datasets", cursor)
+        if state is not None:
+            query, page, page_size = state["query"], state["page"], state["page_size"]
+            sort, last_update_range = state["sort"], state["last_update_range"]
+            # The query that matched on the first page: no cleaning or fallback
+            search_query = state["search_query"]
+        elif not query.strip():
+            return tool_output.error(
+                "Error: query is required (cursor is missing or no longer valid)."
+            )
+        else:
+            # Clean the query to remove generic stop words that break AND-based searches
+            search_query = clean_search_query(query)
 
         # Try with cleaned query first
         result = await datagouv_api_client.search_datasets(
-            query=cleaned_query,
+            query=search_query,
             page=page,
             page_size=page_size,
             sort=sort,
@@ -103,12 +121,13 @@ def register_search_datasets_tool(mcp: FastMCP) -> None:
 
         # Fallback: if cleaned query returns no results and it differs from original,
         # try with the original query
-        if not datasets and cleaned_query != query:
+        if not datasets and state is None and search_query != query:
             logger.debug(
                 "No results with cleaned query '%s', trying original query '%s'",
-                cleaned_query,
+                search_query,
                 query,
             )
+            search_query = query
             result = await datagouv_api_client.search_datasets(
                 query=query,
                 page=page,
@@ -118,8 +137,43 @@ def register_search_datasets_tool(mcp: FastMCP) -> None:
             )
             datasets = result.get("data", [])
 
+        total = result.get("total", len(datasets))
+        next_page = tool_output.next_page(page, min(page_size, 100), total)
+        next_cursor = None
+        if next_page is not None:
+            next_cursor = continuation.encode(
+                "search_datasets",
+                {
+                    "query": query,
+                    "search_query": search_query,
+                    "page": next_page,
+                    "page_size": page_size,
+                    "sort": sort,
+                    "last_update_range": last_update_range,
+                },
+            )
+        data: tool_output.DatasetSearchOutput = {
+            "query": query,
+            "total": total,
+            "page": result.get("page", page),
+            "page_size": page_size,
+            "next_page": next_page,
+            "next_cursor": next_cursor,
+            "datasets": [
+                {
+                    "id": ds.get("id"),
+                    "title": ds.get("title", "Untitled"),
+                    "description_short": ds.get("description_short") or None,
+                    "organization": ds.get("organization"),
+                    "tags": ds.get("tags", []),
+                    "resources_count": ds.get("resources_count", 0),
+                    "url": ds.get("url"),
+                }
+                for ds in datasets
+            ],
+        }
         if not datasets:
-            return f"No datasets found for query: '{query}'"
+            return tool_output.result([f"No datasets found for query: '{query}'"], data)
 
         content_parts = [
             f"Found {result.get('total', len(datasets))} dataset(s) for query: '{query}'",
@@ -129,15 +183,19 @@ def register_search_datasets_tool(mcp: FastMCP) -> None:
             content_parts.append(f"{i}. {ds.get('title', 'Untitled')}")
             content_parts.append(f"   ID: {ds.get('id')}")
             if ds.get("description_short"):
-                desc = ds.get("description_short", "")[:200]
-                content_parts.append(f"   Description: {desc}...")
+                desc = rendering.shorten(ds.get("description_short", ""), 200)
+                content_parts.append(f"   Description: {desc}")
             if ds.get("organization"):
                 content_parts.append(f"   Organization: {ds.get('organization')}")
             if ds.get("tags"):
-                tags = ", ".join(ds.get("tags", [])[:5])
+                tags = rendering.join_limited(ds.get("tags", []), 5)
                 content_parts.append(f"   Tags: {tags}")
             content_parts.append(f"   Resources: {ds.get('resources_count', 0)}")
             content_parts.append(f"   URL: {ds.get('url')}")
             content_parts.append("")
+        if next_cursor:
+            content_parts.append(f"Cursor for page {next_page}: {next_cursor}")
 
-        return "\n".join(content_parts)
+        return tool_output.result(
+            content_parts, data, rendering.narrower_page(page, page_size)
+        )
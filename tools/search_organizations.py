@@ -1,8 +1,10 @@
 import logging
+from typing import Annotated
 
 from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult
 
-from helpers import datagouv_api_client
+from helpers import continuation, datagouv_api_client, rendering, tool_output
 from helpers.logging import MAIN_LOGGER_NAME, log_tool
 from helpers.mcp_tool_defaults import READ_ONLY_EXTERNAL_API_TOOL
 from tools.search_datasets import clean_search_query
@@ -24,7 +26,8 @@ def register_search_organizations_tool(mcp: FastMCP) -> None:
         badge: str | None = None,
         name: str | None = None,
         business_number_id: str | None = None,
-    ) -> str:
+        cursor: str | None = None,
+    ) -> Annotated[CallToolResult, tool_output.OrganizationSearchOutput]:
         """
         Find publishing organizations on data.gouv.fr (who publishes datasets and
         reuses).
@@ -44,12 +47,21 @@ def register_search_organizations_tool(mcp: FastMCP) -> None:
 
         The reply includes how many organizations matched, the current page, and for
         each hit: name (and acronym if any), id, slug, badges, optional usage
-        metrics, and links to the organization page.
+        metrics, and links to the organization page. To get the next page, pass only
+        the `cursor` returned with this one; an expired cursor is ignored in favor of
+        the other arguments.
         """
-        cleaned_query = clean_search_query(query) if query else ""
+        state = continuation.resume("search_organizations", cursor)
+        if state is not None:
+            query, page, page_size = state["query"], state["page"], state["page_size"]
+            sort, badge = state["sort"], state["badge"]
+            name, business_number_id = state["name"], state["business_number_id"]
+            search_query = state["search_query"]
+        else:
+            search_query = clean_search_query(query) if query else ""
 
         result = await datagouv_api_client.search_organizations(
-            query=cleaned_query,
+            query=search_query,
             page=page,
             page_size=page_size,
             sort=sort,
@@ -59,12 +71,13 @@ def register_search_organizations_tool(mcp: FastMCP) -> None:
         )
         orgs = result.get("data", [])
 
-        if not orgs and cleaned_query != query and query:
+        if not orgs and state is None and search_query != query and query:
             logger.debug(
                 "No org results with cleaned query '%s', trying original '%s'",
-                cleaned_query,
+                search_query,
                 query,
             )
+            search_query = query
             result = await datagouv_api_client.search_organizations(
                 query=query,
                 page=page,
@@ -76,9 +89,46 @@ def register_search_organizations_tool(mcp: FastMCP) -> None:
             )
             orgs = result.get("data", [])
 
+        total = result.get("total", len(orgs))
+        next_page = tool_output.next_page(page, min(page_size, 100), total)
+        next_cursor = None
+        if next_page is not None:
+            next_cursor = continuation.encode(
+                "search_organizations",
+                {
+                    "query": query,
+                    "search_query": search_query,
+                    "page": next_page,
+                    "page_size": page_size,
+                    "sort": sort,
+                    "badge": badge,
+                    "name": name,
+                    "business_number_id": business_number_id,
+                },
+            )
+        data: tool_output.OrganizationSearchOutput = {
+            "total": total,
+            "page": result.get("page", page),
+            "page_size": page_size,
+            "next_page": next_page,
+            "next_cursor": next_cursor,
+            "organizations": [
+                {
+                    "id": org.get("id"),
+                    "name": org.get("name") or "Untitled",
+                    "acronym": org.get("acronym"),
+                    "slug": org.get("slug"),
+                    "badges": org.get("badges") or [],
+                    "metrics": org.get("metrics") or {},
+                    "url": org.get("url"),
+                    "profile_url": org.get("profile_url"),
+                }
+                for org in orgs
+            ],
+        }
         if not orgs:
             label = f"query '{query}'" if query else "current filters"
-            return f"No organizations found for {label}"
+            return tool_output.result([f"No organizations found for {label}"], data)
 
         filter_bits: list[str] = []
         if query:
@@ -117,5 +167,9 @@ def register_search_organizations_tool(mcp: FastMCP) -> None:
             if org.get("profile_url") and org.get("profile_url") != org.get("url"):
                 content_parts.append(f"   Profile: {org.get('profile_url')}")
             content_parts.append("")
+        if next_cursor:
+            content_parts.append(f"Cursor for page {next_page}: {next_cursor}")
 
-        return "\n".join(content_parts)
+        return tool_output.result(
+            content_parts, data, rendering.narrower_page(page, page_size)
+        )